@@ -0,0 +1,20 @@
+import os
+import sys
+
+
+# Helper for resource loading (works for dev and PyInstaller EXE)
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    try:
+        base_path = sys._MEIPASS
+    except AttributeError:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+def app_data_path(filename):
+    """ Get path to a per-user data file (caches, checkpoints), creating its folder """
+    base_path = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    folder = os.path.join(base_path, "Sum10Solver")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, filename)
@@ -0,0 +1,261 @@
+"""
+End-to-end auto_solve harness on a simulated desktop
+
+Runs the real PuzzleSolver.auto_solve loop on Linux against stand-ins: a
+FakeDesktop renders random boards from templates/T*.png and is both the
+screen capture and the mouse (a released drag that makes a move clears its
+cells), a FakeWindowBackend plays the game window and FakeGUI carries the
+control panel settings. Reports moves per second, the wall-clock split by
+phase and whether the solver's board still matched the screen.
+
+Phases are timed exclusively (a scan's captures count as "capture", not
+"scan"); "search" is the move index and "other" the rest of the loop:
+bookkeeping, cancellation checks. --sleep-scale multiplies every fixed wait
+of the loop and of the drags, so 0 measures pure compute overhead.
+--target and --min-count play an event variant's rules on both sides.
+--fill starts from late-game boards, so the exact endgame plan gets played.
+
+Usage:
+    python bench_auto_solve.py --boards 5
+    python bench_auto_solve.py --boards 20 --sleep-scale 0 --json overhead.json
+    python bench_auto_solve.py --boards 5 --target 15 --min-count 3
+    python bench_auto_solve.py --boards 10 --fill 0.1
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Solver method -> phase it is billed to
+PHASES = {
+    "wait_for_stable_screen": "settle",
+    "get_matrix_numbers": "scan",
+    "recheck_uncertain": "scan",
+    "grab_gray": "capture",
+    "resume_from_checkpoint": "plan",
+    "postpone_uncertain": "plan",
+    "select_best_batch": "plan",
+    "select_solutions": "plan",
+    "fit_batch_to_deadline": "plan",
+    "drag_features": "plan",
+    "update_overlay": "overlay",
+    "highlight_solution": "overlay",
+    "perform_drag": "drag",
+    "verify_drag": "verify",
+    "sleep": "sleep",
+    "new_checkpoint": "checkpoint",
+    "save_checkpoint": "checkpoint",
+    "save_drag_cost": "checkpoint",
+    "log": "log",
+}
+
+
+class FakeControl:
+    """Checkbox or spinbox stand-in"""
+
+    def __init__(self, value):
+        self._value = value
+
+    def isChecked(self):
+        return bool(self._value)
+
+    def value(self):
+        return self._value
+
+
+class FakeGUI:
+    """The ControlGUI settings auto_solve reads, at their defaults"""
+
+    def __init__(self, **overrides):
+        settings = dict(capture_check=False, auto_detect_check=True, endgame_check=True,
+                        verify_check=True, best_batch_check=True, delay_spin=100,
+                        drag_steps_spin=4, step_interval_spin=15, time_budget_spin=0)
+        settings.update(overrides)
+        for name, value in settings.items():
+            setattr(self, name, FakeControl(value))
+
+    def log(self, message):
+        pass
+
+
+class PhaseTimer:
+    """Exclusive wall time per phase of wrapped callables"""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.stack = []  # [phase, start, time spent in nested phases]
+
+    def wrap(self, phase, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            self.stack.append([phase, time.perf_counter(), 0.0])
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                phase_, start, nested = self.stack.pop()
+                elapsed = time.perf_counter() - start
+                self.totals[phase] += elapsed - nested
+                self.calls[phase] += 1
+                if self.stack:
+                    self.stack[-1][2] += elapsed
+        return timed
+
+    def install(self, obj, name, phase):
+        setattr(obj, name, self.wrap(phase, getattr(obj, name)))
+
+
+def timed_move_index(timer):
+    """MoveIndex whose construction and updates bill to "search" """
+    from move_index import MoveIndex
+
+    class TimedMoveIndex(MoveIndex):
+        __init__ = timer.wrap("search", MoveIndex.__init__)
+        update = timer.wrap("search", MoveIndex.update)
+        moves = timer.wrap("search", MoveIndex.moves)
+
+    return TimedMoveIndex
+
+
+def run_board(seed, rows, cols, sleep_scale, gui_settings=None, rules=None, fill=1.0):
+    """Auto-solve one simulated board and return its metrics"""
+    import main
+    from grid_config import GridConfig
+    from move_index import MoveIndex
+    from synthetic import FakeDesktop, random_board
+    from window_backend import FakeWindowBackend, GameWindow
+
+    grid = GridConfig(rows, cols, left_start=40, top_start=40)
+    screen_w = grid.left_start + cols * grid.offset_x + 40
+    screen_h = grid.top_start + rows * grid.offset_y + 40
+    window = GameWindow(1, 1, "Simulated NIKKE", (0, 0, screen_w, screen_h))
+
+    solver = main.PuzzleSolver(grid=grid, window_backend=FakeWindowBackend([window]))
+    solver.gui = FakeGUI(**(gui_settings or {}))
+    if rules is not None:
+        solver.set_rules(rules.target, rules.min_count)
+    desktop = FakeDesktop(screen_w, screen_h, templates=solver.template_bank.templates_at(1.0),
+                          sleep_scale=sleep_scale, rules=solver.rules)
+    board = desktop.add_board(grid, random_board(rows, cols, seed, fill))
+    solver.input = desktop
+    solver.grab = desktop.grab
+    solver.sleep_scale = sleep_scale
+
+    # Keep the user's checkpoint, cost model and learned templates out of it
+    scratch = tempfile.mkdtemp(prefix="sum10-bench-")
+    solver.checkpoint_path = os.path.join(scratch, "checkpoint.json")
+    solver.drag_cost_path = os.path.join(scratch, "drag_cost.json")
+    solver.drag_cost = type(solver.drag_cost)()
+    solver.session_templates_path = os.path.join(scratch, "session_templates.npz")
+
+    messages = []
+    solver.log = messages.append
+    timer = PhaseTimer()
+    for name, phase in PHASES.items():
+        timer.install(solver, name, phase)
+    timer.install(desktop, "sleep", "input sleep")
+    timer.install(solver.endgame, "solve", "plan")
+
+    original_index = main.MoveIndex
+    main.MoveIndex = timed_move_index(timer)
+    try:
+        start = time.perf_counter()
+        solver.auto_solve()
+        wall = time.perf_counter() - start
+    finally:
+        main.MoveIndex = original_index
+
+    on_screen = [[value if isinstance(value, int) else " " for value in row] for row in board]
+    phases = dict(timer.totals)
+    phases["other"] = max(0.0, wall - sum(phases.values()))
+    return {
+        "seed": seed,
+        "moves": solver.moves_executed,
+        "cleared_moves": desktop.cleared_moves,
+        "rejected_drags": desktop.rejected_moves,
+        "cells_left": sum(isinstance(value, int) for row in board for value in row),
+        "moves_left": len(MoveIndex(on_screen, solver.rules).moves()),
+        "board_matches": solver.matrix == on_screen,
+        "wall": wall,
+        "phases": phases,
+        "endgame_plans": sum(m.startswith("Endgame plan") for m in messages),
+        "errors": [m for m in messages if m.startswith("ERROR")],
+    }
+
+
+def summarize(runs, sleep_scale):
+    wall = sum(run["wall"] for run in runs)
+    moves = sum(run["moves"] for run in runs)
+    phases = defaultdict(float)
+    for run in runs:
+        for phase, seconds in run["phases"].items():
+            phases[phase] += seconds
+    return {
+        "boards": len(runs),
+        "sleep_scale": sleep_scale,
+        "moves": moves,
+        "wall": wall,
+        "moves_per_second": moves / wall if wall else 0.0,
+        "phases": dict(sorted(phases.items(), key=lambda item: -item[1])),
+        "boards_matching_screen": sum(run["board_matches"] for run in runs),
+        "rejected_drags": sum(run["rejected_drags"] for run in runs),
+        "boards_stopped_with_moves_left": sum(run["moves_left"] > 0 for run in runs),
+        "endgame_plans": sum(run["endgame_plans"] for run in runs),
+        "errors": [error for run in runs for error in run["errors"]],
+    }
+
+
+def print_report(summary):
+    print(f"\n=== auto_solve on {summary['boards']} simulated boards, sleep scale {summary['sleep_scale']} ===")
+    print(f"{summary['moves']} moves in {summary['wall']:.2f}s: {summary['moves_per_second']:.1f} moves/s")
+    print(f"\n{'phase':<14}{'seconds':>10}{'share':>9}{'ms/move':>10}")
+    moves = max(1, summary["moves"])
+    for phase, seconds in summary["phases"].items():
+        print(f"{phase:<14}{seconds:>10.3f}{seconds / summary['wall']:>9.1%}{seconds * 1000 / moves:>10.2f}")
+    print(f"\nBoard matched the screen: {summary['boards_matching_screen']}/{summary['boards']}")
+    print(f"Drags the game rejected: {summary['rejected_drags']}")
+    print(f"Stopped with moves left on screen: {summary['boards_stopped_with_moves_left']}")
+    print(f"Exact endgame plans played: {summary['endgame_plans']}")
+    for error in summary["errors"]:
+        print(f"  {error}")
+
+
+def main(argv=None):
+    from move_engine import MoveRules
+
+    parser = argparse.ArgumentParser(description="Time the real auto_solve loop on simulated boards")
+    parser.add_argument("--boards", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first board")
+    parser.add_argument("--rows", type=int, default=16)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--sleep-scale", type=float, default=1.0,
+                        help="multiply all fixed waits and drag sleeps (0 = pure compute)")
+    parser.add_argument("--target", type=int, default=10, help="sum a move needs (event variants)")
+    parser.add_argument("--min-count", type=int, default=2, help="fewest numbers a move clears")
+    parser.add_argument("--fill", type=float, default=1.0,
+                        help="fraction of cells holding a digit at the start (e.g. 0.1 reaches the endgame)")
+    parser.add_argument("--no-verify", action="store_true", help="skip on-screen drag verification")
+    parser.add_argument("--json", help="also write the summary and per-board results to this file")
+    args = parser.parse_args(argv)
+
+    gui_settings = {"verify_check": not args.no_verify}
+    rules = MoveRules(args.target, args.min_count)
+    runs = [run_board(args.seed + i, args.rows, args.cols, args.sleep_scale, gui_settings, rules, args.fill)
+            for i in range(args.boards)]
+    summary = summarize(runs, args.sleep_scale)
+    print_report(summary)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "runs": runs}, f, indent=2)
+        print(f"Results written to {args.json}")
+    correct = summary["boards_matching_screen"] == summary["boards"] and not summary["rejected_drags"]
+    return 0 if correct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
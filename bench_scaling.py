@@ -0,0 +1,149 @@
+"""
+Board-size scaling benchmark
+
+Times scanning (recognition of a full-grid capture) and planning
+(a full find_all_solutions, and the per-move MoveIndex update auto_solve
+uses instead) for square boards up to 50x50, on synthetic captures
+rendered from the digit templates. Scans are timed on a full board with one
+thread and with all scan workers, and on a late-game board (mostly empty
+cells, which are skipped). Prints a table and an ASCII chart; --plot also
+saves a PNG chart if matplotlib is installed.
+
+Usage:
+    python bench_scaling.py --sizes 10,20,30,40,50 --repeats 5
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from grid_config import GridConfig
+from move_index import MoveIndex
+from synthetic import random_board, render_board
+
+
+def timed(fn, repeats):
+    """Median wall time of fn over repeats runs"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_size(solver, size, repeats, seed):
+    solver.grid.resize(size, size)
+    board = random_board(size, size, seed)
+    img = render_board(board, solver.grid, solver.templates)
+
+    late_board = [[value if (r * size + c) % 4 == 0 else ' ' for c, value in enumerate(row)]
+                  for r, row in enumerate(board)]
+    late_img = render_board(late_board, solver.grid, solver.templates)
+
+    digits, _, _ = solver.recognize_grid(img)
+    accuracy = sum(int(digits[r][c]) == board[r][c] for r in range(size) for c in range(size)) / size ** 2
+
+    def scan_with(workers, image):
+        def scan():
+            solver.scan_workers = workers
+            solver.recognize_grid(image)
+        return scan
+
+    def plan():
+        solver.matrix = [row[:] for row in board]
+        solver.find_all_solutions()
+
+    def index_update_time():
+        """Average MoveIndex update per executed move over a baseline game"""
+        solver.matrix = [row[:] for row in board]
+        index = MoveIndex(solver.matrix)
+        total, moves = 0.0, 0
+        while True:
+            batch = solver.select_solutions(index.moves())
+            if not batch:
+                return total / max(1, moves)
+            for solution, cells in batch:
+                start = time.perf_counter()
+                index.clear(cells)
+                total += time.perf_counter() - start
+                moves += 1
+
+    all_workers = solver.scan_workers
+    result = {
+        "size": size,
+        "cells": size * size,
+        "scan_single": timed(scan_with(1, img), repeats),
+        "scan": timed(scan_with(all_workers, img), repeats),
+        "scan_late": timed(scan_with(all_workers, late_img), repeats),
+        "plan": timed(plan, repeats),
+        "index_update": index_update_time(),
+        "accuracy": accuracy,
+    }
+    solver.scan_workers = all_workers
+    return result
+
+
+def print_chart(results):
+    longest = max(row["scan"] + row["plan"] for row in results)
+    ms_per_mark = max(1.0, longest * 1000 / 60)
+    print(f"\nScan + plan time (ms), one # per {ms_per_mark:.0f} ms:")
+    for row in results:
+        scan_ms, plan_ms = row["scan"] * 1000, row["plan"] * 1000
+        bar = "#" * max(1, round((scan_ms + plan_ms) / ms_per_mark))
+        print(f"{row['size']:>3}x{row['size']:<3} {bar} {scan_ms:.1f} + {plan_ms:.1f}")
+
+
+def save_plot(results, path):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, skipping --plot")
+        return
+    cells = [row["cells"] for row in results]
+    plt.figure(figsize=(7, 4))
+    plt.plot(cells, [row["scan"] * 1000 for row in results], marker="o", label="scan")
+    plt.plot(cells, [row["scan_single"] * 1000 for row in results], marker="o", label="scan (1 thread)")
+    plt.plot(cells, [row["scan_late"] * 1000 for row in results], marker="o", label="scan (late game)")
+    plt.plot(cells, [row["plan"] * 1000 for row in results], marker="o", label="plan")
+    plt.xlabel("cells")
+    plt.ylabel("ms")
+    plt.legend()
+    plt.grid(alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path)
+    print(f"Chart saved to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scan and plan time against board size")
+    parser.add_argument("--sizes", default="10,20,30,40,50", help="comma separated board sizes (NxN)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plot", help="save a PNG chart to this path (needs matplotlib)")
+    args = parser.parse_args(argv)
+
+    from main import PuzzleSolver
+    solver = PuzzleSolver(grid=GridConfig())
+    solver.log = lambda message: None
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = [bench_size(solver, size, args.repeats, args.seed) for size in sizes]
+
+    print(f"\nScan workers: {solver.scan_workers}")
+    print(f"{'board':>8}{'cells':>8}{'scan ms':>10}{'1-thread ms':>13}{'late-game ms':>14}"
+          f"{'plan ms':>10}{'update ms':>11}{'accuracy':>10}")
+    for row in results:
+        print(f"{row['size']:>4}x{row['size']:<3}{row['cells']:>8}{row['scan'] * 1000:>10.1f}"
+              f"{row['scan_single'] * 1000:>13.1f}{row['scan_late'] * 1000:>14.1f}"
+              f"{row['plan'] * 1000:>10.1f}{row['index_update'] * 1000:>11.3f}{row['accuracy']:>10.1%}")
+    print_chart(results)
+
+    if args.plot:
+        save_plot(results, args.plot)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
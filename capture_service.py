@@ -0,0 +1,145 @@
+"""
+Optional background capture of the puzzle grid.
+
+CaptureService grabs the grid region at a fixed rate into a small ring of
+preallocated grayscale NumPy frames, each tagged with a sequence number and
+timestamp. Consumers take the newest frame, or wait for one newer than a
+given time, and get a view into the ring rather than a copy. A view stays
+intact for (slots - 1) capture periods; copy it if you need it for longer,
+and check is_intact() after copying to drop a copy the capture thread tore.
+
+stop() ends the capture thread, so the service costs nothing while idle.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import mss
+import numpy as np
+
+Frame = namedtuple("Frame", "seq timestamp image region")
+
+
+def mss_grab_into(sct, region, out):
+    """Grab a screen region straight into a preallocated grayscale buffer"""
+    shot = sct.grab(region)
+    bgra = np.frombuffer(shot.bgra, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+    cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=out)
+
+
+class CaptureService:
+    def __init__(self, region, fps=30, slots=4, grab_into=mss_grab_into, sct_factory=mss.mss):
+        # region may be a dict or a callable returning one (e.g. GridConfig.capture_area)
+        self.region = region
+        self.interval = 1.0 / fps
+        self.slots = max(2, slots)
+        self.grab_into = grab_into
+        self.sct_factory = sct_factory
+
+        self.ring = None
+        self.ring_region = None
+        self.ring_times = [0.0] * self.slots
+        self.seq = 0   # Sequence number of the newest frame, 0 = none yet
+
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.error = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.stop_event.clear()
+        self.error = None
+        with self.condition:
+            self.seq = 0
+        self.thread = threading.Thread(target=self._run, name="grid-capture", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop capturing; the thread exits, so an idle service uses no CPU"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.thread = None
+        with self.condition:
+            self.condition.notify_all()
+
+    def _current_region(self):
+        return dict(self.region() if callable(self.region) else self.region)
+
+    def _allocate(self, region):
+        self.ring = np.empty((self.slots, region["height"], region["width"]), dtype=np.uint8)
+        self.ring_region = region
+
+    def _run(self):
+        try:
+            with self.sct_factory() as sct:
+                next_time = time.perf_counter()
+                while not self.stop_event.is_set():
+                    region = self._current_region()
+                    if region != self.ring_region:
+                        with self.condition:
+                            self._allocate(region)
+                            self.seq = 0
+
+                    slot = (self.seq + 1) % self.slots
+                    captured_at = time.time()  # Pixels are at least this fresh
+                    self.grab_into(sct, region, self.ring[slot])
+                    with self.condition:
+                        self.ring_times[slot] = captured_at
+                        self.seq += 1
+                        self.condition.notify_all()
+
+                    next_time += self.interval
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        self.stop_event.wait(delay)
+                    else:
+                        next_time = time.perf_counter()  # Fell behind; don't burst to catch up
+        except Exception as e:
+            self.error = e
+        finally:
+            with self.condition:
+                self.condition.notify_all()
+
+    def _frame(self):
+        slot = self.seq % self.slots
+        return Frame(self.seq, self.ring_times[slot], self.ring[slot], self.ring_region)
+
+    def latest(self):
+        """Newest frame (a view into the ring), or None if nothing was captured yet"""
+        with self.condition:
+            return self._frame() if self.seq else None
+
+    def wait_newer(self, timestamp, timeout=1.0):
+        """Block until a frame captured after timestamp exists; None on timeout or stop"""
+        deadline = time.time() + timeout
+        with self.condition:
+            while True:
+                if self.seq and self.ring_times[self.seq % self.slots] > timestamp:
+                    return self._frame()
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.running:
+                    return None
+                self.condition.wait(remaining)
+
+    def is_intact(self, frame):
+        """True while the ring slot holding frame has not been overwritten"""
+        with self.condition:
+            return self.seq - frame.seq < self.slots - 1 and frame.region == self.ring_region
+
+    @staticmethod
+    def crop(frame, area):
+        """View of a screen area inside a frame, or None if the area is not fully inside it"""
+        region = frame.region
+        top = area["top"] - region["top"]
+        left = area["left"] - region["left"]
+        if top < 0 or left < 0 or top + area["height"] > region["height"] or left + area["width"] > region["width"]:
+            return None
+        return frame.image[top:top + area["height"], left:left + area["width"]]
@@ -0,0 +1,157 @@
+"""
+Auto-solve checkpoints for fast resume.
+
+A checkpoint holds the board auto_solve believes is on screen (0 = empty),
+the moves executed since the last full scan, the rest of the plan it was
+working through, the move being dragged when it stopped, and a signature of
+every cell from the scan it started from: a blank flag plus a gradient
+hash. Cells never change on screen except by being cleared, so on resume a
+fresh capture only has to show blank cells where the board says empty and
+the same hashes everywhere else. Hashing a 16x10 grid takes a few
+milliseconds, far less than recognizing it and replanning.
+"""
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+HASH_SIZE = 16
+HASH_EDGE = 12       # Gray-level step that counts as an edge; flat noise stays below it
+HASH_TOLERANCE = 16  # Differing bits still counted as the same cell (distinct digits differ by 20+)
+
+
+def cell_hash(cell_img):
+    """
+    Signs of the strong horizontal and vertical steps in a 16x16 thumbnail,
+    packed into an int. The digits are bold enough that a plain average hash
+    cannot tell 6 from 8; edges can.
+    """
+    small = cv2.resize(cell_img, (HASH_SIZE + 1, HASH_SIZE + 1), interpolation=cv2.INTER_AREA).astype(np.int16)
+    dx = small[:-1, 1:] - small[:-1, :-1]
+    dy = small[1:, :-1] - small[:-1, :-1]
+    bits = np.concatenate([(dx > HASH_EDGE).ravel(), (dx < -HASH_EDGE).ravel(),
+                           (dy > HASH_EDGE).ravel(), (dy < -HASH_EDGE).ravel()])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def cell_hashes(cells, blank):
+    """Hash of every non-blank cell of a rows x columns x h x w cell view (0 for blank cells)"""
+    rows, columns = blank.shape
+    return [[0 if blank[r, c] else cell_hash(cells[r, c]) for c in range(columns)]
+            for r in range(rows)]
+
+
+def hash_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def grid_key(grid):
+    """Geometry a checkpoint is only valid for"""
+    return [grid.rows, grid.columns, grid.left_start, grid.top_start,
+            grid.offset_x, grid.offset_y, grid.cell_w, grid.cell_h]
+
+
+class SolveCheckpoint:
+    def __init__(self, board, blank, hashes, geometry):
+        self.board = [[value if isinstance(value, int) else 0 for value in row] for row in board]
+        self.blank = [[bool(value) for value in row] for row in blank]
+        self.hashes = hashes
+        self.geometry = list(geometry)
+        self.executed = []      # Moves played since the scan, in order
+        self.pending = []       # Rest of the current plan
+        self.in_flight = None   # Move being dragged when the solve stopped
+        self.updated = time.time()
+
+    def matrix(self):
+        """Board in PuzzleSolver.matrix form (' ' for empty cells)"""
+        return [[value if value else " " for value in row] for row in self.board]
+
+    def set_plan(self, moves):
+        self.pending = [tuple(move) for move in moves]
+        self.updated = time.time()
+
+    def start_move(self, move):
+        move = tuple(move)
+        if move in self.pending:
+            self.pending.remove(move)
+        self.in_flight = move
+        self.updated = time.time()
+
+    def skip_move(self, move):
+        move = tuple(move)
+        if move in self.pending:
+            self.pending.remove(move)
+
+    def finish_move(self, move, changes):
+        """Record a played move and the board values it left behind"""
+        for (r, c), value in changes.items():
+            self.board[r][c] = value if isinstance(value, int) else 0
+        self.executed.append(tuple(move))
+        self.in_flight = None
+        self.updated = time.time()
+
+    def compare(self, blank, hashes, in_flight_cells=()):
+        """
+        Check a fresh capture's cell signatures against the checkpoint.
+        Returns (mismatched cells, whether the in-flight move's cells were
+        cleared). Cells of the in-flight move may be in either state, as long
+        as they all agree.
+        """
+        in_flight_cells = set(in_flight_cells)
+        mismatches = []
+        cleared, kept = 0, 0
+        for r, row in enumerate(self.board):
+            for c, value in enumerate(row):
+                if (r, c) in in_flight_cells and value:
+                    if blank[r][c]:
+                        cleared += 1
+                        continue
+                    kept += 1
+                if not value:
+                    if not blank[r][c]:
+                        mismatches.append((r, c))
+                elif blank[r][c] or self.blank[r][c] or \
+                        hash_distance(hashes[r][c], self.hashes[r][c]) > HASH_TOLERANCE:
+                    mismatches.append((r, c))
+        if cleared and kept:
+            # Half-cleared move: the screen is in a state the plan never produces
+            mismatches.extend(cell for cell in in_flight_cells if cell not in mismatches)
+        return mismatches, bool(cleared) and not kept
+
+    def to_dict(self):
+        return {
+            "board": self.board,
+            "blank": self.blank,
+            "hashes": self.hashes,
+            "geometry": self.geometry,
+            "executed": self.executed,
+            "pending": self.pending,
+            "in_flight": self.in_flight,
+            "updated": self.updated,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        checkpoint = cls(data["board"], data["blank"], data["hashes"], data["geometry"])
+        checkpoint.executed = [tuple(move) for move in data["executed"]]
+        checkpoint.pending = [tuple(move) for move in data["pending"]]
+        checkpoint.in_flight = tuple(data["in_flight"]) if data["in_flight"] else None
+        checkpoint.updated = data["updated"]
+        return checkpoint
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Checkpoint saved at path, or None if there is none or it is unreadable"""
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
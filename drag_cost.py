@@ -0,0 +1,123 @@
+"""
+Drag cost model and deadline-aware move selection.
+
+DragCostModel predicts how long a move takes end to end (highlight, drag,
+verification and settle) from the drag distance, the number of cells it
+clears and the nominal sleep time of the current drag settings. It is a
+small ridge regression that starts from a hand-written prior and learns
+online from every move auto_solve times, with older samples slowly decayed
+so it follows setting changes. It is saved between runs.
+
+fit_to_budget() then orders moves by cells cleared per predicted second and
+keeps only those that fit in the remaining time.
+"""
+import json
+import math
+import os
+
+import numpy as np
+
+FEATURES = ("bias", "distance_100px", "cells", "nominal_sleep")
+# Fixed sleeps around a move (~0.85 s), barely any distance cost, and the
+# configured drag delay/step sleeps taken at face value
+DEFAULT_PRIOR = (0.85, 0.01, 0.0, 1.0)
+MODEL_VERSION = 1
+
+
+class DragCostModel:
+    def __init__(self, prior=DEFAULT_PRIOR, prior_weight=4.0, decay=0.995, min_cost=0.05):
+        self.prior = np.array(prior, dtype=np.float64)
+        self.prior_weight = prior_weight  # How many samples the prior is worth
+        self.decay = decay                # Per-sample forgetting of older measurements
+        self.min_cost = min_cost
+        self.xtx = np.zeros((len(FEATURES), len(FEATURES)))
+        self.xty = np.zeros(len(FEATURES))
+        self.samples = 0
+        self._weights = None
+
+    @staticmethod
+    def features(distance, cells, nominal_sleep):
+        return np.array([1.0, distance / 100.0, cells, nominal_sleep])
+
+    def weights(self):
+        if self._weights is None:
+            n = len(FEATURES)
+            a = self.xtx + self.prior_weight * np.eye(n)
+            b = self.xty + self.prior_weight * self.prior
+            self._weights = np.linalg.solve(a, b)
+        return self._weights
+
+    def predict(self, distance, cells, nominal_sleep):
+        """Expected seconds for one move"""
+        return max(self.min_cost, float(self.features(distance, cells, nominal_sleep) @ self.weights()))
+
+    def observe(self, distance, cells, nominal_sleep, seconds):
+        """Add one measured move"""
+        if not math.isfinite(seconds) or seconds <= 0:
+            return
+        x = self.features(distance, cells, nominal_sleep)
+        self.xtx = self.decay * self.xtx + np.outer(x, x)
+        self.xty = self.decay * self.xty + x * seconds
+        self.samples += 1
+        self._weights = None
+
+    def describe(self):
+        return ", ".join(f"{name}={weight:.3f}" for name, weight in zip(FEATURES, self.weights()))
+
+    def to_dict(self):
+        return {
+            "version": MODEL_VERSION,
+            "features": list(FEATURES),
+            "prior": self.prior.tolist(),
+            "xtx": self.xtx.tolist(),
+            "xty": self.xty.tolist(),
+            "samples": self.samples,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != MODEL_VERSION or data.get("features") != list(FEATURES):
+            raise ValueError("drag cost model format changed")
+        model = cls(prior=data["prior"])
+        model.xtx = np.array(data["xtx"], dtype=np.float64)
+        model.xty = np.array(data["xty"], dtype=np.float64)
+        model.samples = data["samples"]
+        return model
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Saved model, or a fresh one if there is none or it is unreadable"""
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls()
+
+
+def fit_to_budget(items, budget, sequential=False):
+    """
+    Choose moves for the time left. items are (move, cells cleared, predicted
+    seconds). Independent moves are ordered by cells per second and any
+    that would overrun the budget are dropped, so cheaper moves can still
+    fill what is left. A sequential plan (later moves rely on earlier ones)
+    keeps its order and is cut at the first move that does not fit.
+    Returns (chosen moves in play order, dropped moves).
+    """
+    if not sequential:
+        items = sorted(items, key=lambda item: -item[1] / item[2])
+    chosen, dropped = [], []
+    spent = 0.0
+    for item in items:
+        move, value, cost = item
+        if spent + cost <= budget and not (sequential and dropped):
+            chosen.append(move)
+            spent += cost
+        else:
+            dropped.append(move)
+    return chosen, dropped
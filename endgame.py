@@ -0,0 +1,268 @@
+"""
+Exact endgame planning for the Sum10 puzzle.
+
+Once only a few numbers are left, greedy move order tends to strand cells.
+EndgameSolver encodes the remaining cells as a bitmask, lists every right,
+down and square move that could apply to that residue, and runs a memoized
+search over remaining-cell masks for the move order that clears the most
+cells. The search checks a deadline at every state; if it runs out of time
+solve() returns None and the caller keeps its usual greedy plan.
+
+Run this module directly to check it on worst-case residues: it fails if a
+solve overruns the latency bound, if a plan holds an illegal move, or if a
+plan clears fewer cells than a greedy first-found move order:
+    python endgame.py --trials 50
+"""
+import argparse
+import random
+import sys
+import time
+
+
+class EndgameTimeout(Exception):
+    pass
+
+
+class EndgameSolver:
+    def __init__(self, threshold=18, time_limit=0.2, target=10, min_count=2):
+        self.threshold = threshold      # Switch to exact search below this many numbers
+        self.time_limit = time_limit    # Seconds; solve() never runs much longer
+        self.target = target
+        self.min_count = min_count
+        self.last_stats = {}
+
+    def should_solve(self, remaining):
+        return 0 < remaining < self.threshold
+
+    def solve(self, matrix):
+        """
+        Best move order for the numbers left on the board, as a list of
+        (type, start_r, start_c, end_r, end_c) moves to play in sequence,
+        or None if the time limit was reached first
+        """
+        start = time.perf_counter()
+        deadline = start + self.time_limit
+
+        cells = [(r, c) for r, row in enumerate(matrix) for c, value in enumerate(row)
+                 if isinstance(value, int) and 1 <= value <= 9]
+        values = [matrix[r][c] for r, c in cells]
+        moves = self.legal_moves(matrix, cells)
+
+        memo = {}
+        nodes = 0
+
+        def best(mask):
+            nonlocal nodes
+            if mask in memo:
+                return memo[mask][0]
+            nodes += 1
+            if time.perf_counter() > deadline:
+                raise EndgameTimeout()
+
+            remaining = bin(mask).count("1")
+            best_value, best_move = 0, None
+            for move_mask, anchors, move in moves:
+                if anchors & mask != anchors:
+                    continue
+                hit = move_mask & mask
+                total = 0
+                count = 0
+                bits = hit
+                while bits:
+                    low = bits & -bits
+                    total += values[low.bit_length() - 1]
+                    count += 1
+                    bits ^= low
+                if total != self.target or count < self.min_count:
+                    continue
+                value = count + best(mask & ~move_mask)
+                if value > best_value:
+                    best_value, best_move = value, move
+                    if best_value == remaining:
+                        break  # Clears everything, can't do better
+            memo[mask] = (best_value, best_move)
+            return best_value
+
+        full_mask = (1 << len(cells)) - 1
+        try:
+            cleared = best(full_mask)
+        except EndgameTimeout:
+            self.last_stats = {"cells": len(cells), "moves": len(moves), "nodes": nodes,
+                               "time": time.perf_counter() - start, "timed_out": True}
+            return None
+
+        plan = []
+        mask = full_mask
+        while memo.get(mask, (0, None))[1] is not None:
+            move = memo[mask][1]
+            plan.append(move)
+            mask &= ~self._move_mask(move, cells)
+
+        self.last_stats = {"cells": len(cells), "moves": len(moves), "nodes": nodes,
+                           "cleared": cleared, "time": time.perf_counter() - start, "timed_out": False}
+        return plan
+
+    def legal_moves(self, matrix, cells):
+        """
+        Every move shape that could ever apply to this residue, as
+        (cells mask, anchor mask, move). A move is legal in a state when its
+        anchors (the drag start, and the end for right/down) still hold
+        numbers and the numbers it covers sum to the target.
+        """
+        rows, columns = len(matrix), len(matrix[0])
+        bit = {cell: 1 << i for i, cell in enumerate(cells)}
+        seen = set()
+        moves = []
+
+        def add(move, covered, anchors):
+            move_mask = 0
+            for cell in covered:
+                move_mask |= bit.get(cell, 0)
+            # Squares covering the same numbers are interchangeable; keep the smallest
+            key = (move_mask, anchors)
+            if bin(move_mask).count("1") >= self.min_count and key not in seen:
+                seen.add(key)
+                moves.append((move_mask, anchors, move))
+
+        for r, c in cells:
+            for end_r, end_c in cells:
+                if end_r == r and end_c > c:
+                    add(("right", r, c, r, end_c), [(r, cc) for cc in range(c, end_c + 1)],
+                        bit[(r, c)] | bit[(r, end_c)])
+                elif end_c == c and end_r > r:
+                    add(("down", r, c, end_r, c), [(rr, c) for rr in range(r, end_r + 1)],
+                        bit[(r, c)] | bit[(end_r, c)])
+
+            for direction in (1, -1):
+                size = 1
+                while 0 <= r + direction * size < rows and c + size < columns:
+                    edge_r, edge_c = r + direction * size, c + size
+                    covered = [(rr, cc) for rr in range(min(r, edge_r), max(r, edge_r) + 1)
+                               for cc in range(c, edge_c + 1)]
+                    add(("square", r, c, edge_r, edge_c), covered, bit[(r, c)])
+                    size += 1
+
+        # Bigger moves first: finds full clears sooner, so the search can stop early
+        moves.sort(key=lambda m: -bin(m[0]).count("1"))
+        return moves
+
+    @staticmethod
+    def _move_mask(move, cells):
+        sol_type, start_r, start_c, end_r, end_c = move
+        top, bottom = min(start_r, end_r), max(start_r, end_r)
+        mask = 0
+        for i, (r, c) in enumerate(cells):
+            if top <= r <= bottom and start_c <= c <= end_c:
+                mask |= 1 << i
+        return mask
+
+
+def worst_case_residues(count, rows=16, columns=10, cells=17, seed=0):
+    """
+    Residues that maximize branching: many small digits packed into a compact
+    block (lots of overlapping legal moves), plus scattered random residues
+    """
+    rng = random.Random(seed)
+    residues = []
+    for i in range(count):
+        matrix = [[' '] * columns for _ in range(rows)]
+        if i % 2 == 0:
+            top, left = rng.randrange(rows - 5), rng.randrange(columns - 5)
+            spots = [(r, c) for r in range(top, top + 5) for c in range(left, left + 5)]
+            digits = (1, 2, 3, 4, 5)
+        else:
+            spots = [(r, c) for r in range(rows) for c in range(columns)]
+            digits = range(1, 10)
+        for r, c in rng.sample(spots, min(cells, len(spots))):
+            matrix[r][c] = rng.choice(digits)
+        residues.append(matrix)
+    return residues
+
+
+def play_plan(matrix, plan, target=10, min_count=2):
+    """Cells a plan clears when played in order on a copy of matrix, or None if a move is illegal when played"""
+    matrix = [row[:] for row in matrix]
+    cleared = 0
+    for sol_type, start_r, start_c, end_r, end_c in plan:
+        numbers = [(r, c) for r in range(min(start_r, end_r), max(start_r, end_r) + 1)
+                   for c in range(start_c, end_c + 1) if isinstance(matrix[r][c], int)]
+        if sum(matrix[r][c] for r, c in numbers) != target or len(numbers) < min_count:
+            return None
+        for r, c in numbers:
+            matrix[r][c] = ' '
+        cleared += len(numbers)
+    return cleared
+
+
+def greedy_plan(matrix, target=10, min_count=2):
+    """First-found move order: play the first valid move until none is left"""
+    from move_engine import MoveBoard, MoveRules
+
+    matrix = [row[:] for row in matrix]
+    board = MoveBoard(matrix, MoveRules(target, min_count))
+    plan = []
+    while True:
+        moves = board.moves()
+        if not moves:
+            return plan
+        sol_type, start_r, start_c, end_r, end_c = move = moves[0]
+        plan.append(move)
+        for r in range(min(start_r, end_r), max(start_r, end_r) + 1):
+            for c in range(start_c, end_c + 1):
+                board.set(r, c, ' ')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check endgame solver latency and plans on worst-case residues")
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--cells", type=int, default=17, help="numbers left on each residue")
+    parser.add_argument("--time-limit", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    solver = EndgameSolver(threshold=args.cells + 1, time_limit=args.time_limit)
+    latencies, timeouts, worse, illegal = [], 0, 0, 0
+    exact_cleared = greedy_cleared = 0
+    for matrix in worst_case_residues(args.trials, cells=args.cells, seed=args.seed):
+        start = time.perf_counter()
+        plan = solver.solve(matrix)
+        latencies.append(time.perf_counter() - start)
+        if plan is None:
+            timeouts += 1
+            continue
+        cleared = play_plan(matrix, plan)
+        greedy = play_plan(matrix, greedy_plan(matrix))
+        if cleared is None:
+            illegal += 1
+            continue
+        exact_cleared += cleared
+        greedy_cleared += greedy
+        worse += cleared < greedy
+
+    latencies.sort()
+    worst = latencies[-1]
+    slack = 0.05  # One search node or move scan past the deadline
+    print(f"{args.trials} residues of {args.cells} cells, limit {args.time_limit * 1000:.0f} ms")
+    print(f"median {latencies[len(latencies) // 2] * 1000:.1f} ms, worst {worst * 1000:.1f} ms, "
+          f"timeouts {timeouts}")
+    solved = args.trials - timeouts - illegal
+    print(f"cells cleared per solved residue: exact {exact_cleared / max(1, solved):.2f}, "
+          f"greedy {greedy_cleared / max(1, solved):.2f}")
+    failed = False
+    if worst > args.time_limit + slack:
+        print("FAIL: latency bound exceeded")
+        failed = True
+    if illegal:
+        print(f"FAIL: {illegal} plans hold a move that is illegal when played")
+        failed = True
+    if worse:
+        print(f"FAIL: {worse} plans clear fewer cells than greedy")
+        failed = True
+    if failed:
+        return 1
+    print("OK: latency bound held, every plan legal and at least as good as greedy")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Wait for the screen to stop changing before a scan.
+
+Fixed sleeps before scanning are too long when the game is idle and too
+short while it is still animating (window focus, board intro, the last
+clear). wait_for_stable() instead captures the grid region repeatedly,
+shrinks each frame by block averaging (cheap, and it evens out capture
+noise) and returns as soon as enough consecutive frames differ by less
+than a threshold in every block, or when the timeout runs out.
+"""
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+Stability = namedtuple("Stability", "stable frame elapsed frames max_change")
+
+
+def frame_signature(img_gray, block=8):
+    """Block-averaged copy of a frame, as float32"""
+    h, w = img_gray.shape[:2]
+    size = (max(1, w // block), max(1, h // block))
+    return cv2.resize(img_gray, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+def frame_change(a, b):
+    """Largest block difference between two signatures, in gray levels"""
+    if a.shape != b.shape:
+        return float("inf")
+    return float(np.abs(a - b).max())
+
+
+def wait_for_stable(grab, stable_frames=3, threshold=4.0, interval=0.03, timeout=2.0,
+                    cancelled=None, clock=time.perf_counter, sleep=time.sleep):
+    """
+    Call grab() until stable_frames consecutive frames each change less than
+    threshold from the one before. Returns a Stability with the last frame
+    (usable for the scan itself), whether it settled, the seconds spent,
+    frames captured and the last change measured.
+    """
+    start = clock()
+    frame = grab()
+    previous = frame_signature(frame)
+    frames, calm, change = 1, 0, float("inf")
+
+    while True:
+        if cancelled is not None and cancelled():
+            return Stability(False, frame, clock() - start, frames, change)
+        sleep(interval)
+        frame = grab()
+        signature = frame_signature(frame)
+        change = frame_change(previous, signature)
+        previous = signature
+        frames += 1
+        calm = calm + 1 if change < threshold else 0
+        elapsed = clock() - start
+        if calm >= stable_frames:
+            return Stability(True, frame, elapsed, frames, change)
+        if elapsed >= timeout:
+            return Stability(False, frame, elapsed, frames, change)
@@ -0,0 +1,48 @@
+class GridConfig:
+    """
+    Puzzle grid dimensions and on-screen geometry.
+
+    One instance is shared by the capture, recognition, solver and overlay
+    code, so changing the board size in the GUI updates all of them.
+    Defaults match the standard 16x10 board at 1920x1080.
+    """
+
+    MAX_SIZE = 50
+
+    def __init__(self, rows=16, columns=10, left_start=708, top_start=221,
+                 offset_x=51, offset_y=52, cell_w=44, cell_h=45):
+        self.rows = rows
+        self.columns = columns
+        self.left_start = left_start
+        self.top_start = top_start
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.cell_w = cell_w
+        self.cell_h = cell_h
+
+    def resize(self, rows, columns):
+        self.rows = max(1, min(self.MAX_SIZE, int(rows)))
+        self.columns = max(1, min(self.MAX_SIZE, int(columns)))
+
+    def capture_area(self, min_r=0, min_c=0, max_r=None, max_c=None):
+        """Screen region covering the cells from (min_r,min_c) to (max_r,max_c), whole grid by default"""
+        max_r = self.rows - 1 if max_r is None else max_r
+        max_c = self.columns - 1 if max_c is None else max_c
+        return {
+            "top": self.top_start + min_r * self.offset_y,
+            "left": self.left_start + min_c * self.offset_x,
+            "width": (max_c - min_c) * self.offset_x + self.cell_w,
+            "height": (max_r - min_r) * self.offset_y + self.cell_h,
+        }
+
+    def cell_origin(self, row, col):
+        """Top-left screen pixel of a cell"""
+        return self.left_start + col * self.offset_x, self.top_start + row * self.offset_y
+
+    def cell_center(self, row, col):
+        x, y = self.cell_origin(row, col)
+        return x + self.cell_w // 2, y + self.cell_h // 2
+
+    def copy(self):
+        return GridConfig(self.rows, self.columns, self.left_start, self.top_start,
+                          self.offset_x, self.offset_y, self.cell_w, self.cell_h)
@@ -0,0 +1,212 @@
+"""
+Mouse input backends used for drags.
+
+perform_drag only needs three primitives - move, press and release - so
+backends stay tiny. Win32InputBackend talks to user32 directly (no
+interpolation sleeps, no global PAUSE), PyAutoGuiInputBackend is a portable
+fallback, and RecordingInputBackend records events instead of moving the
+mouse so drags can be checked on Linux.
+
+Run this module directly to check PuzzleSolver.perform_drag against the
+recording backend (event order, path, step count and timing):
+    python input_backend.py
+"""
+import argparse
+import sys
+import time
+
+
+class InputBackend:
+    """Minimal mouse interface for drags"""
+
+    def move(self, x, y):
+        raise NotImplementedError
+
+    def press(self):
+        raise NotImplementedError
+
+    def release(self):
+        raise NotImplementedError
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class Win32InputBackend(InputBackend):
+    """Direct user32 calls: one cursor move or button event per call"""
+
+    MOUSEEVENTF_LEFTDOWN = 0x0002
+    MOUSEEVENTF_LEFTUP = 0x0004
+
+    def __init__(self):
+        import ctypes
+        self.user32 = ctypes.windll.user32
+
+    def move(self, x, y):
+        self.user32.SetCursorPos(int(x), int(y))
+
+    def press(self):
+        self.user32.mouse_event(self.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
+
+    def release(self):
+        self.user32.mouse_event(self.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+
+
+class PyAutoGuiInputBackend(InputBackend):
+    """pyautogui without its interpolation and global PAUSE"""
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+
+    def move(self, x, y):
+        self.pyautogui.moveTo(x, y, duration=0, _pause=False)
+
+    def press(self):
+        self.pyautogui.mouseDown(_pause=False)
+
+    def release(self):
+        self.pyautogui.mouseUp(_pause=False)
+
+
+class RecordingInputBackend(InputBackend):
+    """
+    Fake backend that records (time, event, x, y) tuples instead of moving
+    the mouse. Sleeps are recorded on a virtual clock unless real_sleep is set.
+    """
+
+    def __init__(self, real_sleep=False):
+        self.real_sleep = real_sleep
+        self.events = []
+        self.clock = 0.0
+        self.position = (0, 0)
+        self.pressed = False
+
+    def move(self, x, y):
+        self.position = (x, y)
+        self.events.append((self.clock, "move", x, y))
+
+    def press(self):
+        self.pressed = True
+        self.events.append((self.clock, "press") + self.position)
+
+    def release(self):
+        self.pressed = False
+        self.events.append((self.clock, "release") + self.position)
+
+    def sleep(self, seconds):
+        self.clock += seconds
+        if self.real_sleep:
+            super().sleep(seconds)
+
+    def drags(self):
+        """Completed drags as ((start_x, start_y), (end_x, end_y)) pairs"""
+        result = []
+        start = None
+        for event in self.events:
+            if event[1] == "press":
+                start = event[2:]
+            elif event[1] == "release" and start is not None:
+                result.append((start, event[2:]))
+                start = None
+        return result
+
+
+def default_backend():
+    """Fastest backend available on this machine, or None if none can drive the mouse"""
+    if sys.platform == "win32":
+        return Win32InputBackend()
+    try:
+        return PyAutoGuiInputBackend()
+    except Exception:  # pyautogui missing or no display to attach to
+        return None
+
+
+def drag_path(start, end, steps):
+    """Intermediate points from start to end (excluding start, including end)"""
+    steps = max(1, int(steps))
+    (start_x, start_y), (end_x, end_y) = start, end
+    return [
+        (round(start_x + (end_x - start_x) * i / steps), round(start_y + (end_y - start_y) * i / steps))
+        for i in range(1, steps + 1)
+    ]
+
+
+def check_drag(solver, backend, start_cell, end_cell, steps, interval_ms, delay_ms):
+    """Problems with one perform_drag on a recording backend (empty if it drove the mouse as configured)"""
+    from bench_auto_solve import FakeGUI
+
+    solver.gui = FakeGUI(drag_steps_spin=steps, step_interval_spin=interval_ms, delay_spin=delay_ms)
+    backend.events.clear()
+    backend.clock = 0.0
+    if not solver.perform_drag(*start_cell, *end_cell):
+        return ["perform_drag returned False"]
+
+    start = solver.get_cell_center(*start_cell)
+    end = solver.get_cell_center(*end_cell)
+    expected = ([("move",) + start, ("press",) + start]
+                + [("move", x, y) for x, y in drag_path(start, end, steps)]
+                + [("release",) + end])
+    problems = []
+    recorded = [event[1:] for event in backend.events]
+    if recorded != expected:
+        problems.append(f"events {recorded} != {expected}")
+    if backend.drags() != [(start, end)]:
+        problems.append(f"drags {backend.drags()}")
+    # Settle, press delay, one interval per step, pre-release wait, post-release wait
+    duration = 0.05 + delay_ms / 1000 + max(1, steps) * interval_ms / 1000 + 0.05 + 0.2
+    if abs(backend.clock - duration) > 1e-9:
+        problems.append(f"virtual time {backend.clock:.3f}s != {duration:.3f}s")
+    if backend.pressed:
+        problems.append("button left pressed")
+    return problems
+
+
+def main(argv=None):
+    import main as app
+    from window_backend import FakeWindowBackend
+
+    parser = argparse.ArgumentParser(description="Check perform_drag on the recording input backend")
+    parser.add_argument("--steps", default="1,2,4,8", help="drag step counts to check")
+    parser.add_argument("--interval-ms", type=int, default=15)
+    parser.add_argument("--delay-ms", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    backend = RecordingInputBackend()
+    solver = app.PuzzleSolver(input_backend=backend, window_backend=FakeWindowBackend([]))
+    solver.log = lambda message: None
+    failures = 0
+    for steps in (int(s) for s in args.steps.split(",")):
+        for start_cell, end_cell in (((0, 0), (0, 3)), ((2, 4), (7, 4)), ((9, 1), (6, 4))):
+            problems = check_drag(solver, backend, start_cell, end_cell, steps, args.interval_ms, args.delay_ms)
+            for problem in problems:
+                print(f"FAIL: {steps} steps {start_cell}->{end_cell}: {problem}")
+            failures += bool(problems)
+
+    # A cancel mid-drag must still let go of the button
+    solver.gui.drag_steps_spin._value = 4
+    backend.events.clear()
+    moves = 0
+
+    def cancel_after_two_moves(x, y, move=backend.move):
+        nonlocal moves
+        move(x, y)
+        moves += 1
+        if moves == 3:
+            solver.cancel_auto_solve()
+
+    backend.move = cancel_after_two_moves
+    solver.perform_drag(0, 0, 0, 5)
+    if backend.pressed or backend.events[-1][1] != "release":
+        print("FAIL: cancelled drag left the button pressed")
+        failures += 1
+
+    if failures:
+        return 1
+    print("OK: drags emit move, press, one move per step and release on time")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Single-flight job scheduler for scans and solves.
+
+Scans, solves and manual board edits (clean, Find ... Sums) can be
+triggered from GUI buttons and from hotkeys that fire on the keyboard
+thread. JobScheduler runs them all, one at a time, on its own worker thread
+so they never race on the board or the mouse:
+
+- A request for a job that is already waiting to run is merged into it and
+  gets the same Future.
+- join_running: a request arriving while the same job runs shares that run's
+  result instead of queuing a second one.
+- while_running maps the name of a running job to a handler answering the
+  request right away instead of queuing it (e.g. reject a second solve, or
+  answer a scan from the frame a running solve already captured).
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+
+class Job:
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+        self.future = Future()
+
+
+class JobScheduler:
+    def __init__(self, log=print):
+        self.log = log
+        self.condition = threading.Condition()
+        self.pending = deque()
+        self.running = None
+        self.thread = None
+
+    def submit(self, name, fn, join_running=False, while_running=None):
+        """Queue fn under name, unless it can be merged or answered now. Returns a Future"""
+        handler = None
+        with self.condition:
+            for job in self.pending:
+                if job.name == name:
+                    self.log(f"{name} already queued, request merged")
+                    return job.future
+            running = self.running
+            if running is not None:
+                if join_running and running.name == name:
+                    self.log(f"{name} already running, request joined")
+                    return running.future
+                handler = (while_running or {}).get(running.name)
+            if handler is None:
+                job = Job(name, fn)
+                self.pending.append(job)
+                self._ensure_worker()
+                self.condition.notify()
+                return job.future
+
+        # Answered outside the lock: the handler may log or read solver state
+        future = Future()
+        try:
+            future.set_result(handler())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def busy(self, name=None):
+        """True if a job (or the named job) is running or queued"""
+        with self.condition:
+            jobs = list(self.pending) + ([self.running] if self.running else [])
+            return any(name is None or job.name == name for job in jobs)
+
+    def run_if_idle(self, fn):
+        """
+        Run fn now on the calling thread if no job is running or queued,
+        holding the queue so that none starts until it returns. Returns True
+        if fn ran. For quick state changes a running job must not see half-done
+        """
+        with self.condition:
+            if self.busy():
+                return False
+            fn()
+            return True
+
+    def _ensure_worker(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="solver-jobs", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                job = self.running = self.pending.popleft()
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.fn())
+                    except Exception as e:
+                        self.log(f"ERROR: {job.name} failed: {e}")
+                        job.future.set_exception(e)
+            finally:
+                with self.condition:
+                    self.running = None
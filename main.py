@@ -5,44 +5,56 @@ import cv2
 import threading
 import sys
 import time
-import pyautogui
-import psutil
-import win32gui
-import win32con
-import win32process
 from PyQt5 import QtCore, QtGui, QtWidgets
 import sys
 import os
 from threading import Lock
-
-# Helper for resource loading (works for dev and PyInstaller EXE)
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    try:
-        base_path = sys._MEIPASS
-    except AttributeError:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+from concurrent.futures import ThreadPoolExecutor
+
+from app_paths import resource_path, app_data_path
+from template_bank import TemplateBank
+from template_bootstrap import bootstrap_templates, load_session_templates, save_session_templates
+from grid_config import GridConfig
+from move_engine import MoveBoard, MoveRules
+from move_index import MoveIndex
+from endgame import EndgameSolver
+from move_selection import BatchSelector
+from capture_service import CaptureService
+from frame_stability import wait_for_stable
+from jobs import JobScheduler
+from checkpoint import SolveCheckpoint, cell_hashes, grid_key
+from drag_cost import DragCostModel, fit_to_budget
+from input_backend import default_backend as default_input_backend, drag_path
+from window_backend import default_backend as default_window_backend
+import profiling
 import ctypes
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, 
                              QHBoxLayout, QWidget, QLabel, QSpinBox, QGroupBox, 
                              QTextEdit, QCheckBox)
 
-class Overlay(QtWidgets.QWidget):
+def cell_windows(array, rows, columns, step_y, step_x, win_h, win_w):
+    """Zero-copy rows x columns x win_h x win_w view of a regularly spaced grid of windows"""
+    need_h = (rows - 1) * step_y + win_h
+    need_w = (columns - 1) * step_x + win_w
+    if array.ndim != 2 or array.shape[0] < need_h or array.shape[1] < need_w:
+        raise ValueError(f"Image of shape {array.shape} does not cover a {rows}x{columns} grid "
+                         f"({need_h}x{need_w} pixels needed)")
+    stride_y, stride_x = array.strides
+    return np.lib.stride_tricks.as_strided(
+        array,
+        shape=(rows, columns, win_h, win_w),
+        strides=(step_y * stride_y, step_x * stride_x, stride_y, stride_x),
+        writeable=False,
+    )
 
-    def __init__(self, rows, cols, left_start, top_start, offset_x, offset_y, w, h):
-        super().__init__()
 
-        self.rows = rows
-        self.cols = cols
+class Overlay(QtWidgets.QWidget):
 
-        self.left_start = left_start
-        self.top_start = top_start
-        self.offset_x = offset_x
-        self.offset_y = offset_y
+    def __init__(self, grid):
+        super().__init__()
 
-        self.cell_w = w
-        self.cell_h = h
+        # Shared with the solver, so board size changes apply here too
+        self.grid = grid
 
         self.cells = []
 
@@ -53,7 +65,7 @@ class Overlay(QtWidgets.QWidget):
         )
         self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
 
-        self.setGeometry(0, 0, 1920, 1080)
+        self.setGeometry(QApplication.primaryScreen().geometry())
 
         self.show()
 
@@ -74,14 +86,13 @@ class Overlay(QtWidgets.QWidget):
         painter = QtGui.QPainter(self)
 
         for (r, c, color) in self.cells:
-            r_px = self.top_start + r * self.offset_y
-            c_px = self.left_start + c * self.offset_x
+            c_px, r_px = self.grid.cell_origin(r, c)
 
             brush = QtGui.QColor(*color)
             painter.setBrush(brush)
             painter.setPen(QtGui.QPen(QtGui.QColor(255,255,255,180), 2))
 
-            painter.drawRect(c_px, r_px, self.cell_w, self.cell_h)
+            painter.drawRect(c_px, r_px, self.grid.cell_w, self.grid.cell_h)
 
 
 class ControlGUI(QMainWindow):
@@ -98,12 +109,47 @@ class ControlGUI(QMainWindow):
         self.solver = solver
         
         # Connect button signals
-        self.scan_btn.clicked.connect(self.solver.get_matrix_numbers)
-        self.clean_btn.clicked.connect(self.solver.clean_matrix)
-        self.right_btn.clicked.connect(self.solver.sums_right)
-        self.down_btn.clicked.connect(self.solver.sums_down)
-        self.square_btn.clicked.connect(self.solver.sums_square)
+        # Looked up per click, so profiling wrappers installed later take effect
+        self.scan_btn.clicked.connect(lambda: self.solver.request_scan())
+        self.clean_btn.clicked.connect(lambda: self.solver.request_edit("clean", self.solver.clean_matrix))
+        self.right_btn.clicked.connect(lambda: self.solver.request_edit("sums_right", self.solver.sums_right))
+        self.down_btn.clicked.connect(lambda: self.solver.request_edit("sums_down", self.solver.sums_down))
+        self.square_btn.clicked.connect(lambda: self.solver.request_edit("sums_square", self.solver.sums_square))
         self.cancel_btn.clicked.connect(self.solver.cancel_auto_solve)
+        self.resume_btn.clicked.connect(self.start_resume)
+
+        self.profile_check.setChecked(hasattr(self.solver.__dict__.get("auto_solve"), "profiling_wrapper"))
+        self.profile_check.toggled.connect(self.toggle_profiling)
+        self.bootstrap_check.toggled.connect(lambda enabled: self.solver.set_bootstrap_mode(enabled))
+
+        # Grid size flows from the spinboxes into the shared grid config
+        self.rows_spin.setValue(self.solver.rows)
+        self.cols_spin.setValue(self.solver.columns)
+        self.rows_spin.valueChanged.connect(self.apply_grid_size)
+        self.cols_spin.valueChanged.connect(self.apply_grid_size)
+
+        self.target_spin.setValue(self.solver.rules.target)
+        self.min_count_spin.setValue(self.solver.rules.min_count)
+        self.target_spin.valueChanged.connect(self.apply_rules)
+        self.min_count_spin.valueChanged.connect(self.apply_rules)
+
+    def apply_grid_size(self):
+        if self.solver.set_grid_size(self.rows_spin.value(), self.cols_spin.value()):
+            return
+        # Rejected (scan or auto-solve running): show the size actually in use
+        for spin, value in ((self.rows_spin, self.solver.rows), (self.cols_spin, self.solver.columns)):
+            spin.blockSignals(True)
+            spin.setValue(value)
+            spin.blockSignals(False)
+
+    def apply_rules(self):
+        if self.solver.set_rules(self.target_spin.value(), self.min_count_spin.value()):
+            return
+        rules = self.solver.rules
+        for spin, value in ((self.target_spin, rules.target), (self.min_count_spin, rules.min_count)):
+            spin.blockSignals(True)
+            spin.setValue(value)
+            spin.blockSignals(False)
 
     def init_ui(self):
         self.setWindowTitle("Sum10 Puzzle Solver - Advanced")
@@ -227,18 +273,35 @@ class ControlGUI(QMainWindow):
         row_layout = QHBoxLayout()
         row_layout.addWidget(QLabel("Rows:"))
         self.rows_spin = QSpinBox()
+        self.rows_spin.setRange(1, GridConfig.MAX_SIZE)
         self.rows_spin.setValue(16)
-        self.rows_spin.setRange(1, 50)
         row_layout.addWidget(self.rows_spin)
         grid_layout.addLayout(row_layout)
         
         col_layout = QHBoxLayout()
         col_layout.addWidget(QLabel("Columns:"))
         self.cols_spin = QSpinBox()
+        self.cols_spin.setRange(1, GridConfig.MAX_SIZE)
         self.cols_spin.setValue(10)
-        self.cols_spin.setRange(1, 50)
         col_layout.addWidget(self.cols_spin)
         grid_layout.addLayout(col_layout)
+
+        # Event variants change the sum a move needs and how many numbers it must clear
+        target_layout = QHBoxLayout()
+        target_layout.addWidget(QLabel("Target sum:"))
+        self.target_spin = QSpinBox()
+        self.target_spin.setRange(2, 30)
+        self.target_spin.setValue(10)
+        target_layout.addWidget(self.target_spin)
+        grid_layout.addLayout(target_layout)
+
+        min_count_layout = QHBoxLayout()
+        min_count_layout.addWidget(QLabel("Min numbers per move:"))
+        self.min_count_spin = QSpinBox()
+        self.min_count_spin.setRange(1, 9)
+        self.min_count_spin.setValue(2)
+        min_count_layout.addWidget(self.min_count_spin)
+        grid_layout.addLayout(min_count_layout)
         
         grid_group.setLayout(grid_layout)
         layout.addWidget(grid_group)
@@ -250,6 +313,10 @@ class ControlGUI(QMainWindow):
         self.scan_btn = QPushButton("📷 Scan Matrix (F5)")
         manual_layout.addWidget(self.scan_btn)
 
+        self.bootstrap_check = QCheckBox("Learn digit templates from the live grid")
+        self.bootstrap_check.setChecked(False)
+        manual_layout.addWidget(self.bootstrap_check)
+
         self.clean_btn = QPushButton("🧹 Clean Matrix (F1)")
         manual_layout.addWidget(self.clean_btn)
 
@@ -274,11 +341,35 @@ class ControlGUI(QMainWindow):
         self.auto_solve_btn.clicked.connect(self.start_auto_solve)
         auto_layout.addWidget(self.auto_solve_btn)
 
+        self.resume_btn = QPushButton("⏩ RESUME AUTO SOLVE (F7)")
+        self.resume_btn.setStyleSheet("background-color: #2196F3; color: white; font-weight: bold; padding: 10px; font-size: 14px;")
+        auto_layout.addWidget(self.resume_btn)
+
         self.cancel_btn = QPushButton("⛔ CANCEL AUTO SOLVE (F12)")
         self.cancel_btn.setStyleSheet("background-color: #FF9800; color: white; font-weight: bold; padding: 10px; font-size: 14px;")
         self.cancel_btn.setEnabled(False)
         auto_layout.addWidget(self.cancel_btn)
 
+        self.endgame_check = QCheckBox("Exact endgame (optimal order for the last numbers)")
+        self.endgame_check.setChecked(True)
+        auto_layout.addWidget(self.endgame_check)
+
+        self.best_batch_check = QCheckBox("Best non-overlapping batch (most cells per iteration)")
+        self.best_batch_check.setChecked(True)
+        auto_layout.addWidget(self.best_batch_check)
+
+        self.verify_check = QCheckBox("Verify drags (retry once, resync on failure)")
+        self.verify_check.setChecked(True)
+        auto_layout.addWidget(self.verify_check)
+
+        self.capture_check = QCheckBox("Background capture while auto-solving")
+        self.capture_check.setChecked(False)
+        auto_layout.addWidget(self.capture_check)
+
+        self.profile_check = QCheckBox("Profile auto-solve and scans (writes profile files)")
+        self.profile_check.setChecked(False)
+        auto_layout.addWidget(self.profile_check)
+
         delay_layout = QHBoxLayout()
         delay_layout.addWidget(QLabel("Drag Delay (ms):"))
         self.delay_spin = QSpinBox()
@@ -287,6 +378,29 @@ class ControlGUI(QMainWindow):
         delay_layout.addWidget(self.delay_spin)
         auto_layout.addLayout(delay_layout)
 
+        # Drag path tuning: fewer/shorter steps = faster drags, more = safer
+        steps_layout = QHBoxLayout()
+        steps_layout.addWidget(QLabel("Drag Steps:"))
+        self.drag_steps_spin = QSpinBox()
+        self.drag_steps_spin.setRange(1, 50)
+        self.drag_steps_spin.setValue(4)
+        steps_layout.addWidget(self.drag_steps_spin)
+        steps_layout.addWidget(QLabel("Step Interval (ms):"))
+        self.step_interval_spin = QSpinBox()
+        self.step_interval_spin.setRange(0, 200)
+        self.step_interval_spin.setValue(15)
+        steps_layout.addWidget(self.step_interval_spin)
+        auto_layout.addLayout(steps_layout)
+
+        # Stop in time: moves are picked by cells cleared per predicted second
+        budget_layout = QHBoxLayout()
+        budget_layout.addWidget(QLabel("Time Budget (s, 0 = off):"))
+        self.time_budget_spin = QSpinBox()
+        self.time_budget_spin.setRange(0, 600)
+        self.time_budget_spin.setValue(0)
+        budget_layout.addWidget(self.time_budget_spin)
+        auto_layout.addLayout(budget_layout)
+
         auto_group.setLayout(auto_layout)
         layout.addWidget(auto_group)
 
@@ -341,55 +455,149 @@ class ControlGUI(QMainWindow):
                 self.process_status.setStyleSheet("padding: 5px; color: #ff5555; font-weight: bold;")
                 self.log("NIKKE process not found. Please start the game.")
 
+    def toggle_profiling(self, enabled):
+        if enabled:
+            profiling.install(self.solver, profiling.mode_from_env() or "cprofile")
+        else:
+            profiling.uninstall(self.solver)
+            self.log("Profiling off")
+
     def start_auto_solve(self):
         self.update_status("Starting auto-solve...")
         self.log("=== AUTO SOLVE INITIATED ===")
         self.auto_solve_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
-        threading.Thread(target=self.solver.auto_solve, daemon=True).start()
+        self.solver.request_auto_solve()
+
+    def start_resume(self):
+        self.update_status("Resuming auto-solve...")
+        self.log("=== AUTO SOLVE RESUMED ===")
+        self.auto_solve_btn.setEnabled(False)
+        self.resume_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.solver.request_auto_solve(resume=True)
 
     def close_app(self):
         self.log("Application closing...")
         QApplication.quit()
 
 
+class UIUpdateBus(QtCore.QObject):
+    """
+    Thread-safe, coalescing bridge from solver threads to the widgets.
+
+    post_* calls only store the latest snapshot of each kind and return
+    immediately; a timer on the GUI thread applies whatever is pending at
+    most max_fps times per second, so bursts of updates cost one repaint.
+    Must be created on the GUI thread.
+    """
+
+    def __init__(self, gui, overlay, max_fps=30):
+        super().__init__()
+        self.gui = gui
+        self.overlay = overlay
+        self.pending = {}
+        self.pending_lock = Lock()
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(max(1, int(1000 / max_fps)))
+
+    def post(self, kind, value):
+        with self.pending_lock:
+            self.pending[kind] = value
+
+    def post_status(self, message):
+        self.post("status", message)
+
+    def post_solving(self, running):
+        self.post("solving", running)
+
+    def post_overlay(self, cell_list):
+        self.post("overlay", list(cell_list))
+
+    def flush(self):
+        """Apply the latest pending snapshot of each kind (GUI thread only)"""
+        with self.pending_lock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, {}
+
+        if "status" in pending:
+            self.gui.update_status(pending["status"])
+        if "solving" in pending:
+            self.gui.auto_solve_btn.setEnabled(not pending["solving"])
+            self.gui.resume_btn.setEnabled(not pending["solving"])
+            self.gui.cancel_btn.setEnabled(pending["solving"])
+        if "overlay" in pending and self.overlay:
+            self.overlay.set_cells(pending["overlay"])
+
+
 class PuzzleSolver:
-    def __init__(self, overlay, gui):
+    def __init__(self, overlay=None, gui=None, input_backend=None, grid=None, window_backend=None, grab=None):
+        self.grid = grid or GridConfig()
         self.overlay = overlay
         self.gui = gui
-        
-        self.rows = 16
-        self.columns = 10
-        
-        self.offset_x = 51
-        self.offset_y = 52
-        self.top_start = 221
-        self.left_start = 708
-        self.capture_area_w = 44
-        self.capture_area_h = 45
+        self.input = input_backend or default_input_backend()
+        self.windows = window_backend or default_window_backend()
+        self.grab = grab  # Optional capture_area -> grayscale image override (fake screens)
+        # Solver threads talk to widgets only through the bus (GUI thread applies updates)
+        self.ui_bus = UIUpdateBus(gui, overlay) if gui else None
         
         self.numbers = []
         self.matrix = []
         self.solutions = []
+        self.move_index = None
+        self.rules = MoveRules()  # Target sum and fewest digits per move (event variants differ)
+        self.endgame = EndgameSolver(target=self.rules.target, min_count=self.rules.min_count)
+        self.batch_selector = BatchSelector()
+        self.capture = CaptureService(self.grid.capture_area)
+        self.last_scan_image = None
+        self.checkpoint = None  # Board, move log and plan for resuming a stopped solve
+        self.checkpoint_path = app_data_path("checkpoint.json")
+        self.drag_cost_path = app_data_path("drag_cost.json")
+        self.drag_cost = DragCostModel.load(self.drag_cost_path)  # Learned seconds per move
         
         self.nikke_hwnd = None
+        self.nikke_size = None  # Client area size of the game window when last found
         self.cancel_flag = False
         self.cancel_lock = Lock()
         self.is_auto_solving = False
+        self.jobs = JobScheduler(log=self.log)  # One worker for scans and solves
         
         # Pre-load templates at initialization
         self.templates = {}
+        self.min_scale_probe_score = 0.6
+        self.blank_cell_std = 12.0  # Grayscale std below which a cell counts as empty
+        self.verify_timeout = 0.3   # Seconds to wait for a cleared cell to disappear
+        self.stable_frames = 3      # Consecutive unchanged captures before a scan...
+        self.stable_threshold = 4.0 # ...each within this many gray levels per 8x8 block
+        self.stable_timeout = 2.0   # Scan anyway after this many seconds of animation
+        self.sleep_scale = 1.0      # Multiplies the solve loop's fixed waits (simulations use less)
+        self.early_exit_score = 0.95     # Stop comparing templates once one matches this well...
+        self.rival_similarity = 0.85     # ...after also trying digits that look this much alike
+        # Best vs runner-up score margin below which a read is uncertain. On the ocr_bench corpus
+        # 0.01 flags ~1% of digit reads and catches the misreads; 0.02 flags 6%, 0.05 30%, catching none more
+        self.min_confidence = 0.01
+        self.recheck_frames = 3          # Captures averaged when re-reading uncertain cells
+        self._rivals = (None, {})
+        self.bootstrap_mode = False      # Learn templates from the first scan at each scale
+        self.session_templates = None    # digit -> template averaged from live cells, None = not tried yet
+        self.session_templates_path = app_data_path("session_templates.npz")
+        self.confidence = None           # Per-cell margin from the last scan (1.0 for empty cells)
+        self.uncertain = set()           # Digit cells whose read is still uncertain
+        self.rejected_moves = set()      # Moves the game refused twice this solve (a digit was misread)
+        self.scan_workers = os.cpu_count() or 1
+        self._scan_pool = None
+        self.moves_executed = 0  # Moves of the current/last auto_solve, for profile tags
         self.load_templates()
+
+        # SUM10_PROFILE=cprofile|sample wraps auto_solve and scans in profilers; off = untouched
+        profiling.install(self)
         
-        self.start_area = {
-            "top": self.top_start,
-            "left": self.left_start,
-            "width": self.capture_area_w,
-            "height": self.capture_area_h
-        }
-        
-        # Start keyboard monitor thread
-        self.start_keyboard_monitor()
+        # Start keyboard monitor thread (not needed for headless use)
+        if self.gui:
+            self.start_keyboard_monitor()
 
     def log(self, message):
         """Send log message to GUI"""
@@ -397,21 +605,123 @@ class PuzzleSolver:
             self.gui.log(message)
         else:
             print(message)
+
+    def set_status(self, message):
+        """Post a status line to the GUI (safe from any thread)"""
+        if self.ui_bus:
+            self.ui_bus.post_status(message)
+
+    def set_solving(self, running):
+        """Post auto-solve/cancel button state to the GUI (safe from any thread)"""
+        if self.ui_bus:
+            self.ui_bus.post_solving(running)
+
+    def push_overlay(self, cell_list):
+        """Post an overlay snapshot (safe from any thread)"""
+        if self.ui_bus:
+            self.ui_bus.post_overlay(cell_list)
     
     def load_templates(self):
-        """Pre-load all digit templates into memory as grayscale images"""
+        """Pre-load the multi-scale template bank (cached on disk after first build)"""
         self.log("Loading digit templates...")
+        self.template_bank = TemplateBank()
+        self.template_bank.load()
+        self.template_scale = None  # Locked on the first scan
+
+        # Native scale until a probe of the grid picks the right one
+        self.templates = self.template_bank.templates_at(1.0)
         for digit in range(1, 10):
-            template_path = resource_path(f"templates/T{digit}.png")
-            template = cv2.imread(template_path)
-            
-            if template is not None:
-                self.templates[digit] = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-            else:
+            if digit not in self.templates:
                 self.log(f"WARNING: Could not load template T{digit}.png")
         
-        self.log(f"Loaded {len(self.templates)} templates")
-    
+        source = "cache" if self.template_bank.from_cache else "template files"
+        self.log(f"Loaded {len(self.templates)} templates at {len(self.template_bank.scales)} scales from {source}")
+
+    def lock_template_scale(self, cell_images):
+        """
+        Probe grid cells once to pick the template scale used until the grid or
+        game window changes. An inconclusive probe locks the native scale, so
+        later scans don't probe every scale again
+        """
+        scale, score = self.template_bank.detect_scale(cell_images)
+        if score < self.min_scale_probe_score:
+            self.log(f"Template scale probe inconclusive (score {score:.2f}), using native scale "
+                     f"until the grid or game window changes")
+            scale = 1.0
+        else:
+            self.log(f"Template scale locked at {scale:.2f}x (probe score {score:.2f})")
+        self.template_scale = scale
+        self.templates = self.template_bank.templates_at(scale)
+        self.session_templates = None
+        return score >= self.min_scale_probe_score
+
+    def reset_template_scale(self):
+        """Re-probe the template scale on the next scan (e.g. after resizing the game window)"""
+        self.template_scale = None
+        self.templates = self.template_bank.templates_at(1.0)
+        self.session_templates = None
+        self.log("Template scale will be re-detected on next scan")
+
+    def set_bootstrap_mode(self, enabled):
+        """Learn templates from the live grid on the next scan, or go back to the bundled ones"""
+        self.bootstrap_mode = enabled
+        if self.session_templates:
+            self.templates = self.template_bank.templates_at(self.template_scale or 1.0)
+        self.session_templates = None
+        self.log(f"Template bootstrap {'on: learning from the next scan' if enabled else 'off'}")
+
+    def bootstrap_from_capture(self, img_gray):
+        """
+        Replace the bundled templates with ones averaged from this capture's
+        cells (or cached ones for this geometry and scale), keeping the
+        bundled template for any digit that could not be learned. Falls back
+        entirely if the result matches the capture worse than the bundled set.
+        """
+        cells = cell_windows(np.ascontiguousarray(img_gray), self.rows, self.columns, self.offset_y,
+                             self.offset_x, self.capture_area_h, self.capture_area_w)
+        blank = self.blank_mask(cells)
+        crops = [cells[r, c] for r, c in zip(*np.nonzero(~blank))]
+        bundled = self.template_bank.templates_at(self.template_scale)
+        bundled_score = self.mean_match_score(crops, bundled)
+        key = grid_key(self.grid) + [self.template_scale]
+
+        learned = load_session_templates(self.session_templates_path, key)
+        source = "cache"
+        if not learned or self.mean_match_score(crops, {**bundled, **learned}) < bundled_score:
+            learned, stats = bootstrap_templates(crops, bundled)
+            source = f"{len(crops)} live cells"
+            if stats:
+                self.log("Learned templates: " + ", ".join(
+                    f"{digit} ({count} cells, {score:.2f})" for digit, (count, score) in sorted(stats.items())))
+
+        templates = {**bundled, **learned}
+        score = self.mean_match_score(crops, templates) if learned else bundled_score
+        if not learned or score < bundled_score:
+            self.log(f"Template bootstrap found nothing better than the bundled templates "
+                     f"({bundled_score:.3f}), keeping them")
+            self.session_templates = {}
+            return False
+
+        self.session_templates = learned
+        self.templates = templates
+        self.log(f"Using {len(learned)} learned templates from {source}: mean match "
+                 f"{bundled_score:.3f} -> {score:.3f}")
+        if source != "cache":
+            try:
+                save_session_templates(self.session_templates_path, key, learned)
+            except OSError as e:
+                self.log(f"Could not cache learned templates: {e}")
+        return True
+
+    def mean_match_score(self, crops, templates, max_cells=40):
+        """Mean best template score over the highest-contrast crops"""
+        probes = sorted(crops, key=lambda img: float(img.std()), reverse=True)[:max_cells]
+        if not probes or not templates:
+            return 0.0
+        scores = [max(float(cv2.matchTemplate(cell, t, cv2.TM_CCOEFF_NORMED).max()) for t in templates.values())
+                  for cell in probes]
+        return sum(scores) / len(scores)
+
     def start_keyboard_monitor(self):
         """Start a background thread to continuously monitor F12 key"""
         def monitor_f12():
@@ -419,12 +729,11 @@ class PuzzleSolver:
                 try:
                     if keyboard.is_pressed('f12'):
                         if self.is_auto_solving:
-                            print("F12 DETECTED WHILE AUTO-SOLVING!")
                             self.cancel_auto_solve()
                             time.sleep(0.5)  # Debounce
                     time.sleep(0.1)  # Check every 100ms
                 except Exception as e:
-                    print(f"Keyboard monitor error: {e}")
+                    self.log(f"Keyboard monitor error: {e}")
                     time.sleep(1)
         
         monitor_thread = threading.Thread(target=monitor_f12, daemon=True)
@@ -435,9 +744,13 @@ class PuzzleSolver:
         """Cancel the ongoing auto-solve operation"""
         with self.cancel_lock:
             self.cancel_flag = True
-            print("CANCEL FLAG SET TO TRUE")  # Debug print
         self.log("⛔⛔⛔ CANCEL REQUESTED - STOPPING ASAP ⛔⛔⛔")
     
+    def sleep(self, seconds):
+        """Fixed wait of the solve loop, scaled by sleep_scale (0 = don't wait)"""
+        if seconds > 0 and self.sleep_scale > 0:
+            time.sleep(seconds * self.sleep_scale)
+
     def is_cancelled(self):
         """Thread-safe check if cancellation was requested"""
         with self.cancel_lock:
@@ -446,60 +759,55 @@ class PuzzleSolver:
     def find_nikke_process(self):
         """Find and focus NIKKE game window"""
         self.log("Searching for NIKKE process...")
-        
-        # Search for common NIKKE process names
-        process_names = ['nikke.exe', 'NIKKE.exe', 'Nikke.exe']
-        
-        for proc in psutil.process_iter(['pid', 'name']):
-            try:
-                if proc.info['name'] in process_names:
-                    self.log(f"Found process: {proc.info['name']} (PID: {proc.info['pid']})")
-                    
-                    # Find the window associated with this process
-                    def callback(hwnd, hwnds):
-                        if win32gui.IsWindowVisible(hwnd):
-                            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                            if pid == proc.info['pid']:
-                                hwnds.append(hwnd)
-                        return True
-                    
-                    hwnds = []
-                    win32gui.EnumWindows(callback, hwnds)
-                    
-                    if hwnds:
-                        self.nikke_hwnd = hwnds[0]
-                        self.focus_game_window()
-                        return True
-                        
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
-        
+
+        if self.windows is None:
+            self.log("Window detection is not available on this platform")
+            return False
+
+        windows = self.windows.find_windows()
+        if windows:
+            window = windows[0]
+            self.log(f"Found game window: {window.title or window.hwnd} (PID: {window.pid})")
+            if len(windows) > 1:
+                self.log(f"{len(windows)} game windows open, using the first (sessions.py solves all of them)")
+            # Another window, or a resize (e.g. moved to a monitor with other scaling)
+            size = (window.rect[2] - window.rect[0], window.rect[3] - window.rect[1])
+            if self.nikke_hwnd is not None and (window.hwnd, size) != (self.nikke_hwnd, self.nikke_size) \
+                    and self.template_scale is not None:
+                self.reset_template_scale()
+            self.nikke_hwnd = window.hwnd
+            self.nikke_size = size
+            self.focus_game_window()
+            return True
+
         self.log("NIKKE process not found!")
         return False
 
     def focus_game_window(self):
         """Bring NIKKE window to foreground"""
-        if self.nikke_hwnd:
+        if self.nikke_hwnd and self.windows is not None:
             try:
-                # Restore if minimized
-                if win32gui.IsIconic(self.nikke_hwnd):
-                    win32gui.ShowWindow(self.nikke_hwnd, win32con.SW_RESTORE)
-                
-                # Bring to foreground
-                win32gui.SetForegroundWindow(self.nikke_hwnd)
+                self.windows.focus(self.nikke_hwnd)
                 self.log("Game window brought to foreground")
-                time.sleep(0.5)  # Wait for window to be ready
+                # No fixed wait: scans wait for the screen to settle instead
                 return True
             except Exception as e:
                 self.log(f"Error focusing window: {e}")
                 return False
         return False
 
+    def game_in_foreground(self):
+        """True if the known game window already has focus"""
+        if self.windows is None or not self.nikke_hwnd:
+            return False
+        try:
+            return self.windows.foreground() == self.nikke_hwnd
+        except Exception:
+            return False
+
     def get_cell_center(self, row, col):
         """Get the center pixel coordinates of a cell"""
-        x = self.left_start + col * self.offset_x + self.cell_w // 2
-        y = self.top_start + row * self.offset_y + self.cell_h // 2
-        return x, y
+        return self.grid.cell_center(row, col)
 
     def perform_drag(self, start_row, start_col, end_row, end_col):
         """Perform a drag operation from start cell to end cell"""
@@ -507,186 +815,279 @@ class PuzzleSolver:
         if self.is_cancelled():
             self.log("Drag cancelled before starting")
             return False
+
+        if self.input is None:
+            self.log("ERROR: No mouse input backend available")
+            return False
             
         start_x, start_y = self.get_cell_center(start_row, start_col)
         end_x, end_y = self.get_cell_center(end_row, end_col)
         
         delay = self.gui.delay_spin.value() / 1000.0
+        steps = self.gui.drag_steps_spin.value()
+        step_interval = self.gui.step_interval_spin.value() / 1000.0
         
         self.log(f"Dragging from ({start_row},{start_col}) to ({end_row},{end_col})")
         
-        pyautogui.moveTo(start_x, start_y, duration=0.1)
+        self.input.move(start_x, start_y)
         
         if self.is_cancelled():
             return False
             
-        time.sleep(0.05)
-        pyautogui.mouseDown()
+        self.input.sleep(0.05)
+        self.input.press()
         
         if self.is_cancelled():
-            pyautogui.mouseUp()
+            self.input.release()
             return False
             
-        time.sleep(delay)
-        pyautogui.moveTo(end_x, end_y, duration=0.2)
-        
-        if self.is_cancelled():
-            pyautogui.mouseUp()
-            return False
+        self.input.sleep(delay)
+
+        # Few intermediate points: enough for the game to register a drag
+        for x, y in drag_path((start_x, start_y), (end_x, end_y), steps):
+            self.input.move(x, y)
+            self.input.sleep(step_interval)
             
-        time.sleep(0.05)
-        pyautogui.mouseUp()
-        time.sleep(0.2)
+            if self.is_cancelled():
+                self.input.release()
+                return False
+            
+        self.input.sleep(0.05)
+        self.input.release()
+        self.input.sleep(0.2)
         
         return True
 
-    def auto_solve(self):
+    def request_scan(self):
+        """
+        Scan on the job worker. Joins a scan already running; during an
+        auto-solve, answers with the frame and board the solve already has
+        """
+        return self.jobs.submit("scan", self.scan_job, join_running=True,
+                                while_running={"solve": self.board_from_solve})
+
+    def request_auto_solve(self, resume=False):
+        """Auto-solve (or resume) on the job worker; ignored while one is already running"""
+        return self.jobs.submit("solve", lambda: self.auto_solve(resume=resume),
+                                while_running={"solve": self.reject_solve})
+
+    def request_edit(self, name, fn):
+        """Manual board edit (clean, Find ... Sums) on the job worker; refused while an auto-solve runs"""
+        return self.jobs.submit(name, fn, while_running={"solve": self.reject_edit})
+
+    def scan_job(self):
+        self.get_matrix_numbers()
+        return self.last_scan_image
+
+    def board_from_solve(self):
+        self.log("Auto-solve running: showing its current board instead of scanning again")
+        self.update_overlay()
+        return self.last_scan_image
+
+    def reject_edit(self):
+        self.log("Auto-solve running: board edits are disabled until it stops")
+        return None
+
+    def reject_solve(self):
+        self.log("Auto-solve already running, request ignored")
+        return None
+
+    def auto_solve(self, resume=False):
         """
-        Enhanced auto-solve: ALWAYS rescans before starting
+        Enhanced auto-solve: rescans before starting, unless resuming from a
+        checkpoint that still matches the screen
         """
         # Reset cancel flag and set auto-solving state
         with self.cancel_lock:
             self.cancel_flag = False
             self.is_auto_solving = True
         
-        print("AUTO-SOLVE STARTED - is_auto_solving =", self.is_auto_solving)
+        self.moves_executed = 0
+        self.rejected_moves = set()
+        budget = self.gui.time_budget_spin.value()
+        deadline = time.perf_counter() + budget if budget > 0 else None
+        self.log("Auto-solve started" + (" (resuming)" if resume else ""))
+        self.set_solving(True)
+
+        if self.gui.capture_check.isChecked():
+            self.capture.start()
         
         try:
             # Step 1: Detect and focus game if enabled
-            if self.gui.auto_detect_check.isChecked():
-                self.gui.update_status("Detecting game...")
+            # A resume with the game already focused skips detection and its waits
+            if self.gui.auto_detect_check.isChecked() and not (resume and self.game_in_foreground()):
+                self.set_status("Detecting game...")
                 if not self.find_nikke_process():
-                    self.gui.update_status("Game not found!")
+                    self.set_status("Game not found!")
                     self.log("ERROR: Cannot proceed without game window")
-                    self.gui.auto_solve_btn.setEnabled(True)
-                    self.gui.cancel_btn.setEnabled(False)
                     return
-                time.sleep(0.5)
+
+            # One settled capture serves both the checkpoint check and the scan
+            self.set_status("Waiting for the screen to settle...")
+            settled = self.wait_for_stable_screen()
 
             if self.is_cancelled():
-                self.gui.update_status("Cancelled before scan")
+                self.set_status("Cancelled before scan")
                 self.log("Auto-solve cancelled by user")
-                self.gui.auto_solve_btn.setEnabled(True)
-                self.gui.cancel_btn.setEnabled(False)
                 return
 
-            # ===== CRITICAL: ALWAYS DO FRESH SCAN =====
-            self.gui.update_status("Scanning matrix...")
-            self.log("=== FRESH SCAN: Taking new screenshot ===")
-            time.sleep(0.3)
-            self.get_matrix_numbers()
-
-            if not self.matrix:
-                self.gui.update_status("Failed to scan matrix!")
-                self.log("ERROR: Matrix scan failed")
-                self.gui.auto_solve_btn.setEnabled(True)
-                self.gui.cancel_btn.setEnabled(False)
-                return
+            pending = None
+            if resume:
+                self.set_status("Checking checkpoint...")
+                pending = self.resume_from_checkpoint(settled)
+
+            if pending is None:
+                # ===== CRITICAL: FRESH SCAN unless the checkpoint matched =====
+                self.set_status("Scanning matrix...")
+                self.log("=== FRESH SCAN: Taking new screenshot ===")
+                self.get_matrix_numbers(settled)
+
+                if not self.matrix:
+                    self.set_status("Failed to scan matrix!")
+                    self.log("ERROR: Matrix scan failed")
+                    return
+
+                # Fresh look at just the doubtful cells instead of another full scan
+                self.recheck_uncertain()
+
+                self.checkpoint = self.new_checkpoint(self.last_scan_image)
 
             total_solutions_executed = 0
             iteration = 1
+
+            # Valid moves are kept up to date cell by cell instead of rescanning
+            self.move_index = MoveIndex(self.matrix, self.rules)
             
             # MAIN LOOP: Keep finding and executing solutions
             while True:
                 if self.is_cancelled():
-                    self.gui.update_status(f"Cancelled ({total_solutions_executed} completed)")
+                    self.set_status(f"Cancelled ({total_solutions_executed} completed)")
                     self.log(f"Auto-solve cancelled by user after {total_solutions_executed} solutions")
-                    self.gui.auto_solve_btn.setEnabled(True)
-                    self.gui.cancel_btn.setEnabled(False)
                     return
 
                 # Check if there are any numbers left
-                has_numbers = False
-                for row in self.matrix:
-                    for cell in row:
-                        if isinstance(cell, int) and 1 <= cell <= 9:
-                            has_numbers = True
-                            break
-                    if has_numbers:
-                        break
+                remaining = self.count_numbers()
                 
-                if not has_numbers:
-                    self.gui.update_status(f"Puzzle Complete! ({total_solutions_executed} total)")
+                if not remaining:
+                    self.discard_checkpoint()
+                    self.set_status(f"Puzzle Complete! ({total_solutions_executed} total)")
                     self.log(f"=== PUZZLE COMPLETE: No more numbers in matrix ===")
                     self.log(f"Total solutions executed: {total_solutions_executed}")
-                    self.gui.auto_solve_btn.setEnabled(True)
-                    self.gui.cancel_btn.setEnabled(False)
                     return
 
                 # Find all solutions in current state
-                self.gui.update_status(f"Finding solutions (iteration {iteration})...")
+                self.set_status(f"Finding solutions (iteration {iteration})...")
                 self.log(f"=== ITERATION {iteration}: Finding solutions ===")
-                self.find_all_solutions()
+                self.solutions = [move for move in self.move_index.moves() if move not in self.rejected_moves]
 
                 if not self.solutions:
-                    self.gui.update_status(f"No more solutions ({total_solutions_executed} total)")
+                    self.discard_checkpoint()
+                    self.set_status(f"No more solutions ({total_solutions_executed} total)")
                     self.log(f"No valid solutions found in iteration {iteration}")
                     self.log(f"=== AUTO SOLVE COMPLETE: {total_solutions_executed} total ===")
-                    self.gui.auto_solve_btn.setEnabled(True)
-                    self.gui.cancel_btn.setEnabled(False)
                     return
 
                 self.log(f"Found {len(self.solutions)} valid solutions in iteration {iteration}")
 
-                # Track used cells per iteration
-                used_cells = set()
+                batch = None
+                sequential = False  # Plan order matters: later moves rely on earlier ones
+                if pending:
+                    # Rest of the plan that was running when the solve stopped
+                    batch = [(move, self.get_solution_cells(move)) for move in pending]
+                    sequential = True
+                    pending = None
+                elif self.gui.endgame_check.isChecked() and self.endgame.should_solve(remaining):
+                    # Few numbers left: play the exact best order instead of greedy batches
+                    plan = self.endgame.solve(self.matrix)
+                    if plan is None:
+                        self.log(f"Endgame search hit its {self.endgame.time_limit * 1000:.0f} ms limit, staying greedy")
+                    elif plan:
+                        stats = self.endgame.last_stats
+                        self.log(f"Endgame plan: {len(plan)} moves clear {stats['cleared']} of {remaining} numbers "
+                                 f"({stats['time'] * 1000:.1f} ms)")
+                        batch = [(move, self.get_solution_cells(move)) for move in plan]
+                        sequential = True
+                if batch is None:
+                    candidates = self.postpone_uncertain(self.solutions)
+                    if self.gui.best_batch_check.isChecked():
+                        batch = self.select_best_batch(candidates)
+                    else:
+                        batch = self.select_solutions(candidates)
+                if deadline is not None:
+                    batch = self.fit_batch_to_deadline(batch, deadline - time.perf_counter(), sequential)
+                    if not batch:
+                        self.set_status(f"Time budget used ({total_solutions_executed} total)")
+                        self.log(f"=== DEADLINE: no move fits the time left, stopping after "
+                                 f"{total_solutions_executed} solutions ===")
+                        return
+                self.checkpoint.set_plan([move for move, cells in batch])
+
                 solutions_this_iteration = 0
 
-                for solution in self.solutions:
+                for solution, solution_cells in batch:
                     if self.is_cancelled():
-                        self.gui.update_status(f"Cancelled ({total_solutions_executed} completed)")
+                        self.set_status(f"Cancelled ({total_solutions_executed} completed)")
                         self.log(f"Auto-solve cancelled after {total_solutions_executed} solutions")
-                        self.gui.auto_solve_btn.setEnabled(True)
-                        self.gui.cancel_btn.setEnabled(False)
                         return
 
                     sol_type, start_r, start_c, end_r, end_c = solution
 
-                    # Get all cells involved
-                    solution_cells = set()
-                    if sol_type == 'right':
-                        for c in range(start_c, end_c + 1):
-                            solution_cells.add((start_r, c))
-                    elif sol_type == 'down':
-                        for r in range(start_r, end_r + 1):
-                            solution_cells.add((r, start_c))
-                    elif sol_type == 'square':
-                        for r in range(min(start_r, end_r), max(start_r, end_r) + 1):
-                            for c in range(start_c, end_c + 1):
-                                solution_cells.add((r, c))
-
-                    # Skip if cells already used
-                    if solution_cells & used_cells:
-                        self.log(f"Skipping solution at ({start_r},{start_c}) - overlap")
+                    # A resync after a failed drag can invalidate the rest of the batch
+                    if not self.is_valid_solution(solution_cells):
+                        self.log(f"Skipping solution at ({start_r},{start_c}) - board changed")
+                        self.checkpoint.skip_move(solution)
                         continue
 
-                    used_cells.update(solution_cells)
+                    drag_features = self.drag_features(solution, solution_cells)
+                    if deadline is not None and \
+                            time.perf_counter() + self.drag_cost.predict(*drag_features) > deadline:
+                        self.set_status(f"Time budget used ({total_solutions_executed} total)")
+                        self.log(f"=== DEADLINE: stopping after {total_solutions_executed} solutions ===")
+                        return
+
                     total_solutions_executed += 1
+                    self.moves_executed = total_solutions_executed
                     solutions_this_iteration += 1
                     
-                    self.gui.update_status(f"Solution #{total_solutions_executed} ({sol_type})")
+                    self.set_status(f"Solution #{total_solutions_executed} ({sol_type})")
                     self.log(f"Executing #{total_solutions_executed}: {sol_type} at ({start_r},{start_c})")
 
+                    number_cells = [(r, c) for r, c in solution_cells
+                                    if isinstance(self.matrix[r][c], int)]
+
+                    move_start = time.perf_counter()
+
                     # Visual highlight
                     self.highlight_solution(sol_type, start_r, start_c, end_r, end_c)
                     self.update_overlay()
-                    time.sleep(0.2)
+                    self.sleep(0.2)
 
                     # Perform drag
+                    self.checkpoint.start_move(solution)
                     drag_success = self.perform_drag(start_r, start_c, end_r, end_c)
                     if not drag_success:
-                        self.gui.update_status(f"Cancelled ({total_solutions_executed - 1} completed)")
-                        self.gui.auto_solve_btn.setEnabled(True)
-                        self.gui.cancel_btn.setEnabled(False)
+                        self.set_status(f"Cancelled ({total_solutions_executed - 1} completed)")
                         return
                     
-                    # Mark cells as empty in memory
-                    for cell in solution_cells:
-                        r, c = cell
-                        self.matrix[r][c] = ' '
+                    if self.gui.verify_check.isChecked():
+                        # Confirm on screen before marking cells empty
+                        if not self.verify_drag(solution, solution_cells, number_cells):
+                            self.set_status(f"Cancelled ({total_solutions_executed - 1} completed)")
+                            return
+                    else:
+                        # Mark cells as empty in memory
+                        for cell in solution_cells:
+                            r, c = cell
+                            self.matrix[r][c] = ' '
+
+                    changes = {(r, c): self.matrix[r][c] for r, c in solution_cells}
+                    self.move_index.update(changes)
+                    self.uncertain.difference_update(cell for cell, value in changes.items() if value == ' ')
+                    self.checkpoint.finish_move(solution, changes)
                     
-                    time.sleep(0.3)
+                    self.sleep(0.3)
                     self.update_overlay()
+                    self.drag_cost.observe(*drag_features, time.perf_counter() - move_start)
 
                 self.log(f"Iteration {iteration} complete: {solutions_this_iteration} solutions")
                 iteration += 1
@@ -694,7 +1095,102 @@ class PuzzleSolver:
         finally:
             with self.cancel_lock:
                 self.is_auto_solving = False
-            print("AUTO-SOLVE ENDED")
+            # Idle: no capture thread running
+            self.capture.stop()
+            self.save_checkpoint()
+            self.save_drag_cost()
+            self.set_solving(False)
+            self.log(f"Auto-solve ended after {self.moves_executed} moves")
+
+    def drag_features(self, solution, solution_cells):
+        """(drag distance in pixels, digits cleared, nominal drag sleep) for the cost model"""
+        sol_type, start_r, start_c, end_r, end_c = solution
+        start_x, start_y = self.get_cell_center(start_r, start_c)
+        end_x, end_y = self.get_cell_center(end_r, end_c)
+        distance = float(np.hypot(end_x - start_x, end_y - start_y))
+        cells = sum(1 for r, c in solution_cells if isinstance(self.matrix[r][c], int))
+        nominal_sleep = (self.gui.delay_spin.value()
+                         + self.gui.drag_steps_spin.value() * self.gui.step_interval_spin.value()) / 1000.0
+        return distance, cells, nominal_sleep
+
+    def fit_batch_to_deadline(self, batch, time_left, sequential=False):
+        """Keep the moves of a batch that are predicted to finish in time_left seconds"""
+        cells_by_move = dict(batch)
+        items = []
+        for move, cells in batch:
+            features = self.drag_features(move, cells)
+            items.append((move, features[1], self.drag_cost.predict(*features)))
+        chosen, dropped = fit_to_budget(items, max(0.0, time_left), sequential)
+        if dropped:
+            self.log(f"Time budget: {time_left:.1f}s left, keeping {len(chosen)} moves, "
+                     f"dropping {len(dropped)} (cost model: {self.drag_cost.describe()})")
+        return [(move, cells_by_move[move]) for move in chosen]
+
+    def save_drag_cost(self):
+        try:
+            self.drag_cost.save(self.drag_cost_path)
+        except OSError as e:
+            self.log(f"Could not save drag cost model: {e}")
+
+    def get_solution_cells(self, solution):
+        """Get all cells covered by a solution"""
+        sol_type, start_r, start_c, end_r, end_c = solution
+        solution_cells = set()
+        if sol_type == 'right':
+            for c in range(start_c, end_c + 1):
+                solution_cells.add((start_r, c))
+        elif sol_type == 'down':
+            for r in range(start_r, end_r + 1):
+                solution_cells.add((r, start_c))
+        elif sol_type == 'square':
+            for r in range(min(start_r, end_r), max(start_r, end_r) + 1):
+                for c in range(start_c, end_c + 1):
+                    solution_cells.add((r, c))
+        return solution_cells
+
+    def count_numbers(self):
+        """Number of cells still holding a digit"""
+        return sum(1 for row in self.matrix for cell in row if isinstance(cell, int) and 1 <= cell <= 9)
+
+    def is_valid_solution(self, solution_cells):
+        """Check the digits currently in the cells still make a move under the current rules"""
+        numbers = [self.matrix[r][c] for r, c in solution_cells if isinstance(self.matrix[r][c], int)]
+        return self.rules.is_move(sum(numbers), len(numbers))
+
+    def select_solutions(self, solutions):
+        """
+        Greedy batch selection: take solutions in order, skipping any that
+        overlap cells already used in this iteration
+        Returns a list of (solution, cells) pairs
+        """
+        used_cells = set()
+        batch = []
+        for solution in solutions:
+            solution_cells = self.get_solution_cells(solution)
+
+            # Skip if cells already used
+            if solution_cells & used_cells:
+                self.log(f"Skipping solution at ({solution[1]},{solution[2]}) - overlap")
+                continue
+
+            used_cells.update(solution_cells)
+            batch.append((solution, solution_cells))
+        return batch
+
+    def select_best_batch(self, solutions):
+        """
+        Batch clearing the most digits without two moves sharing one
+        (conflict-graph selection). Returns a list of (solution, cells) pairs
+        """
+        items = []
+        for solution in solutions:
+            digits = {(r, c) for r, c in self.get_solution_cells(solution) if isinstance(self.matrix[r][c], int)}
+            items.append((solution, digits))
+        batch = [(solution, self.get_solution_cells(solution)) for solution, _ in self.batch_selector.select(items)]
+        stats = self.batch_selector.last_stats
+        self.log(f"Selected {len(batch)} of {len(solutions)} solutions clearing {stats['cleared']} cells "
+                 f"({stats['components']} groups, {stats['time'] * 1000:.1f} ms)")
+        return batch
 
     def highlight_solution(self, sol_type, start_r, start_c, end_r, end_c):
         """Helper to highlight solution visually"""
@@ -725,107 +1221,413 @@ class PuzzleSolver:
                             self.matrix[j][k] = "■"
 
     def find_all_solutions(self):
-        """Find all valid sum=10 solutions in the matrix"""
-        self.solutions = []
-        
-        # Find right sums
-        for r in range(self.rows):
-            for c in range(self.columns):
-                if self.has_special_char(r, c):
-                    continue
-                
-                valid, positions = self.checkRight(self.columns, r, c, self.matrix)
-                if valid:
-                    self.solutions.append(('right', r, c, r, c + positions))
-        
-        # Find down sums
-        for r in range(self.rows):
-            for c in range(self.columns):
-                if self.has_special_char(r, c):
-                    continue
-                
-                valid, positions = self.checkDown(self.rows, r, c, self.matrix)
-                if valid:
-                    self.solutions.append(('down', r, c, r + positions, c))
-        
-        # Find square sums
-        for r in range(self.rows):
-            for c in range(self.columns):
-                if self.has_special_char(r, c):
-                    continue
-                
-                valid, max_r, max_c = self.checkSquareDown(self.rows, self.columns, r, c, self.matrix)
-                if valid:
-                    self.solutions.append(('square', r, c, max_r, max_c))
-                else:
-                    valid, max_r, max_c = self.checkSquareUp(self.rows, self.columns, r, c, self.matrix)
-                    if valid:
-                        self.solutions.append(('square', r, c, max_r, max_c))
-
-    def get_matrix_numbers(self):
-        """Optimized grid scanning with single screenshot"""
+        """Find all valid moves in the matrix under the current rules"""
+        self.solutions = MoveBoard(self.matrix, self.rules).moves()
+
+    def get_matrix_numbers(self, img_gray=None):
+        """Optimized grid scanning with single screenshot (or a full-grid capture already taken)"""
         self.numbers = []
         self.matrix = []
         
         self.log(f"Scanning {self.rows}x{self.columns} grid...")
         start_time = time.time()
 
-        # Calculate full grid dimensions
-        grid_width = (self.columns - 1) * self.offset_x + self.capture_area_w
-        grid_height = (self.rows - 1) * self.offset_y + self.capture_area_h
+        # Single screenshot of entire grid
+        full_img_gray = img_gray if img_gray is not None else \
+            self.grab_gray(self.cells_capture_area(0, 0, self.rows - 1, self.columns - 1))
+        self.last_scan_image = full_img_gray
 
-        capture_area = {
-            "top": self.top_start,
-            "left": self.left_start,
-            "width": grid_width,
-            "height": grid_height,
-        }
+        if self.template_scale is None:
+            self.lock_template_scale([
+                self.get_cell_image(full_img_gray, row, col)
+                for row in range(self.rows)
+                for col in range(self.columns)
+            ])
 
-        with mss.mss() as sct:
-            # Single screenshot of entire grid
-            full_image = sct.grab(capture_area)
-            full_img_np = np.array(full_image)
-            full_img_gray = cv2.cvtColor(full_img_np, cv2.COLOR_BGR2GRAY)
-
-            counter = 0
-            for row in range(self.rows):
-                cell_y = row * self.offset_y
-                for col in range(self.columns):
-                    counter += 1
-                    cell_x = col * self.offset_x
-
-                    # Extract cell region from full image
-                    cell_img = full_img_gray[
-                        cell_y : cell_y + self.capture_area_h,
-                        cell_x : cell_x + self.capture_area_w,
-                    ]
-
-                    # Recognize digit using pre-loaded templates
-                    best_score = -10 
-                    best_match_digit = -1
-
-                    for digit, template in self.templates.items():
-                        res = cv2.matchTemplate(cell_img, template, cv2.TM_CCOEFF_NORMED)
-                        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
-
-                        if max_val > best_score:
-                            best_score = max_val
-                            best_match_digit = digit
-                            
-                            # Early exit for high confidence matches
-                            if best_score > 0.95:
-                                break
-                    
-                    if best_match_digit != -1:
-                        self.numbers.append(best_match_digit)
-                    else:
-                        self.numbers.append(" ")
+        if self.bootstrap_mode and self.session_templates is None and self.template_scale is not None:
+            self.bootstrap_from_capture(full_img_gray)
+
+        digits, scores, confidence = self.recognize_grid(full_img_gray)
+        self.confidence = confidence
+        self.uncertain = {(int(r), int(c)) for r, c in zip(*np.nonzero((digits > 0) & (confidence < self.min_confidence)))}
+        counter = digits.size
+        for digit in digits.ravel():
+            self.numbers.append(int(digit) if digit else " ")
 
         elapsed = time.time() - start_time
         self.createMatrix()
-        self.gui.update_status("Matrix scanned successfully")
+        self.set_status("Matrix scanned successfully")
         self.log(f"OCR scan complete: {counter} cells analyzed in {elapsed:.3f}s")
-    
+        if self.uncertain:
+            self.log(f"{len(self.uncertain)} cells read with low confidence: {sorted(self.uncertain)}")
+
+    def wait_for_stable_screen(self):
+        """
+        Capture the grid until it stops changing (window switch, animations)
+        and return the last, settled capture
+        """
+        area = self.cells_capture_area(0, 0, self.rows - 1, self.columns - 1)
+        result = wait_for_stable(lambda: self.grab_gray_newer(area), self.stable_frames, self.stable_threshold,
+                                 timeout=self.stable_timeout, cancelled=self.is_cancelled, sleep=self.sleep)
+        if result.stable:
+            self.log(f"Screen settled in {result.elapsed * 1000:.0f} ms ({result.frames} frames)")
+        elif not self.is_cancelled():
+            self.log(f"Screen still changing after {result.elapsed:.1f}s "
+                     f"(last change {result.max_change:.0f}), scanning anyway")
+        return result.frame
+
+    def cells_capture_area(self, min_r, min_c, max_r, max_c):
+        """Screen region covering the cells from (min_r,min_c) to (max_r,max_c)"""
+        return self.grid.capture_area(min_r, min_c, max_r, max_c)
+
+    def grab_gray(self, capture_area):
+        """
+        Capture a screen region as a grayscale image. With background capture
+        running, the newest ring frame is used straight away if it is at most
+        one capture period old; otherwise this waits for one that fresh
+        """
+        if self.grab is None and self.capture.running:
+            img_gray = self.grab_ring(capture_area, self.capture.interval)
+            if img_gray is not None:
+                return img_gray
+        return self.grab_screen(capture_area)
+
+    def grab_gray_newer(self, capture_area):
+        """
+        Like grab_gray, but with background capture running only a frame taken
+        after the call will do, for callers that compare or combine
+        consecutive captures
+        """
+        if self.grab is None and self.capture.running:
+            img_gray = self.grab_ring(capture_area, 0)
+            if img_gray is not None:
+                return img_gray
+        return self.grab_gray(capture_area)
+
+    def grab_ring(self, capture_area, max_age):
+        """Crop a ring frame at most max_age seconds old, None if there is none"""
+        frame = self.capture.latest()
+        if frame is None or time.time() - frame.timestamp > max_age:
+            frame = self.capture.wait_newer(time.time() - max_age, timeout=0.5)
+        if frame is None:
+            return None
+        img_gray = self.capture.crop(frame, capture_area)
+        if img_gray is None:
+            return None
+        # Copy out of the ring: a 50x50 scan outlives a ring slot. A slot
+        # overwritten before the copy finished is torn, grab directly instead
+        img_gray = img_gray.copy()
+        if self.capture.is_intact(frame):
+            return img_gray
+        self.log("Capture frame overwritten while copying, grabbing directly")
+        return None
+
+    def grab_screen(self, capture_area):
+        """Grab a screen region directly, bypassing background capture"""
+        if self.grab is not None:
+            return self.grab(capture_area)
+        with mss.mss() as sct:
+            img_np = np.array(sct.grab(capture_area))
+        return cv2.cvtColor(img_np, cv2.COLOR_BGR2GRAY)
+
+    def get_cell_image(self, img_gray, row, col, origin=(0, 0)):
+        """Extract a cell region from a capture whose top-left cell is origin"""
+        cell_y = (row - origin[0]) * self.offset_y
+        cell_x = (col - origin[1]) * self.offset_x
+        return img_gray[
+            cell_y : cell_y + self.capture_area_h,
+            cell_x : cell_x + self.capture_area_w,
+        ]
+
+    def recognize_grid(self, img_gray, rows=None, columns=None):
+        """
+        Recognize every cell of a full-grid capture.
+        Blank cells are found for the whole grid at once and skipped; the rest
+        are template matched, spread over worker threads on large boards
+        (cv2.matchTemplate releases the GIL) to keep 50x50 scans interactive.
+        Returns (digits, scores, confidence) arrays of shape rows x columns
+        (digit 0 = empty). Confidence is the margin of the best template score
+        over the runner-up, 1.0 for empty cells.
+        """
+        rows = rows or self.rows
+        columns = columns or self.columns
+        img_gray = np.ascontiguousarray(img_gray)
+
+        cells = cell_windows(img_gray, rows, columns, self.offset_y, self.offset_x,
+                             self.capture_area_h, self.capture_area_w)
+        blank = self.blank_mask(cells)
+
+        digits = np.zeros((rows, columns), dtype=np.int8)
+        scores = np.zeros((rows, columns), dtype=np.float32)
+        confidence = np.ones((rows, columns), dtype=np.float32)
+
+        def match_rows(row_range):
+            for row in row_range:
+                for col in range(columns):
+                    if not blank[row, col]:
+                        digits[row, col], scores[row, col], confidence[row, col] = self.match_cell(cells[row, col])
+
+        workers = min(self.scan_workers, rows) if rows * columns > 400 else 1
+        if workers > 1:
+            chunks = [range(start, rows, workers) for start in range(workers)]
+            list(self.scan_pool().map(match_rows, chunks))
+        else:
+            match_rows(range(rows))
+
+        return digits, scores, confidence
+
+    def scan_pool(self):
+        if self._scan_pool is None:
+            self._scan_pool = ThreadPoolExecutor(max_workers=self.scan_workers, thread_name_prefix="scan")
+        return self._scan_pool
+
+    def blank_mask(self, cells):
+        """Blank flags for a rows x columns x h x w cell view, computed in one pass"""
+        return cells.std(axis=(2, 3)) < self.blank_cell_std
+
+    def is_blank_cell(self, cell_img):
+        """Cheap emptiness test: a cleared cell is near-uniform background"""
+        return float(cell_img.std()) < self.blank_cell_std
+
+    def recognize_cell(self, cell_img):
+        """Recognize the digit in a cell image using pre-loaded templates, ' ' if empty"""
+        if self.is_blank_cell(cell_img):
+            return " "
+        digit, score, margin = self.match_cell(cell_img)
+        return digit if digit else " "
+
+    def match_cell(self, cell_img, exhaustive=False):
+        """
+        Best matching digit (0 if none), its score, and its margin over the
+        runner-up digit for a non-blank cell image
+        """
+        rivals = self.template_rivals()
+        scores = {}
+
+        for digit, template in self.templates.items():
+            res = cv2.matchTemplate(cell_img, template, cv2.TM_CCOEFF_NORMED)
+            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+            scores[digit] = max_val
+
+            # Early exit for high confidence matches. Look-alikes (6/8/9) are only
+            # scored when the lead over the digits tried so far is uncertain
+            if max_val > self.early_exit_score and not exhaustive:
+                runner_up = max((score for other, score in scores.items() if other != digit), default=0.0)
+                if max_val - runner_up < self.min_confidence:
+                    for rival in rivals.get(digit, ()):
+                        if rival not in scores:
+                            res = cv2.matchTemplate(cell_img, self.templates[rival], cv2.TM_CCOEFF_NORMED)
+                            scores[rival] = cv2.minMaxLoc(res)[1]
+                break
+
+        if not scores:
+            return 0, 0.0, 0.0
+        best_match_digit = max(scores, key=scores.get)
+        best_score = scores[best_match_digit]
+        runner_up = max((score for digit, score in scores.items() if digit != best_match_digit), default=0.0)
+        return best_match_digit, best_score, max(0.0, best_score - runner_up)
+
+    def template_rivals(self):
+        """
+        For each digit, the other digits whose templates match it at least
+        rival_similarity (either way round), for the current template set
+        """
+        templates = self.templates
+        if self._rivals[0] is templates:
+            return self._rivals[1]
+
+        h = max(t.shape[0] for t in templates.values()) + 4
+        w = max(t.shape[1] for t in templates.values()) + 4
+        padded = {}
+        for digit, t in templates.items():
+            top, left = (h - t.shape[0]) // 2, (w - t.shape[1]) // 2
+            padded[digit] = cv2.copyMakeBorder(t, top, h - t.shape[0] - top, left, w - t.shape[1] - left,
+                                               cv2.BORDER_REPLICATE)
+        rivals = {digit: set() for digit in templates}
+        for a in templates:
+            for b in templates:
+                if a != b:
+                    similarity = cv2.minMaxLoc(cv2.matchTemplate(padded[b], templates[a], cv2.TM_CCOEFF_NORMED))[1]
+                    if similarity >= self.rival_similarity:
+                        rivals[a].add(b)
+                        rivals[b].add(a)
+        self._rivals = (templates, {digit: sorted(others) for digit, others in rivals.items()})
+        return self._rivals[1]
+
+    def verify_cleared(self, cells):
+        """
+        Capture only the bounding box of the given cells and return the ones
+        that still show a digit. Polls briefly to let the clear animation finish.
+        """
+        min_r = min(r for r, c in cells)
+        max_r = max(r for r, c in cells)
+        min_c = min(c for r, c in cells)
+        max_c = max(c for r, c in cells)
+        capture_area = self.cells_capture_area(min_r, min_c, max_r, max_c)
+
+        deadline = time.time() + self.verify_timeout * self.sleep_scale
+        while True:
+            img_gray = self.grab_gray(capture_area)
+            remaining = [
+                (r, c) for r, c in cells
+                if not self.is_blank_cell(self.get_cell_image(img_gray, r, c, origin=(min_r, min_c)))
+            ]
+            if not remaining or time.time() >= deadline:
+                return remaining, img_gray, (min_r, min_c)
+            self.sleep(0.05)
+
+    def verify_drag(self, solution, solution_cells, number_cells):
+        """
+        Check a performed drag actually cleared its cells and retry it once if
+        not. If the retry also fails, re-recognize just the cells still showing
+        a digit so the in-memory board matches the game again.
+        Returns False only if the retry was cancelled.
+        """
+        sol_type, start_r, start_c, end_r, end_c = solution
+
+        remaining, img_gray, origin = self.verify_cleared(number_cells)
+        if remaining:
+            self.log(f"Drag at ({start_r},{start_c}) did not register, retrying once")
+            if not self.perform_drag(start_r, start_c, end_r, end_c):
+                return False
+            remaining, img_gray, origin = self.verify_cleared(number_cells)
+
+        for r, c in solution_cells:
+            self.matrix[r][c] = ' '
+
+        if remaining:
+            # Retry failed too: resync just those cells from the last capture
+            for r, c in remaining:
+                self.matrix[r][c] = self.recognize_cell(self.get_cell_image(img_gray, r, c, origin=origin))
+            self.log(f"Drag at ({start_r},{start_c}) failed twice, resynced {len(remaining)} cells from screen")
+            # At least one of these reads is wrong: don't replay the move, and doubt its cells
+            self.rejected_moves.add(solution)
+            self.uncertain.update(remaining)
+        return True
+
+    def recheck_uncertain(self):
+        """
+        Re-read only the low-confidence cells: capture their bounding box a
+        few times, average the frames to cancel noise and animation, and
+        compare every template. Cells that come out confident stop being
+        uncertain. Returns {(r, c): value} for reads that changed.
+        """
+        if not self.uncertain:
+            return {}
+        cells = sorted(self.uncertain)
+        min_r = min(r for r, c in cells)
+        max_r = max(r for r, c in cells)
+        min_c = min(c for r, c in cells)
+        max_c = max(c for r, c in cells)
+        capture_area = self.cells_capture_area(min_r, min_c, max_r, max_c)
+
+        frames = []
+        for i in range(self.recheck_frames):
+            if i:
+                self.sleep(0.03)
+            frames.append(self.grab_gray_newer(capture_area).astype(np.float32))
+        img_gray = np.mean(frames, axis=0).round().astype(np.uint8)
+
+        changes = {}
+        for r, c in cells:
+            cell_img = self.get_cell_image(img_gray, r, c, origin=(min_r, min_c))
+            if self.is_blank_cell(cell_img):
+                value, margin = " ", 1.0
+            else:
+                digit, score, margin = self.match_cell(cell_img, exhaustive=True)
+                value = digit if digit else " "
+            if self.confidence is not None:
+                self.confidence[r, c] = margin
+            if margin >= self.min_confidence:
+                self.uncertain.discard((r, c))
+            if self.matrix[r][c] != value:
+                changes[(r, c)] = value
+                self.matrix[r][c] = value
+        self.log(f"Re-read {len(cells)} uncertain cells from {self.recheck_frames} frames: "
+                 f"{len(changes)} changed, {len(self.uncertain)} still uncertain")
+        return changes
+
+    def postpone_uncertain(self, solutions):
+        """Moves that avoid uncertain cells; all moves once only uncertain ones are left"""
+        if not self.uncertain:
+            return solutions
+        certain = [solution for solution in solutions if not self.get_solution_cells(solution) & self.uncertain]
+        if certain:
+            if len(certain) < len(solutions):
+                self.log(f"Postponing {len(solutions) - len(certain)} moves on uncertain cells")
+            return certain
+        self.log("Only moves on uncertain cells left, playing them (verification catches misreads)")
+        return solutions
+
+    def cell_signatures(self, img_gray):
+        """Blank mask and per-cell hashes of a full-grid capture"""
+        cells = cell_windows(np.ascontiguousarray(img_gray), self.rows, self.columns, self.offset_y,
+                             self.offset_x, self.capture_area_h, self.capture_area_w)
+        blank = self.blank_mask(cells)
+        return blank, cell_hashes(cells, blank)
+
+    def new_checkpoint(self, img_gray):
+        """Checkpoint of the freshly scanned board and the capture it came from"""
+        blank, hashes = self.cell_signatures(img_gray)
+        return SolveCheckpoint(self.matrix, blank, hashes, grid_key(self.grid))
+
+    def save_checkpoint(self):
+        """Persist the checkpoint so a resume also works after a restart"""
+        if self.checkpoint is None:
+            return
+        try:
+            self.checkpoint.save(self.checkpoint_path)
+        except OSError as e:
+            self.log(f"Could not save checkpoint: {e}")
+
+    def discard_checkpoint(self):
+        """Nothing left to resume (board solved or stuck)"""
+        self.checkpoint = None
+        try:
+            os.remove(self.checkpoint_path)
+        except OSError:
+            pass
+
+    def resume_from_checkpoint(self, img_gray=None):
+        """
+        Restore the board from the checkpoint if one capture of the grid
+        confirms it. Returns the moves still to play from the interrupted plan
+        (possibly empty), or None when a full scan is needed.
+        """
+        checkpoint = self.checkpoint or SolveCheckpoint.load(self.checkpoint_path)
+        if checkpoint is None:
+            self.log("No checkpoint to resume from, doing a full scan")
+            return None
+        if checkpoint.geometry != grid_key(self.grid):
+            self.log("Checkpoint was taken with a different grid layout, doing a full scan")
+            return None
+
+        start = time.perf_counter()
+        if img_gray is None:
+            img_gray = self.grab_gray(self.cells_capture_area(0, 0, self.rows - 1, self.columns - 1))
+        blank, hashes = self.cell_signatures(img_gray)
+        in_flight_cells = self.get_solution_cells(checkpoint.in_flight) if checkpoint.in_flight else ()
+        mismatches, in_flight_cleared = checkpoint.compare(blank, hashes, in_flight_cells)
+        if mismatches:
+            self.log(f"Checkpoint does not match the screen ({len(mismatches)} cells differ), doing a full scan")
+            return None
+
+        if checkpoint.in_flight:
+            if in_flight_cleared:
+                # The interrupted drag went through after all
+                checkpoint.finish_move(checkpoint.in_flight, {cell: 0 for cell in in_flight_cells})
+            else:
+                checkpoint.pending.insert(0, checkpoint.in_flight)
+                checkpoint.in_flight = None
+
+        self.checkpoint = checkpoint
+        self.matrix = checkpoint.matrix()
+        self.update_overlay()
+        elapsed = time.perf_counter() - start
+        self.log(f"Resumed from checkpoint in {elapsed * 1000:.1f} ms: {len(checkpoint.executed)} moves done, "
+                 f"{len(checkpoint.pending)} still planned")
+        return list(checkpoint.pending)
+
 
     def createMatrix(self):
         self.matrix = []
@@ -848,272 +1650,45 @@ class PuzzleSolver:
         if self.rows > 3:
             self.log("...")
 
-    def checkRight(self, columns, r, c, matrix):
+    def mark_sums(self, kind, start_mark, mark, column_major=False):
         """
-        Enhanced: Check for horizontal patterns going right
-        Only counts actual numbers, ignores empty spaces in between
+        Highlight every move of one kind in the matrix, start cell first.
+        Marked cells block the moves found after them. Returns the count
         """
-        if c >= columns:
-            return False, 0
-        if self.has_special_char(r, c):
-            return False, 0
-        
-        # Must start with a number
-        start_val = matrix[r][c]
-        if not isinstance(start_val, int) or start_val < 1 or start_val > 9:
-            return False, 0
-        
-        numbers_sum = start_val
-        last_number_pos = 0
-        number_count = 1  # Count how many actual numbers we have
-        
-        # Scan through cells to the right
-        for j in range(1, columns - c):
-            if c + j >= columns:
-                break
-            
-            current_cell = matrix[r][c + j]
-            
-            # Skip special characters (already processed)
-            if self.has_special_char(r, c + j):
-                break
-            
-            # If it's a number, add it to sum
-            if isinstance(current_cell, int) and 1 <= current_cell <= 9:
-                numbers_sum += current_cell
-                last_number_pos = j
-                number_count += 1
-                
-                # Check if we hit exactly 10
-                if numbers_sum == 10 and number_count >= 2:  # Need at least 2 numbers
-                    return True, last_number_pos
-                
-                # If we exceed 10, this path is invalid
-                if numbers_sum > 10:
-                    return False, 0
-            
-            # If it's empty space, continue looking (can drag through it)
-            elif current_cell == ' ':
+        board = MoveBoard(self.matrix, self.rules)
+        starts = [(r, c) for c in range(self.columns) for r in range(self.rows)] if column_major else \
+                 [(r, c) for r in range(self.rows) for c in range(self.columns)]
+        count = 0
+        for r, c in starts:
+            move, _ = board.evaluate(kind, r, c)
+            if move is None:
                 continue
-            else:
-                break
-        
-        return False, 0
+            count += 1
+            for cell_r, cell_c in self.get_solution_cells(move):
+                value = start_mark if (cell_r, cell_c) == (r, c) else mark
+                self.matrix[cell_r][cell_c] = value
+                board.set(cell_r, cell_c, value)
+        return count
 
     def sums_right(self):
-        count = 0
-        for r in range(self.rows):
-            for c in range(self.columns):
-                if self.has_special_char(r, c):
-                    continue
-                validSum, positions = self.checkRight(self.columns, r, c, self.matrix)
-                if validSum:
-                    count += 1
-                    for x in range(1, positions + 1):
-                        self.matrix[r][c] = "\u25BA"
-                        self.matrix[r][c + x] = "\u2192"
+        count = self.mark_sums("right", "\u25BA", "\u2192")
         self.printMatrix()
         self.update_overlay()
-        self.gui.update_status(f"Found {count} right sums")
+        self.set_status(f"Found {count} right sums")
         self.log(f"Right sums found: {count}")
 
-    def checkDown(self, rows, r, c, matrix):
-        """
-        Enhanced: Check for vertical patterns going down
-        Only counts actual numbers, ignores empty spaces in between
-        """
-        if r >= rows:
-            return False, 0
-        if self.has_special_char(r, c):
-            return False, 0
-        
-        # Must start with a number
-        start_val = matrix[r][c]
-        if not isinstance(start_val, int) or start_val < 1 or start_val > 9:
-            return False, 0
-        
-        numbers_sum = start_val
-        last_number_pos = 0
-        number_count = 1
-        
-        # Scan through cells going down
-        for j in range(1, rows - r):
-            if r + j >= rows:
-                break
-            
-            current_cell = matrix[r + j][c]
-            
-            # Skip special characters (already processed)
-            if self.has_special_char(r + j, c):
-                break
-            
-            # If it's a number, add it to sum
-            if isinstance(current_cell, int) and 1 <= current_cell <= 9:
-                numbers_sum += current_cell
-                last_number_pos = j
-                number_count += 1
-                
-                # Check if we hit exactly 10
-                if numbers_sum == 10 and number_count >= 2:
-                    return True, last_number_pos
-                
-                # If we exceed 10, this path is invalid
-                if numbers_sum > 10:
-                    return False, 0
-            
-            # If it's empty space, continue looking
-            elif current_cell == ' ':
-                continue
-            else:
-                break
-        
-        return False, 0
-
     def sums_down(self):
-        count = 0
-        for c in range(self.columns):
-            for r in range(self.rows):
-                if self.has_special_char(r, c):
-                    continue
-                validSum, positions = self.checkDown(self.rows, r, c, self.matrix)
-                if validSum:
-                    count += 1
-                    for x in range(1, positions + 1):
-                        self.matrix[r][c] = "\u25BC"
-                        self.matrix[x + r][c] = "\u2193"
+        count = self.mark_sums("down", "\u25BC", "\u2193", column_major=True)
         self.printMatrix()
         self.update_overlay()
-        self.gui.update_status(f"Found {count} down sums")
+        self.set_status(f"Found {count} down sums")
         self.log(f"Down sums found: {count}")
 
-    def checkSquareDown(self, rows, columns, start_r, start_c, matrix):
-        """
-        Enhanced: Check for square patterns going down-right
-        Counts all numbers in rectangle, ignores empty spaces
-        """
-        if start_r >= rows or start_c >= columns:
-            return False, 0, 0
-        if self.has_special_char(start_r, start_c):
-            return False, 0, 0
-        
-        # Must start with a number
-        start_val = matrix[start_r][start_c]
-        if not isinstance(start_val, int) or start_val < 1 or start_val > 9:
-            return False, 0, 0
-
-        edge_rows = start_r + 1
-        edge_columns = start_c + 1
-
-        while edge_rows < rows and edge_columns < columns:
-            sum_val = 0
-            has_special = False
-            number_count = 0
-            
-            # Sum all numbers in the rectangle, ignore empty spaces
-            for r in range(start_r, edge_rows + 1):
-                for c in range(start_c, edge_columns + 1):
-                    if self.has_special_char(r, c):
-                        has_special = True
-                        break
-                    
-                    cell_val = matrix[r][c]
-                    if isinstance(cell_val, int) and 1 <= cell_val <= 9:
-                        sum_val += cell_val
-                        number_count += 1
-                
-                if has_special:
-                    break
-            
-            if has_special:
-                return False, 0, 0
-            
-            if sum_val > 10:
-                return False, 0, 0
-            if sum_val == 10 and number_count >= 2:  # Need at least 2 numbers
-                return True, edge_rows, edge_columns
-            
-            edge_rows += 1
-            edge_columns += 1
-
-        return False, 0, 0
-
-    def checkSquareUp(self, rows, columns, start_r, start_c, matrix):
-        """
-        Enhanced: Check for square patterns going up-right
-        Counts all numbers in rectangle, ignores empty spaces
-        """
-        if start_r <= 0 or start_c >= columns:
-            return False, 0, 0
-        if self.has_special_char(start_r, start_c):
-            return False, 0, 0
-        
-        # Must start with a number
-        start_val = matrix[start_r][start_c]
-        if not isinstance(start_val, int) or start_val < 1 or start_val > 9:
-            return False, 0, 0
-
-        edge_rows = start_r - 1
-        edge_columns = start_c + 1
-
-        while edge_rows >= 0 and edge_columns < columns:
-            sum_val = 0
-            has_special = False
-            number_count = 0
-            
-            # Sum all numbers in the rectangle, ignore empty spaces
-            for r in range(edge_rows, start_r + 1):
-                for c in range(start_c, edge_columns + 1):
-                    if self.has_special_char(r, c):
-                        has_special = True
-                        break
-                    
-                    cell_val = matrix[r][c]
-                    if isinstance(cell_val, int) and 1 <= cell_val <= 9:
-                        sum_val += cell_val
-                        number_count += 1
-                
-                if has_special:
-                    break
-            
-            if has_special:
-                return False, 0, 0
-            
-            if sum_val > 10:
-                return False, 0, 0
-            if sum_val == 10 and number_count >= 2:
-                return True, edge_rows, edge_columns
-            
-            edge_rows -= 1
-            edge_columns += 1
-
-        return False, 0, 0
-
     def sums_square(self):
-        count = 0
-        for r in range(self.rows):
-            for c in range(self.columns):
-                if self.has_special_char(r, c):
-                    continue
-                
-                validSumDown, max_r, max_c = self.checkSquareDown(self.rows, self.columns, r, c, self.matrix)
-                if validSumDown:
-                    count += 1
-                    for j in range(r, max_r + 1):
-                        for k in range(c, max_c + 1):
-                            self.matrix[j][k] = "\u25A0"
-                    self.matrix[r][c] = "\u25A1"
-                else:
-                    validSumUp, max_r, max_c = self.checkSquareUp(self.rows, self.columns, r, c, self.matrix)
-                    if validSumUp:
-                        count += 1
-                        for j in range(r, max_r - 1, -1):
-                            for k in range(c, max_c + 1):
-                                self.matrix[j][k] = "\u25A0"
-                        self.matrix[r][c] = "\u25A1"
-        
+        count = self.mark_sums("square", "\u25A1", "\u25A0")
         self.printMatrix()
         self.update_overlay()
-        self.gui.update_status(f"Found {count} square sums")
+        self.set_status(f"Found {count} square sums")
         self.log(f"Square sums found: {count}")
 
     def has_special_char(self, r, c):
@@ -1126,7 +1701,7 @@ class PuzzleSolver:
                     self.matrix[r][c] = " "
         self.printMatrix()
         self.update_overlay()
-        self.gui.update_status("Matrix cleaned")
+        self.set_status("Matrix cleaned")
         self.log("Special characters cleaned from matrix")
 
     def update_overlay(self):
@@ -1148,31 +1723,90 @@ class PuzzleSolver:
                     cell_list.append((r, c, (0, 0, 255, 200)))
                 elif value == " ":
                     cell_list.append((r, c, (0, 0, 0, 0)))
-        self.overlay.set_cells(cell_list)
+        self.push_overlay(cell_list)
+
+    def set_grid_size(self, rows, columns):
+        """Resize the board; the overlay shares the grid config and follows"""
+        def resize():
+            self.grid.resize(rows, columns)
+            self.matrix = []
+            self.solutions = []
+            if self.template_scale is not None:
+                self.reset_template_scale()
+
+        if self.is_auto_solving or not self.jobs.run_if_idle(resize):
+            self.log("Cannot change grid size while a scan or auto-solve is running or queued")
+            return False
+        self.push_overlay([])
+        self.log(f"Grid size set to {self.rows}x{self.columns}")
+        return True
+
+    def set_rules(self, target, min_count):
+        """Switch the target sum and fewest numbers per move (event variants)"""
+        def switch():
+            self.rules = MoveRules(target, min_count)
+            self.endgame.target = target
+            self.endgame.min_count = min_count
+            self.solutions = []
+
+        if self.is_auto_solving or not self.jobs.run_if_idle(switch):
+            self.log("Cannot change move rules while a scan or auto-solve is running or queued")
+            return False
+        self.log(f"Moves must now clear at least {min_count} numbers summing to {target}")
+        return True
+
+    # Geometry lives in the shared GridConfig
+    @property
+    def rows(self):
+        return self.grid.rows
+
+    @property
+    def columns(self):
+        return self.grid.columns
+
+    @property
+    def offset_x(self):
+        return self.grid.offset_x
+
+    @property
+    def offset_y(self):
+        return self.grid.offset_y
+
+    @property
+    def top_start(self):
+        return self.grid.top_start
+
+    @property
+    def left_start(self):
+        return self.grid.left_start
+
+    @property
+    def capture_area_w(self):
+        return self.grid.cell_w
+
+    @property
+    def capture_area_h(self):
+        return self.grid.cell_h
 
     @property
     def cell_w(self):
-        return self.capture_area_w
+        return self.grid.cell_w
 
     @property
     def cell_h(self):
-        return self.capture_area_h
+        return self.grid.cell_h
 
 
 def setup_hotkeys(solver):
-    keyboard.add_hotkey('f5', solver.get_matrix_numbers)
-    keyboard.add_hotkey('f1', solver.clean_matrix)
-    keyboard.add_hotkey('f2', solver.sums_right)
-    keyboard.add_hotkey('f3', solver.sums_down)
-    keyboard.add_hotkey('f4', solver.sums_square)
-    keyboard.add_hotkey('f6', solver.auto_solve)
-    
-    # F12 for cancel - with debug
-    def cancel_handler():
-        print("F12 PRESSED - CANCEL HANDLER CALLED")
-        solver.cancel_auto_solve()
-    
-    keyboard.add_hotkey('f12', cancel_handler)
+    # Scans and solves go through the solver's job worker, never the keyboard thread
+    keyboard.add_hotkey('f5', lambda: solver.request_scan())
+    keyboard.add_hotkey('f1', lambda: solver.request_edit("clean", solver.clean_matrix))
+    keyboard.add_hotkey('f2', lambda: solver.request_edit("sums_right", solver.sums_right))
+    keyboard.add_hotkey('f3', lambda: solver.request_edit("sums_down", solver.sums_down))
+    keyboard.add_hotkey('f4', lambda: solver.request_edit("sums_square", solver.sums_square))
+    keyboard.add_hotkey('f6', lambda: solver.request_auto_solve())
+    keyboard.add_hotkey('f7', lambda: solver.request_auto_solve(resume=True))
+    keyboard.add_hotkey('f12', solver.cancel_auto_solve)
     keyboard.add_hotkey("esc", lambda: QApplication.quit())
     
     print("Hotkeys registered successfully!")
@@ -1181,12 +1815,15 @@ def setup_hotkeys(solver):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
 
+    # One grid configuration shared by capture, recognition, solver and overlay
+    grid = GridConfig()
+
     # Create overlay
-    overlay = Overlay(16, 10, 708, 221, 51, 52, 44, 45)
+    overlay = Overlay(grid)
 
     # Create GUI and solver
     gui = ControlGUI()
-    solver = PuzzleSolver(overlay, gui)
+    solver = PuzzleSolver(overlay, gui, grid=grid)
     gui.set_solver(solver)
 
     # Setup hotkeys in a separate thread
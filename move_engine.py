@@ -0,0 +1,271 @@
+"""
+Move rules and the single move evaluator.
+
+MoveRules holds the variant's target sum and the least number of digits a
+move must clear (10 and 2 in the regular game, event variants differ).
+
+MoveBoard evaluates every move shape (right, down, squares down-right then
+up-right) the same way: a rectangle anchored at the start cell grows one
+step at a time until it is a move or its digits pass the target. A line
+adds one cell per step; a square adds its new edge row and edge column,
+whose totals come from per-row and per-column prefix sums instead of
+re-adding the whole square. Highlight markers left by the manual
+"Find ... Sums" buttons block a move like a wall.
+
+Digits are positive, so a rectangle's total only grows as it does and
+"over the target" already stops each candidate at the first step it can.
+
+A drag spans at least two cells, so a lone start cell is never a move.
+
+Run this module directly to time the evaluator against the cell-by-cell
+scan it replaced, for several rule sets:
+    python move_engine.py --boards 200
+"""
+import argparse
+import random
+import sys
+import time
+
+KINDS = ("right", "down", "square")
+MARKERS = frozenset(("→", "↓", "■", "□", "►", "▼"))
+BLOCKED = -1
+
+
+def board_value(value):
+    """Board cell as a digit, 0 for empty (drags pass through) or BLOCKED for a highlight marker"""
+    if isinstance(value, int) and 1 <= value <= 9:
+        return value
+    return BLOCKED if isinstance(value, str) and value in MARKERS else 0
+
+
+class MoveRules:
+    def __init__(self, target=10, min_count=2):
+        self.target = target
+        self.min_count = min_count
+
+    def __repr__(self):
+        return f"MoveRules(target={self.target}, min_count={self.min_count})"
+
+    def is_move(self, total, count):
+        return total == self.target and count >= self.min_count
+
+
+DEFAULT_RULES = MoveRules()
+
+
+class MoveBoard:
+    def __init__(self, matrix, rules=None):
+        self.rules = rules or DEFAULT_RULES
+        self.rows = len(matrix)
+        self.columns = len(matrix[0]) if matrix else 0
+        self.values = [[board_value(value) for value in row] for row in matrix]
+        self.transposed = [list(column) for column in zip(*self.values)]
+        # Prefix sums of digit totals, digit counts and blocked cells, per row and per column
+        self.row_prefix = [self._prefix(row) for row in self.values]
+        self.column_prefix = [self._prefix(column) for column in self.transposed]
+
+    @staticmethod
+    def _prefix(line):
+        total = count = marked = 0
+        totals, counts, blocked = [0], [0], [0]
+        for value in line:
+            if value > 0:
+                total += value
+                count += 1
+            elif value < 0:
+                marked += 1
+            totals.append(total)
+            counts.append(count)
+            blocked.append(marked)
+        return totals, counts, blocked
+
+    def set(self, r, c, value):
+        """Change one cell; returns True if its value changed"""
+        value = board_value(value)
+        if self.values[r][c] == value:
+            return False
+        self.values[r][c] = self.transposed[c][r] = value
+        self.row_prefix[r] = self._prefix(self.values[r])
+        self.column_prefix[c] = self._prefix(self.transposed[c])
+        return True
+
+    def moves(self):
+        """Every valid move: rights, downs, then squares, each row-major"""
+        found = []
+        for kind in KINDS:
+            for r in range(self.rows):
+                for c in range(self.columns):
+                    move, _ = self.evaluate(kind, r, c)
+                    if move is not None:
+                        found.append(move)
+        return found
+
+    def evaluate(self, kind, r, c):
+        """
+        The move of this kind starting at (r, c), or None, and the spans the
+        answer depends on: (dr, dc, size) for the rectangle from (r, c) grown
+        size steps by rows in direction dr and/or by columns while dc
+        """
+        if self.values[r][c] <= 0:
+            return None, [(0, 0, 0)]
+        if kind == "right":
+            return self._grow(kind, r, c, 0, 1)
+        if kind == "down":
+            return self._grow(kind, r, c, 1, 0)
+        move, reads = self._grow(kind, r, c, 1, 1)
+        if move is None:
+            move, up_reads = self._grow(kind, r, c, -1, 1)
+            reads += up_reads
+        return move, reads
+
+    def _grow(self, kind, r, c, dr, dc):
+        """Grow the rectangle from (r, c) one step at a time until it is a move or can no longer become one"""
+        rules = self.rules
+        target, min_count = rules.target, rules.min_count
+        if dr:
+            size_limit = self.rows - 1 - r if dr > 0 else r
+            if dc:
+                size_limit = min(size_limit, self.columns - 1 - c)
+        else:
+            size_limit = self.columns - 1 - c
+        if size_limit <= 0:
+            return None, [(0, 0, 0)]
+        total, count = self.values[r][c], 1
+
+        if not (dr and dc):
+            # Lines add one cell per step
+            line, first = (self.values[r], c) if dc else (self.transposed[c], r)
+            for size in range(1, size_limit + 1):
+                value = line[first + size]
+                if value > 0:
+                    total += value
+                    count += 1
+                elif value < 0:
+                    return None, [(dr, dc, size)]
+                elif total != target:
+                    continue
+                if total == target and count >= min_count:
+                    return (kind, r, c, r + dr * size, c + dc * size), [(dr, dc, size)]
+                if total > target:
+                    return None, [(dr, dc, size)]
+            return None, [(dr, dc, size_limit)]
+
+        # Squares add a new edge row and the new edge column beside the previous square
+        for size in range(1, size_limit + 1):
+            edge_r, edge_c = r + dr * size, c + dc * size
+            totals, counts, blocked = self.row_prefix[edge_r]
+            added_total = totals[edge_c + 1] - totals[c]
+            added_count = counts[edge_c + 1] - counts[c]
+            added_blocked = blocked[edge_c + 1] - blocked[c]
+            top, bottom = (r, edge_r - 1) if dr > 0 else (edge_r + 1, r)
+            totals, counts, blocked = self.column_prefix[edge_c]
+            added_total += totals[bottom + 1] - totals[top]
+            added_count += counts[bottom + 1] - counts[top]
+            if added_blocked or blocked[bottom + 1] != blocked[top]:
+                return None, [(dr, dc, size)]
+            if not added_count and total != target:
+                continue
+            total += added_total
+            count += added_count
+            if total == target and count >= min_count:
+                return (kind, r, c, edge_r, edge_c), [(dr, dc, size)]
+            if total > target:
+                return None, [(dr, dc, size)]
+        return None, [(dr, dc, size_limit)]
+
+
+def span_cells(r, c, spans):
+    """Cells of the rectangles evaluate() reports from (r, c)"""
+    cells = []
+    for dr, dc, size in spans:
+        if not dr:
+            cells += [(r, cc) for cc in range(c, c + size + 1)]
+        elif not dc:
+            cells += [(rr, c) for rr in range(r, r + size + 1)]
+        else:
+            columns = range(c, c + size + 1)
+            for rr in range(min(r, r + dr * size), max(r, r + dr * size) + 1):
+                cells += [(rr, cc) for cc in columns]
+    return cells
+
+
+def scan_moves(matrix, rules=None):
+    """Reference cell-by-cell scan (re-adds each square from scratch), as the solver used to"""
+    rules = rules or DEFAULT_RULES
+    values = [[board_value(value) for value in row] for row in matrix]
+    rows, columns = len(values), len(values[0]) if values else 0
+
+    def grow(kind, r, c, dr, dc):
+        size = 1
+        while 0 <= r + dr * size < rows and c + dc * size < columns and (dr or dc):
+            edge_r, edge_c = r + dr * size, c + dc * size
+            total = count = 0
+            for rr in range(min(r, edge_r), max(r, edge_r) + 1):
+                for cc in range(c, edge_c + 1):
+                    if values[rr][cc] < 0:
+                        return None
+                    if values[rr][cc]:
+                        total += values[rr][cc]
+                        count += 1
+            if rules.is_move(total, count):
+                return kind, r, c, edge_r, edge_c
+            if total > rules.target:
+                return None
+            size += 1
+        return None
+
+    found = []
+    for kind, dr, dc in (("right", 0, 1), ("down", 1, 0), ("square", 1, 1)):
+        for r in range(rows):
+            for c in range(columns):
+                if values[r][c] <= 0:
+                    continue
+                move = grow(kind, r, c, dr, dc)
+                if move is None and kind == "square":
+                    move = grow(kind, r, c, -1, 1)
+                if move is not None:
+                    found.append(move)
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time full-board move evaluation against the cell-by-cell scan")
+    parser.add_argument("--boards", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=16)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--rules", default="10:2,10:4,15:3", help="target:min_count rule sets to compare")
+    parser.add_argument("--fills", default="1.0,0.5,0.2,0.1", help="fractions of cells still holding a digit")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per method, best one counts")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    def best_of(method, boards):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            found = [method(board) for board in boards]
+            best = min(best, time.perf_counter() - start)
+        return found, best * 1000 / len(boards)
+
+    print(f"{args.boards} boards of {args.rows}x{args.cols} per fill, ms per board")
+    for spec in args.rules.split(","):
+        target, min_count = map(int, spec.split(":"))
+        rules = MoveRules(target, min_count)
+        print(f"\n{rules}")
+        print(f"{'fill':>6}{'scan':>9}{'engine':>9}{'speedup':>9}{'moves':>8}")
+        for fill in (float(f) for f in args.fills.split(",")):
+            rng = random.Random(args.seed)
+            boards = [[[rng.randint(1, 9) if rng.random() < fill else " " for _ in range(args.cols)]
+                       for _ in range(args.rows)] for _ in range(args.boards)]
+            scanned, scan_ms = best_of(lambda m: scan_moves(m, rules), boards)
+            found, engine_ms = best_of(lambda m: MoveBoard(m, rules).moves(), boards)
+            if scanned != found:
+                print(f"ERROR: engine and scan disagree at fill {fill}")
+                return 1
+            moves = sum(map(len, found)) / args.boards
+            print(f"{fill:>6.2f}{scan_ms:>9.3f}{engine_ms:>9.3f}{scan_ms / engine_ms:>8.2f}x{moves:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Live index of valid moves.
+
+Instead of rescanning every start cell after each drag, the index keeps one
+candidate per start cell and move type (right, down, square) together with
+the cells its evaluation read. Clearing or resyncing a cell re-evaluates only
+the candidates that read it, so an update costs the same on a 16x10 board as
+on a 50x50 one. Candidates are evaluated by move_engine.MoveBoard under the
+index's MoveRules; results match MoveBoard.moves() on the same board, in
+the same order.
+"""
+from collections import defaultdict
+
+from move_engine import KINDS, MoveBoard, span_cells
+
+
+class MoveIndex:
+    def __init__(self, matrix, rules=None):
+        self.engine = MoveBoard(matrix, rules)
+        self.rules = self.engine.rules
+        self.rows = self.engine.rows
+        self.columns = self.engine.columns
+
+        self.valid = {}                      # (kind, r, c) -> move tuple
+        self.reads = {}                      # (kind, r, c) -> cells its evaluation read
+        self.dependents = defaultdict(set)   # cell -> candidate keys that read it
+
+        for kind in KINDS:
+            for r in range(self.rows):
+                for c in range(self.columns):
+                    self._evaluate((kind, r, c))
+
+    def moves(self):
+        """Valid moves in MoveBoard.moves() order: rights, downs, then squares, row-major"""
+        order = {kind: i for i, kind in enumerate(KINDS)}
+        return [self.valid[key] for key in sorted(self.valid, key=lambda k: (order[k[0]], k[1], k[2]))]
+
+    def clear(self, cells):
+        """Mark cells empty and refresh the moves depending on them"""
+        self.update({cell: 0 for cell in cells})
+
+    def update(self, changes):
+        """Apply {(r, c): value} changes and re-evaluate only the affected candidates"""
+        affected = set()
+        for (r, c), value in changes.items():
+            if self.engine.set(r, c, value):
+                affected |= self.dependents[(r, c)]
+        for key in affected:
+            self._evaluate(key)
+        return len(affected)
+
+    def _evaluate(self, key):
+        dependents = self.dependents
+        for cell in self.reads.get(key, ()):
+            dependents[cell].discard(key)
+
+        kind, r, c = key
+        move, spans = self.engine.evaluate(kind, r, c)
+        reads = self.reads[key] = span_cells(r, c, spans)
+        for cell in reads:
+            dependents[cell].add(key)
+        if move is None:
+            self.valid.pop(key, None)
+        else:
+            self.valid[key] = move
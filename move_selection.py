@@ -0,0 +1,243 @@
+"""
+Non-overlapping move selection for one auto-solve iteration.
+
+Taking moves first-come and skipping any that touch a used cell lets an
+early small move block two larger ones that don't overlap each other.
+BatchSelector builds a conflict graph over the iteration's moves (an edge
+wherever two moves would clear the same digit) and looks for the
+maximum-weight independent set, weighted by digits cleared. Each connected
+component is solved on its own: greedy plus local search always, then an
+exact branch and bound when the component is small enough. The exact search
+checks a deadline and keeps the local-search answer if it runs out of time.
+
+Moves that only share empty cells do not conflict: clearing one leaves the
+other's digits, and so its sum, unchanged.
+
+Run this module directly to compare it with first-come selection:
+    python move_selection.py --boards 100
+"""
+import argparse
+import random
+import sys
+import time
+
+
+class SelectionTimeout(Exception):
+    pass
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BatchSelector:
+    def __init__(self, exact_limit=40, time_limit=0.02):
+        self.exact_limit = exact_limit  # Largest component solved exactly
+        self.time_limit = time_limit    # Seconds for the exact searches of one batch
+        self.last_stats = {}
+
+    def select(self, items):
+        """
+        items are (move, digit cells) pairs. Returns the chosen pairs, in
+        their original order, clearing as many digits as possible without
+        two moves sharing a digit.
+        """
+        start = time.perf_counter()
+        deadline = start + self.time_limit
+        weights = [len(cells) for move, cells in items]
+
+        adjacency = [0] * len(items)
+        by_cell = {}
+        for i, (move, cells) in enumerate(items):
+            for cell in cells:
+                for j in by_cell.setdefault(cell, []):
+                    adjacency[i] |= 1 << j
+                    adjacency[j] |= 1 << i
+                by_cell[cell].append(i)
+
+        chosen = []
+        stats = {"moves": len(items), "components": 0, "exact": 0, "timed_out": 0}
+        for component in self._components(adjacency):
+            stats["components"] += 1
+            if len(component) == 1:
+                chosen.extend(component)
+                continue
+            local = {vertex: i for i, vertex in enumerate(component)}
+            adj = [0] * len(component)
+            for vertex, i in local.items():
+                for neighbour in _bits(adjacency[vertex]):
+                    adj[i] |= 1 << local[neighbour]
+            w = [weights[vertex] for vertex in component]
+
+            best = self._local_search(adj, w, self._greedy(adj, w))
+            if len(component) <= self.exact_limit:
+                try:
+                    best = self._exact(adj, w, best, deadline)
+                    stats["exact"] += 1
+                except SelectionTimeout:
+                    stats["timed_out"] += 1
+            chosen.extend(component[i] for i in _bits(best))
+
+        chosen.sort()
+        stats["cleared"] = sum(weights[i] for i in chosen)
+        stats["time"] = time.perf_counter() - start
+        self.last_stats = stats
+        return [items[i] for i in chosen]
+
+    @staticmethod
+    def _components(adjacency):
+        seen = 0
+        components = []
+        for vertex in range(len(adjacency)):
+            if seen >> vertex & 1:
+                continue
+            members = frontier = 1 << vertex
+            while frontier:
+                reached = 0
+                for i in _bits(frontier):
+                    reached |= adjacency[i]
+                frontier = reached & ~members
+                members |= frontier
+            seen |= members
+            components.append(list(_bits(members)))
+        return components
+
+    @staticmethod
+    def _weight(mask, w):
+        return sum(w[i] for i in _bits(mask))
+
+    @staticmethod
+    def _greedy(adj, w, candidates=None):
+        """Repeatedly take the move with the best weight / (conflicts + 1)"""
+        left = (1 << len(adj)) - 1 if candidates is None else candidates
+        solution = 0
+        while left:
+            pick = max(_bits(left), key=lambda i: (w[i] / (bin(adj[i] & left).count("1") + 1), -i))
+            solution |= 1 << pick
+            left &= ~(adj[pick] | 1 << pick)
+        return solution
+
+    def _fill(self, adj, w, solution):
+        """Add every move that no longer conflicts with the solution"""
+        free = 0
+        for i in range(len(adj)):
+            if not solution >> i & 1 and not adj[i] & solution:
+                free |= 1 << i
+        return solution | self._greedy(adj, w, free) if free else solution
+
+    def _local_search(self, adj, w, solution):
+        """
+        Improving swaps until none is left: add a move and drop the lighter
+        chosen moves it conflicts with, or drop one chosen move for a
+        heavier set of moves that only conflicted with it
+        """
+        everything = (1 << len(adj)) - 1
+        improved = True
+        while improved:
+            improved = False
+            for v in _bits(everything & ~solution):
+                conflicts = adj[v] & solution
+                if w[v] > self._weight(conflicts, w):
+                    solution = self._fill(adj, w, (solution & ~conflicts) | 1 << v)
+                    improved = True
+            for u in _bits(solution):
+                tight = 0
+                for v in _bits(adj[u] & ~solution):
+                    if adj[v] & solution == 1 << u:
+                        tight |= 1 << v
+                if not tight:
+                    continue
+                replacement = self._greedy(adj, w, tight)
+                if self._weight(replacement, w) > w[u]:
+                    solution = self._fill(adj, w, (solution & ~(1 << u)) | replacement)
+                    improved = True
+                    break
+        return solution
+
+    def _exact(self, adj, w, best, deadline):
+        """Branch and bound on the highest-conflict move, starting from a known solution"""
+        best_value = self._weight(best, w)
+        nodes = 0
+
+        def branch(candidates, value, solution):
+            nonlocal best, best_value, nodes
+            nodes += 1
+            if nodes & 255 == 0 and time.perf_counter() > deadline:
+                raise SelectionTimeout()
+            bound = value + self._weight(candidates, w)
+            if bound <= best_value:
+                return
+            pick, degree = -1, 0
+            for i in _bits(candidates):
+                d = bin(adj[i] & candidates).count("1")
+                if d > degree:
+                    pick, degree = i, d
+            if pick < 0:
+                # No conflicts left: take them all
+                best, best_value = solution | candidates, bound
+                return
+            branch(candidates & ~(adj[pick] | 1 << pick), value + w[pick], solution | 1 << pick)
+            branch(candidates & ~(1 << pick), value, solution)
+
+        branch((1 << len(adj)) - 1, 0, 0)
+        return best
+
+
+def move_cells(move):
+    """Cells covered by a (type, start_r, start_c, end_r, end_c) move"""
+    sol_type, start_r, start_c, end_r, end_c = move
+    return {(r, c) for r in range(min(start_r, end_r), max(start_r, end_r) + 1)
+            for c in range(start_c, end_c + 1)}
+
+
+def first_come(items):
+    """The old selection: moves in order, skipping any that touch a used cell"""
+    used = set()
+    batch = []
+    for move, cells in items:
+        covered = move_cells(move)
+        if covered & used:
+            continue
+        used |= covered
+        batch.append((move, cells))
+    return batch
+
+
+def main(argv=None):
+    from move_index import MoveIndex
+
+    parser = argparse.ArgumentParser(description="Compare batch selection with first-come selection")
+    parser.add_argument("--boards", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=16)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--time-limit", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    selector = BatchSelector(time_limit=args.time_limit)
+    greedy_total = selected_total = timeouts = 0
+    latencies = []
+    for i in range(args.boards):
+        rng = random.Random(args.seed + i)
+        matrix = [[rng.randint(1, 9) for _ in range(args.cols)] for _ in range(args.rows)]
+        items = [(move, {(r, c) for r, c in move_cells(move) if isinstance(matrix[r][c], int)})
+                 for move in MoveIndex(matrix).moves()]
+        greedy_total += sum(len(cells) for move, cells in first_come(items))
+        selected_total += sum(len(cells) for move, cells in selector.select(items))
+        latencies.append(selector.last_stats["time"])
+        timeouts += selector.last_stats["timed_out"] > 0
+
+    latencies.sort()
+    print(f"{args.boards} boards ({args.rows}x{args.cols}), first batch of each")
+    print(f"digits per batch: first-come {greedy_total / args.boards:.2f}, "
+          f"selected {selected_total / args.boards:.2f}")
+    print(f"selection median {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"worst {latencies[-1] * 1000:.2f} ms, boards with an exact search timeout {timeouts}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
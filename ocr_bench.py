@@ -0,0 +1,311 @@
+"""
+OCR accuracy and throughput benchmark
+
+Builds a labelled corpus of cell crops and full grid images from
+templates/T*.png with controlled distortions (noise, sub-pixel shifts,
+brightness/contrast, scaling, empty-cell backgrounds), runs a recognizer over
+it and reports cells per second, the confusion matrix and the empty-cell
+false-positive rate. Runs headless; results are saved as JSON so versions can
+be compared.
+
+Recognizers are named in RECOGNIZERS or given as "module:function". A cell
+recognizer takes an (N, h, w) uint8 array of crops and returns N labels
+(0 = empty); a grid recognizer (name ending in "grid") takes one full grid
+image and a GridConfig and returns a rows x columns label array. Either may
+also return a confidence array alongside the labels, as (labels, confidence);
+the report then shows how many digit reads fall under the uncertainty
+threshold and how many misreads those catch.
+
+Usage:
+    python ocr_bench.py build --out corpus.npz
+    python ocr_bench.py run --corpus corpus.npz --recognizer solver-grid --save results/v2.json
+    python ocr_bench.py compare results/v1.json results/v2.json
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from grid_config import GridConfig
+from template_bank import TemplateBank
+
+LABELS = list(range(10))  # 0 = empty, 1-9 = digits
+
+
+def load_base_templates():
+    bank = TemplateBank()
+    bank.load()
+    return bank.templates_at(1.0)
+
+
+def render_cell(rng, label, templates, cell_h, cell_w, params):
+    """One distorted cell crop; params sets the distortion ranges"""
+    background = rng.uniform(*params["background"])
+    cell = np.full((cell_h, cell_w), background, dtype=np.float32)
+
+    # Empty cells get a faint gradient so they aren't trivially uniform
+    gradient = rng.uniform(-params["gradient"], params["gradient"])
+    cell += np.linspace(0, gradient, cell_w, dtype=np.float32)[None, :]
+
+    if label:
+        template = templates[label].astype(np.float32)
+        scale = rng.uniform(*params["scale"])
+        template = cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+        th, tw = template.shape
+        # Sub-pixel placement around the cell center
+        dx = (cell_w - tw) / 2 + rng.uniform(-params["shift"], params["shift"])
+        dy = (cell_h - th) / 2 + rng.uniform(-params["shift"], params["shift"])
+        matrix = np.float32([[1, 0, dx], [0, 1, dy]])
+        digit = cv2.warpAffine(template, matrix, (cell_w, cell_h), flags=cv2.INTER_LINEAR,
+                               borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+        cell = np.maximum(cell, digit)
+
+    contrast = rng.uniform(*params["contrast"])
+    brightness = rng.uniform(*params["brightness"])
+    cell = (cell - 128) * contrast + 128 + brightness
+    cell += rng.normal(0, rng.uniform(*params["noise"]), cell.shape)
+    return np.clip(cell, 0, 255).astype(np.uint8)
+
+
+DEFAULT_PARAMS = {
+    "background": (25, 70),
+    "gradient": 10,
+    "scale": (0.92, 1.08),
+    "shift": 3.0,
+    "contrast": (0.75, 1.25),
+    "brightness": (-25, 25),
+    "noise": (0, 8),
+    "empty_fraction": 0.15,
+}
+
+
+def build_corpus(cells=5000, grids=20, seed=0, grid=None, params=None):
+    """Labelled cell crops plus full grid images built from the same distortions"""
+    grid = grid or GridConfig()
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    rng = np.random.default_rng(seed)
+    templates = load_base_templates()
+
+    def random_label():
+        return 0 if rng.random() < params["empty_fraction"] else int(rng.integers(1, 10))
+
+    cell_labels = np.array([random_label() for _ in range(cells)], dtype=np.int8)
+    cell_images = np.stack([render_cell(rng, int(label), templates, grid.cell_h, grid.cell_w, params)
+                            for label in cell_labels])
+
+    height = (grid.rows - 1) * grid.offset_y + grid.cell_h
+    width = (grid.columns - 1) * grid.offset_x + grid.cell_w
+    grid_images = np.zeros((grids, height, width), dtype=np.uint8)
+    grid_labels = np.zeros((grids, grid.rows, grid.columns), dtype=np.int8)
+    for g in range(grids):
+        grid_images[g] = int(rng.uniform(*params["background"]))
+        for r in range(grid.rows):
+            for c in range(grid.columns):
+                label = random_label()
+                grid_labels[g, r, c] = label
+                y, x = r * grid.offset_y, c * grid.offset_x
+                grid_images[g, y:y + grid.cell_h, x:x + grid.cell_w] = render_cell(
+                    rng, label, templates, grid.cell_h, grid.cell_w, params)
+
+    return {
+        "cell_images": cell_images,
+        "cell_labels": cell_labels,
+        "grid_images": grid_images,
+        "grid_labels": grid_labels,
+        "geometry": np.array([grid.rows, grid.columns, grid.offset_x, grid.offset_y, grid.cell_w, grid.cell_h]),
+        "params": np.array(json.dumps({"seed": seed, **params})),
+    }
+
+
+def save_corpus(corpus, path):
+    np.savez_compressed(path, **corpus)
+
+
+def load_corpus(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def corpus_grid(corpus):
+    rows, columns, offset_x, offset_y, cell_w, cell_h = (int(v) for v in corpus["geometry"])
+    return GridConfig(rows, columns, 0, 0, offset_x, offset_y, cell_w, cell_h)
+
+
+# Built-in recognizers wrap the solver's own recognition code
+_solver = None
+
+
+def _get_solver():
+    global _solver
+    if _solver is None:
+        from main import PuzzleSolver
+        _solver = PuzzleSolver()
+        _solver.log = lambda message: None
+    return _solver
+
+
+def solver_cell_recognizer(cell_images):
+    """PuzzleSolver blank check and match_cell, one crop at a time, with margins"""
+    solver = _get_solver()
+    labels = np.zeros(len(cell_images), dtype=np.int8)
+    confidence = np.ones(len(cell_images), dtype=np.float32)
+    for i, cell in enumerate(cell_images):
+        if not solver.is_blank_cell(cell):
+            labels[i], _, confidence[i] = solver.match_cell(cell)
+    return labels, confidence
+
+
+def solver_grid_recognizer(grid_image, grid):
+    """PuzzleSolver.recognize_grid on a whole grid capture"""
+    solver = _get_solver()
+    solver.grid = grid
+    digits, _, confidence = solver.recognize_grid(grid_image)
+    return digits, confidence
+
+
+RECOGNIZERS = {
+    "solver-cell": solver_cell_recognizer,
+    "solver-grid": solver_grid_recognizer,
+}
+
+
+def resolve_recognizer(name):
+    if name in RECOGNIZERS:
+        return RECOGNIZERS[name]
+    module_name, _, function_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def evaluate(corpus, recognizer_name, min_confidence=None):
+    """Run a recognizer over the corpus and return the metrics report"""
+    recognizer = resolve_recognizer(recognizer_name)
+    if recognizer_name.endswith("grid"):
+        grid = corpus_grid(corpus)
+        expected = corpus["grid_labels"].reshape(-1)
+        start = time.perf_counter()
+        results = [recognizer(image, grid) for image in corpus["grid_images"]]
+        elapsed = time.perf_counter() - start
+    else:
+        expected = corpus["cell_labels"]
+        start = time.perf_counter()
+        results = [recognizer(corpus["cell_images"])]
+        elapsed = time.perf_counter() - start
+    confidence = None
+    if all(isinstance(result, tuple) for result in results):
+        confidence = np.concatenate([np.asarray(result[1]).reshape(-1) for result in results])
+        results = [result[0] for result in results]
+    predicted = np.concatenate([np.asarray(result).reshape(-1) for result in results])
+
+    confusion = np.zeros((10, 10), dtype=np.int64)
+    np.add.at(confusion, (expected.astype(int), predicted.astype(int)), 1)
+
+    empties = confusion[0].sum()
+    digits = confusion[1:].sum()
+    report = {
+        "recognizer": recognizer_name,
+        "cells": int(expected.size),
+        "seconds": elapsed,
+        "cells_per_second": expected.size / elapsed if elapsed else float("inf"),
+        "accuracy": float(np.trace(confusion) / confusion.sum()),
+        "empty_false_positive_rate": float((empties - confusion[0, 0]) / empties) if empties else 0.0,
+        "digit_missed_rate": float(confusion[1:, 0].sum() / digits) if digits else 0.0,
+        "confusion": confusion.tolist(),
+    }
+    if confidence is not None:
+        if min_confidence is None:
+            min_confidence = _get_solver().min_confidence
+        read_digits = predicted > 0
+        misread = read_digits & (predicted != expected)
+        flagged = read_digits & (confidence < min_confidence)
+        report.update({
+            "min_confidence": min_confidence,
+            "uncertain_rate": float(flagged.sum() / read_digits.sum()) if read_digits.any() else 0.0,
+            "misreads": int(misread.sum()),
+            "misreads_flagged": int((misread & flagged).sum()),
+        })
+    return report
+
+
+def print_report(report):
+    print(f"\n=== {report['recognizer']}: {report['cells']} cells ===")
+    print(f"throughput      {report['cells_per_second']:.0f} cells/s ({report['seconds']:.2f}s)")
+    print(f"accuracy        {report['accuracy']:.2%}")
+    print(f"empty FP rate   {report['empty_false_positive_rate']:.2%}  (empty read as a digit)")
+    print(f"digit miss rate {report['digit_missed_rate']:.2%}  (digit read as empty)")
+    if "uncertain_rate" in report:
+        print(f"uncertain       {report['uncertain_rate']:.2%} of digit reads (margin < {report['min_confidence']}), "
+              f"catching {report['misreads_flagged']}/{report['misreads']} misreads")
+    print("\nconfusion (rows = truth, cols = predicted, 0 = empty)")
+    print("     " + "".join(f"{label:>6}" for label in LABELS))
+    for label, row in zip(LABELS, report["confusion"]):
+        print(f"{label:>5}" + "".join(f"{count:>6}" for count in row))
+
+
+def compare(paths):
+    reports = []
+    for path in paths:
+        with open(path) as f:
+            reports.append(json.load(f))
+    print(f"{'result':<30}{'label':<16}{'cells/s':>10}{'accuracy':>10}{'empty FP':>10}{'missed':>9}")
+    for path, report in zip(paths, reports):
+        print(f"{os.path.basename(path):<30}{report.get('label', ''):<16}{report['cells_per_second']:>10.0f}"
+              f"{report['accuracy']:>10.2%}{report['empty_false_positive_rate']:>10.2%}"
+              f"{report['digit_missed_rate']:>9.2%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR accuracy and throughput benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="generate a labelled corpus")
+    build.add_argument("--out", default="ocr_corpus.npz")
+    build.add_argument("--cells", type=int, default=5000)
+    build.add_argument("--grids", type=int, default=20)
+    build.add_argument("--seed", type=int, default=0)
+
+    run = sub.add_parser("run", help="run a recognizer over a corpus")
+    run.add_argument("--corpus", default="ocr_corpus.npz")
+    run.add_argument("--recognizer", default="solver-grid",
+                     help=f"one of {', '.join(RECOGNIZERS)} or module:function")
+    run.add_argument("--label", default="", help="version label stored with the results")
+    run.add_argument("--save", help="write the report as JSON to this path")
+    run.add_argument("--min-confidence", type=float,
+                     help="uncertainty margin for the solver recognizers (default: the solver's own)")
+
+    cmp_parser = sub.add_parser("compare", help="compare saved results")
+    cmp_parser.add_argument("results", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        corpus = build_corpus(args.cells, args.grids, args.seed)
+        save_corpus(corpus, args.out)
+        print(f"Corpus written to {args.out}: {args.cells} cells, {args.grids} grids")
+    elif args.command == "run":
+        if not os.path.exists(args.corpus):
+            print(f"Corpus {args.corpus} not found, building it with default settings")
+            save_corpus(build_corpus(), args.corpus)
+        if args.min_confidence is not None:
+            _get_solver().min_confidence = args.min_confidence
+        report = evaluate(load_corpus(args.corpus), args.recognizer, args.min_confidence)
+        report.update(label=args.label, corpus=os.path.abspath(args.corpus),
+                      python=platform.python_version(), opencv=cv2.__version__,
+                      created=time.strftime("%Y-%m-%d %H:%M:%S"))
+        print_report(report)
+        if args.save:
+            os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+            with open(args.save, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResults written to {args.save}")
+    else:
+        compare(args.results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Profiling hooks for real solve runs.
+
+auto_solve runs on a background thread started from a button or hotkey,
+which a profiler attached to the main thread never sees. install() wraps
+a solver's auto_solve and get_matrix_numbers so each call profiles the
+thread that runs it, and writes per-run artifacts:
+
+    <time>_<call>_<rows>x<columns>_<moves>moves.prof        cProfile stats (deterministic mode)
+    <time>_<call>_<rows>x<columns>_<moves>moves.collapsed   sampled stacks, one "a;b;c count" line each,
+                                                            for flamegraph.pl, speedscope or inferno
+    <time>_<call>_<rows>x<columns>_<moves>moves.json        run tags and timings
+
+Enable with SUM10_PROFILE=cprofile (deterministic, plus stack samples) or
+SUM10_PROFILE=sample (stack samples only, lower overhead), or from the GUI.
+SUM10_PROFILE_DIR overrides the output folder. When profiling is off
+nothing is wrapped, so the solver's methods are the plain ones.
+"""
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from app_paths import app_data_path
+
+PROFILE_ENV = "SUM10_PROFILE"
+PROFILE_DIR_ENV = "SUM10_PROFILE_DIR"
+MODES = ("cprofile", "sample")
+PROFILED_METHODS = ("auto_solve", "get_matrix_numbers")
+
+_active = threading.local()  # Set while a profiled call runs on this thread
+
+
+def mode_from_env():
+    """Profiling mode requested by the environment, or None"""
+    mode = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if mode in ("1", "true", "on", "yes"):
+        return "cprofile"
+    return mode if mode in MODES else None
+
+
+def default_output_dir():
+    return os.environ.get(PROFILE_DIR_ENV) or app_data_path("profiles")
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval and counts collapsed stacks"""
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _write_artifacts(solver, name, mode, profiler, sampler, elapsed, out_dir):
+    moves = getattr(solver, "moves_executed", 0) if name == "auto_solve" else 0
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+    base = os.path.join(out_dir, f"{stamp}_{name}_{solver.rows}x{solver.columns}_{moves}moves")
+    os.makedirs(out_dir, exist_ok=True)
+
+    if profiler is not None:
+        profiler.dump_stats(base + ".prof")
+    sampler.write_collapsed(base + ".collapsed")
+    with open(base + ".json", "w") as f:
+        json.dump({
+            "call": name,
+            "mode": mode,
+            "rows": solver.rows,
+            "columns": solver.columns,
+            "moves": moves,
+            "seconds": elapsed,
+            "samples": sampler.samples,
+            "sample_interval": sampler.interval,
+            "thread": threading.current_thread().name,
+        }, f, indent=2)
+    return base
+
+
+def _profiled(solver, name, method, mode, out_dir, interval):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        # get_matrix_numbers inside auto_solve is already covered by the outer profile
+        if getattr(_active, "running", False):
+            return method(*args, **kwargs)
+
+        _active.running = True
+        profiler = cProfile.Profile() if mode == "cprofile" else None
+        sampler = StackSampler(threading.get_ident(), interval)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            return method(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+            sampler.stop()
+            _active.running = False
+            try:
+                base = _write_artifacts(solver, name, mode, profiler, sampler, elapsed, out_dir)
+                solver.log(f"Profile written: {base}.*")
+            except OSError as e:
+                solver.log(f"Could not write profile: {e}")
+
+    wrapper.profiling_wrapper = True
+    return wrapper
+
+
+def install(solver, mode=None, out_dir=None, interval=0.002):
+    """
+    Wrap the solver's entry points in profilers when mode (default: from the
+    environment) is set; otherwise leave the solver untouched.
+    Returns the mode in effect.
+    """
+    mode = mode or mode_from_env()
+    uninstall(solver)
+    if mode is None:
+        return None
+    if mode not in MODES:
+        raise ValueError(f"unknown profiling mode {mode!r}, expected one of {MODES}")
+    out_dir = out_dir or default_output_dir()
+    for name in PROFILED_METHODS:
+        method = getattr(solver, name)
+        setattr(solver, name, _profiled(solver, name, method, mode, out_dir, interval))
+    solver.log(f"Profiling {', '.join(PROFILED_METHODS)} ({mode}), output in {out_dir}")
+    return mode
+
+
+def uninstall(solver):
+    """Remove profiling wrappers, restoring the plain methods"""
+    for name in PROFILED_METHODS:
+        if getattr(solver.__dict__.get(name), "profiling_wrapper", False):
+            del solver.__dict__[name]
@@ -0,0 +1,462 @@
+"""
+Multi-instance solving across several game windows.
+
+SessionManager finds every game window and gives each one a SolveSession
+with its own grid geometry, capture region and solver state, then plays
+them all at once:
+
+- scanning, verifying and planning run on a shared worker pool, so one
+  instance recognizes its board while another is being dragged;
+- every drag goes through one InputScheduler thread, the only code that
+  touches the mouse. It takes drags round-robin across instances and skips
+  an instance while its last drag is still settling, so the settle time of
+  one window is spent dragging in another.
+
+Geometry comes from a per-title profile if one is given, otherwise the
+standard 1920x1080 layout is scaled into the window's client area (the
+solver then locks the matching template scale on its first scan).
+
+Usage:
+    python sessions.py                       # every NIKKE window on this machine
+    python sessions.py --fake 3 --time-scale 0.1   # three simulated windows, on any OS
+    python sessions.py --fake 2 --fill 0.1         # late-game boards, played with endgame plans
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from grid_config import GridConfig
+from input_backend import default_backend as default_input_backend, drag_path
+from move_index import MoveIndex
+from window_backend import GameWindow, FakeWindowBackend, default_backend as default_window_backend
+
+REFERENCE_SIZE = (1920, 1080)  # Client size the default GridConfig was measured at
+
+
+def profile_for_window(window, base=None, reference=REFERENCE_SIZE):
+    """
+    GridConfig for a game window: the base geometry scaled to the window's
+    client area, letterboxed like the game keeps its aspect ratio
+    """
+    base = base or GridConfig()
+    left, top, right, bottom = window.rect
+    width, height = right - left, bottom - top
+    scale = min(width / reference[0], height / reference[1])
+    pad_x = (width - reference[0] * scale) / 2
+    pad_y = (height - reference[1] * scale) / 2
+    return GridConfig(
+        base.rows, base.columns,
+        left_start=round(left + pad_x + base.left_start * scale),
+        top_start=round(top + pad_y + base.top_start * scale),
+        offset_x=round(base.offset_x * scale),
+        offset_y=round(base.offset_y * scale),
+        cell_w=round(base.cell_w * scale),
+        cell_h=round(base.cell_h * scale),
+    )
+
+
+class InputScheduler:
+    """
+    Single thread that owns the mouse. Drags are queued per instance and
+    taken round-robin; an instance is skipped until its previous drag has
+    settled, and its window is focused whenever the scheduler switches to it.
+    """
+
+    def __init__(self, backend, window_backend=None, steps=4, step_interval=0.015,
+                 press_delay=0.1, settle=0.2, focus_delay=0.05, pause=0.05, clock=time.monotonic):
+        self.backend = backend
+        self.windows = window_backend
+        self.steps = steps
+        self.step_interval = step_interval
+        self.press_delay = press_delay
+        self.settle = settle
+        self.focus_delay = focus_delay
+        self.pause = pause  # Around press and release, like perform_drag
+        self.clock = clock
+
+        self.queues = {}      # key -> deque of (hwnd, start, end, future)
+        self.ready_at = {}    # key -> clock time its last drag has settled
+        self.turn = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+        self.last_hwnd = None
+
+        self.drags = 0
+        self.focus_switches = 0
+        self.busy_time = 0.0  # Seconds spent actually dragging
+
+    def submit(self, key, hwnd, start, end):
+        """Queue a drag for one instance; the future resolves when it is released"""
+        future = Future()
+        with self.condition:
+            if self.stopped:
+                future.cancel()
+                return future
+            self.queues.setdefault(key, deque()).append((hwnd, start, end, future))
+            self.condition.notify()
+        return future
+
+    def start(self):
+        with self.condition:
+            self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="input-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop after the current drag; queued drags are cancelled"""
+        with self.condition:
+            self.stopped = True
+            queued = [job for queue in self.queues.values() for job in queue]
+            for queue in self.queues.values():
+                queue.clear()
+            self.condition.notify_all()
+        for job in queued:
+            job[3].cancel()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+        self.thread = None
+
+    def _next_job(self):
+        """Next (key, job) in round-robin order among settled instances, or the wait until one settles"""
+        keys = [key for key, queue in self.queues.items() if queue]
+        if not keys:
+            return None, None
+        now = self.clock()
+        keys.sort()
+        ordered = [key for key in keys if key >= self.turn] + [key for key in keys if key < self.turn]
+        for key in ordered:
+            if self.ready_at.get(key, 0.0) <= now:
+                self.turn = key + 1
+                return key, self.queues[key].popleft()
+        return None, min(self.ready_at[key] for key in keys) - now
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if self.stopped:
+                        return
+                    key, job = self._next_job()
+                    if key is not None:
+                        break
+                    self.condition.wait(job)  # job is the wait time, None = until notified
+            hwnd, start, end, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                began = self.clock()
+                self._drag(hwnd, start, end)
+                self.busy_time += self.clock() - began
+                self.drags += 1
+                with self.condition:
+                    self.ready_at[key] = self.clock() + self.settle
+                future.set_result(True)
+            except Exception as e:
+                future.set_exception(e)
+
+    def _drag(self, hwnd, start, end):
+        if self.windows is not None and hwnd is not None and hwnd != self.last_hwnd:
+            self.windows.focus(hwnd)
+            self.focus_switches += 1
+            self.last_hwnd = hwnd
+            self.backend.sleep(self.focus_delay)
+
+        self.backend.move(*start)
+        self.backend.sleep(self.pause)
+        self.backend.press()
+        self.backend.sleep(self.press_delay)
+        for x, y in drag_path(start, end, self.steps):
+            self.backend.move(x, y)
+            self.backend.sleep(self.step_interval)
+        self.backend.sleep(self.pause)
+        self.backend.release()
+
+
+class SolveSession:
+    """One game window: its geometry, solver and progress"""
+
+    def __init__(self, index, window, grid, solver):
+        self.index = index
+        self.window = window
+        self.grid = grid
+        self.solver = solver
+        self.move_index = None
+        self.last_batch = []
+        self.pending_plan = deque()  # Rest of a sequential endgame plan, one verified drag per round
+
+        self.status = "waiting"
+        self.error = None
+        self.rounds = 0
+        self.moves = 0
+        self.failed_moves = 0
+        self.stalled_rounds = 0  # Consecutive batches in which no drag registered
+        self.work_time = 0.0   # Scan, verify and plan time on the worker pool
+        self.done = threading.Event()
+
+    @property
+    def name(self):
+        return f"#{self.index + 1} {self.window.title or self.window.hwnd}"
+
+
+class SessionManager:
+    def __init__(self, window_backend=None, input_backend=None, grab=None, profiles=None,
+                 workers=None, endgame=True, max_stalled_rounds=3, verbose=False, log=print, **drag_settings):
+        self.windows = window_backend or default_window_backend()
+        self.input = input_backend or default_input_backend()
+        self.scheduler = InputScheduler(self.input, self.windows, **drag_settings)
+        self.grab = grab              # capture_area -> grayscale image; None = mss
+        self.profiles = profiles or {}  # window title -> GridConfig
+        self.workers = workers or os.cpu_count() or 1
+        self.endgame = endgame
+        self.max_stalled_rounds = max_stalled_rounds  # Give up on a window whose drags keep missing
+        self.verbose = verbose
+        self.log = log
+
+        self.sessions = []
+        self.pool = None
+        self.stop_event = threading.Event()
+        self.elapsed = 0.0
+
+    def discover(self):
+        """One session per game window found, numbered top to bottom, then left to right"""
+        windows = self.windows.find_windows() if self.windows is not None else []
+        windows = sorted(windows, key=lambda window: (window.rect[1], window.rect[0]))
+        self.sessions = [self._make_session(index, window) for index, window in enumerate(windows)]
+        self.log(f"Found {len(self.sessions)} game windows")
+        for session in self.sessions:
+            grid = session.grid
+            self.log(f"  {session.name}: {grid.rows}x{grid.columns} grid at ({grid.left_start},{grid.top_start}), "
+                     f"pitch {grid.offset_x}x{grid.offset_y}")
+        return self.sessions
+
+    def _make_session(self, index, window):
+        from main import PuzzleSolver
+        profile = self.profiles.get(window.title)
+        grid = profile.copy() if profile else profile_for_window(window)
+        solver = PuzzleSolver(grid=grid, input_backend=self.input, window_backend=self.windows, grab=self.grab)
+        solver.scan_workers = 1  # Instances already run in parallel on the pool
+        session = SolveSession(index, window, grid, solver)
+        solver.log = (lambda message: self.log(f"[{session.name}] {message}")) if self.verbose else (lambda message: None)
+        return session
+
+    def run(self, timeout=None):
+        """Solve every session's board; returns the sessions when all are finished"""
+        if not self.sessions:
+            self.discover()
+        if not self.sessions:
+            return []
+
+        self.stop_event.clear()
+        self.scheduler.start()
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="session")
+        start = time.perf_counter()
+        try:
+            for session in self.sessions:
+                self._schedule(session)
+            deadline = None if timeout is None else start + timeout
+            for session in self.sessions:
+                remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                if not session.done.wait(remaining):
+                    self.log("Timed out, stopping all sessions")
+                    self.stop()
+                    break
+        finally:
+            self.scheduler.stop()
+            self.pool.shutdown(wait=True)
+            self.elapsed = time.perf_counter() - start
+        return self.sessions
+
+    def stop(self):
+        self.stop_event.set()
+        self.scheduler.stop()
+
+    def _schedule(self, session):
+        try:
+            self.pool.submit(self._round, session)
+        except RuntimeError:  # Pool already shut down
+            self._finish(session, "stopped")
+
+    def _finish(self, session, status):
+        session.status = status
+        session.done.set()
+
+    def _round(self, session):
+        """Verify the last batch, plan the next one and hand its drags to the scheduler"""
+        try:
+            if self.stop_event.is_set():
+                return self._finish(session, "stopped")
+
+            began = time.perf_counter()
+            solver = session.solver
+            if session.move_index is None:
+                session.status = "scanning"
+                solver.get_matrix_numbers()
+                if not solver.matrix:
+                    return self._finish(session, "failed")
+                session.move_index = MoveIndex(solver.matrix, solver.rules)
+            elif session.last_batch:
+                session.status = "verifying"
+                if self._verify(session):
+                    session.stalled_rounds = 0
+                else:
+                    if session.pending_plan:
+                        # The rest of the plan assumed this move; plan again from the verified board
+                        solver.log(f"Endgame move missed, dropping the {len(session.pending_plan)} moves after it")
+                        session.pending_plan.clear()
+                    session.stalled_rounds += 1
+                    if session.stalled_rounds >= self.max_stalled_rounds:
+                        self.log(f"[{session.name}] no drag registered in {session.stalled_rounds} batches, giving up")
+                        return self._finish(session, "stalled")
+
+            session.status = "planning"
+            batch = self._plan(session)
+            session.work_time += time.perf_counter() - began
+            if not batch:
+                return self._finish(session, "solved" if not solver.count_numbers() else "stuck")
+
+            session.status = "dragging"
+            session.rounds += 1
+            session.last_batch = batch
+            outstanding = [len(batch)]
+            lock = threading.Lock()
+
+            def drag_done(future):
+                with lock:
+                    outstanding[0] -= 1
+                    last = outstanding[0] == 0
+                if last:
+                    self._schedule(session)
+
+            for move, cells in batch:
+                _, start_r, start_c, end_r, end_c = move
+                future = self.scheduler.submit(session.index, session.window.hwnd,
+                                               session.grid.cell_center(start_r, start_c),
+                                               session.grid.cell_center(end_r, end_c))
+                future.add_done_callback(drag_done)
+        except Exception as e:
+            session.error = e
+            self.log(f"[{session.name}] failed: {e}")
+            self._finish(session, "failed")
+
+    def _verify(self, session):
+        """
+        One capture of the grid after a batch: cells the batch should have
+        cleared are marked empty, or re-recognized if they still show a digit.
+        Returns the number of moves that registered.
+        """
+        solver = session.solver
+        cells = sorted({(r, c) for _, batch_cells in session.last_batch for r, c in batch_cells
+                        if isinstance(solver.matrix[r][c], int)})
+        deadline = time.time() + solver.verify_timeout
+        while True:
+            img_gray = solver.grab_gray(session.grid.capture_area())
+            remaining = [(r, c) for r, c in cells if not solver.is_blank_cell(solver.get_cell_image(img_gray, r, c))]
+            if not remaining or time.time() >= deadline:
+                break
+            time.sleep(0.05)
+
+        changes = {cell: " " for cell in cells}
+        for r, c in remaining:
+            changes[(r, c)] = solver.recognize_cell(solver.get_cell_image(img_gray, r, c))
+        for (r, c), value in changes.items():
+            solver.matrix[r][c] = value
+
+        failed = {move for move, batch_cells in session.last_batch if any(cell in batch_cells for cell in remaining)}
+        session.moves += len(session.last_batch) - len(failed)
+        session.failed_moves += len(failed)
+        session.move_index.update(changes)
+        cleared = len(session.last_batch) - len(failed)
+        session.last_batch = []
+        return cleared
+
+    def _plan(self, session):
+        solver = session.solver
+        if session.pending_plan:
+            move = session.pending_plan.popleft()
+            return [(move, solver.get_solution_cells(move))]
+        moves = session.move_index.moves()
+        if not moves:
+            return []
+        if self.endgame and solver.endgame.should_solve(solver.count_numbers()):
+            # Sequential plan: each move depends on the ones before it, so like
+            # auto_solve play one per round and verify it before the next
+            plan = solver.endgame.solve(solver.matrix)
+            if plan:
+                session.pending_plan.extend(plan[1:])
+                return [(plan[0], solver.get_solution_cells(plan[0]))]
+        return solver.select_best_batch(moves)
+
+    def report(self):
+        lines = [f"{'session':<24}{'status':>9}{'moves':>7}{'failed':>8}{'rounds':>8}{'left':>6}{'cpu s':>8}"]
+        for session in self.sessions:
+            left = session.solver.count_numbers() if session.solver.matrix else "-"
+            lines.append(f"{session.name:<24}{session.status:>9}{session.moves:>7}{session.failed_moves:>8}"
+                         f"{session.rounds:>8}{left:>6}{session.work_time:>8.2f}")
+        scheduler = self.scheduler
+        lines.append(f"{scheduler.drags} drags in {self.elapsed:.2f}s ({scheduler.drags / max(self.elapsed, 1e-9):.1f}/s), "
+                     f"mouse busy {scheduler.busy_time / max(self.elapsed, 1e-9):.0%}, "
+                     f"{scheduler.focus_switches} focus switches")
+        return "\n".join(lines)
+
+
+def fake_desktop(count, scale=1.0, seed=0, fill=1.0):
+    """Desktop with count simulated game windows side by side, plus its window backend"""
+    from synthetic import FakeDesktop, random_board
+    from template_bank import TemplateBank
+
+    bank = TemplateBank()
+    bank.load()
+    width, height = round(REFERENCE_SIZE[0] * scale), round(REFERENCE_SIZE[1] * scale)
+    windows = [GameWindow(1000 + i, 2000 + i, f"Fake NIKKE {i + 1}", (i * width, 0, (i + 1) * width, height))
+               for i in range(count)]
+
+    desktop = FakeDesktop(width * count, height, templates=bank.templates_at(round(scale * 20) / 20))
+    for i, window in enumerate(windows):
+        grid = profile_for_window(window)
+        desktop.add_board(grid, random_board(grid.rows, grid.columns, seed + i, fill))
+    return desktop, FakeWindowBackend(windows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve every open game window at once")
+    parser.add_argument("--fake", type=int, default=0, help="simulate this many game windows instead")
+    parser.add_argument("--scale", type=float, default=1.0, help="size of simulated windows relative to 1920x1080")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fill", type=float, default=1.0,
+                        help="fraction of simulated cells holding a digit (e.g. 0.1 reaches the endgame)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply all drag and settle times")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None, help="give up after this many seconds")
+    parser.add_argument("--verbose", action="store_true", help="show every instance's solver log")
+    args = parser.parse_args(argv)
+
+    scale = args.time_scale
+    drag_settings = dict(step_interval=0.015 * scale, press_delay=0.1 * scale,
+                         settle=0.2 * scale, focus_delay=0.05 * scale, pause=0.05 * scale)
+
+    if args.fake:
+        desktop, windows = fake_desktop(args.fake, args.scale, args.seed, args.fill)
+        manager = SessionManager(windows, desktop, grab=desktop.grab, workers=args.workers,
+                                 verbose=args.verbose, **drag_settings)
+    else:
+        manager = SessionManager(workers=args.workers, verbose=args.verbose, **drag_settings)
+        if manager.input is None or manager.windows is None:
+            print("No mouse or window backend on this machine; try --fake N")
+            return 1
+
+    manager.discover()
+    if not manager.sessions:
+        print("No game windows found")
+        return 1
+    manager.run(timeout=args.timeout)
+    print(manager.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,436 @@
+"""
+Local solver service
+
+Serves PuzzleSolver's recognition and move search over HTTP (standard
+library only, no GUI), so dashboards and other input drivers can use them.
+Templates, the per-geometry template scale and a thread pool stay resident
+for the lifetime of the process.
+
+Endpoints (JSON in and out):
+    GET  /health      service and batching statistics
+    POST /recognize   {"image": <base64 PNG>, "grid": {...}} -> {"board": [[...]], "scores": [[...]], "confidence": [[...]]}
+    POST /plan        {"board": [[...]], "mode": "all" | "batch" | "endgame"} -> {"moves": [...]}
+    POST /solve       image as for /recognize, then the plan for the recognized board
+
+"grid" takes any GridConfig field (rows, columns, offset_x, offset_y,
+cell_w, cell_h); missing fields use the standard 16x10 layout. The image is
+the capture of that grid, top-left cell at (0, 0). A raw PNG body
+(Content-Type: image/png) with the grid fields as query parameters works
+too. Boards use 0 for empty cells; moves are [type, start_r, start_c, end_r, end_c].
+
+Concurrent /recognize and /solve requests are batched: the batcher waits a
+few milliseconds after the first request, stacks every capture with the
+same cell pitch into one tall image (padding each to a whole number of row
+pitches, so the stack is itself a regular grid) and runs one
+recognize_grid pass over it, which finds blank cells for the whole batch at
+once and spreads template matching across the thread pool.
+
+Usage:
+    python solver_service.py serve --port 8765
+    python solver_service.py loadtest --spawn --requests 500 --concurrency 16
+"""
+import argparse
+import base64
+import json
+import math
+import queue
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from endgame import EndgameSolver
+from grid_config import GridConfig
+from move_index import MoveIndex
+
+DEFAULT_PORT = 8765
+GRID_FIELDS = ("rows", "columns", "offset_x", "offset_y", "cell_w", "cell_h")
+
+RecognitionJob = namedtuple("RecognitionJob", "image grid future")
+
+
+class RequestError(Exception):
+    """Bad request: reported to the client as HTTP 400"""
+
+
+def grid_from_fields(fields):
+    grid = GridConfig(left_start=0, top_start=0)
+    for name in GRID_FIELDS:
+        if name in fields:
+            setattr(grid, name, int(fields[name]))
+    if not (1 <= grid.rows <= GridConfig.MAX_SIZE and 1 <= grid.columns <= GridConfig.MAX_SIZE):
+        raise RequestError(f"grid must be between 1x1 and {GridConfig.MAX_SIZE}x{GridConfig.MAX_SIZE}")
+    if not (0 < grid.cell_w <= grid.offset_x and 0 < grid.cell_h <= grid.offset_y):
+        raise RequestError("cells must be non-empty and no larger than the cell pitch")
+    return grid
+
+
+def decode_image(data):
+    """Grayscale image from PNG/JPEG bytes"""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise RequestError("image could not be decoded")
+    return image
+
+
+def encode_image(image):
+    ok, data = cv2.imencode(".png", image)
+    return data.tobytes()
+
+
+def grid_image_size(grid):
+    return (grid.rows - 1) * grid.offset_y + grid.cell_h, (grid.columns - 1) * grid.offset_x + grid.cell_w
+
+
+class RecognitionBatcher:
+    """
+    Collects recognition requests from the HTTP threads and runs them on one
+    worker thread, batched: everything that arrives within max_wait of the
+    first request (up to max_batch) is recognized together.
+    """
+
+    def __init__(self, solver, max_batch=32, max_wait=0.004):
+        self.solver = solver
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.scales = {}  # (offset_x, offset_y, cell_w, cell_h) -> locked template scale
+        self.stopped = False
+
+        self.batches = 0
+        self.jobs = 0
+        self.largest_batch = 0
+
+        self.thread = threading.Thread(target=self._run, name="recognition-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, image, grid):
+        """Future resolving to (digits, scores, confidence) arrays for one grid capture"""
+        height, width = grid_image_size(grid)
+        if image.shape[0] < height or image.shape[1] < width:
+            raise RequestError(f"image is {image.shape[1]}x{image.shape[0]}, "
+                               f"a {grid.rows}x{grid.columns} grid needs {width}x{height}")
+        future = Future()
+        self.queue.put(RecognitionJob(image[:height, :width], grid, future))
+        return future
+
+    def stop(self):
+        self.stopped = True
+        self.queue.put(None)
+        self.thread.join(timeout=2.0)
+
+    def _run(self):
+        while not self.stopped:
+            job = self.queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            deadline = time.perf_counter() + self.max_wait
+            while len(jobs) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    job = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    self.stopped = True
+                    break
+                jobs.append(job)
+
+            groups = {}
+            for job in jobs:
+                key = (job.grid.offset_x, job.grid.offset_y, job.grid.cell_w, job.grid.cell_h)
+                groups.setdefault(key, []).append(job)
+            for key, group in groups.items():
+                try:
+                    self._recognize_group(key, group)
+                except Exception as e:
+                    for job in group:
+                        if not job.future.done():
+                            job.future.set_exception(e)
+
+            self.batches += 1
+            self.jobs += len(jobs)
+            self.largest_batch = max(self.largest_batch, len(jobs))
+
+    def _use_geometry(self, key, sample):
+        """Point the solver at this cell geometry and its template scale (probed once per geometry)"""
+        solver = self.solver
+        offset_x, offset_y, cell_w, cell_h = key
+        solver.grid = GridConfig(sample.grid.rows, sample.grid.columns, 0, 0, offset_x, offset_y, cell_w, cell_h)
+        if key not in self.scales:
+            cells = [solver.get_cell_image(sample.image, r, c)
+                     for r in range(sample.grid.rows) for c in range(sample.grid.columns)]
+            scale, score = solver.template_bank.detect_scale(cells)
+            self.scales[key] = scale if score >= solver.min_scale_probe_score else 1.0
+        solver.templates = solver.template_bank.templates_at(self.scales[key])
+
+    def _recognize_group(self, key, group):
+        """One recognize_grid pass over every capture in the group, stacked vertically"""
+        offset_x, offset_y, cell_w, cell_h = key
+        self._use_geometry(key, group[0])
+
+        columns = max(job.grid.columns for job in group)
+        rows = sum(job.grid.rows for job in group)
+        width = (columns - 1) * offset_x + cell_w
+        # Each capture takes rows * offset_y lines, so row pitch carries on across the stack;
+        # zero padding (gaps and narrower boards) is uniform and reads as blank
+        stack = np.zeros((rows * offset_y, width), dtype=np.uint8)
+        y = 0
+        for job in group:
+            h, w = job.image.shape
+            stack[y:y + h, :w] = job.image
+            y += job.grid.rows * offset_y
+
+        digits, scores, confidence = self.solver.recognize_grid(stack, rows=rows, columns=columns)
+
+        row = 0
+        for job in group:
+            r, c = job.grid.rows, job.grid.columns
+            job.future.set_result((digits[row:row + r, :c].copy(), scores[row:row + r, :c].copy(),
+                                   confidence[row:row + r, :c].copy()))
+            row += r
+
+
+class SolverService:
+    def __init__(self, max_batch=32, max_wait=0.004, endgame_time_limit=0.2):
+        from main import PuzzleSolver
+        self.solver = PuzzleSolver(grid=GridConfig(left_start=0, top_start=0))
+        self.solver.log = lambda message: None
+        self.batcher = RecognitionBatcher(self.solver, max_batch, max_wait)
+        self.endgame_time_limit = endgame_time_limit
+        self.started = time.time()
+        self.requests = 0
+        self.requests_lock = threading.Lock()  # Handler threads count concurrently
+
+    def count_request(self):
+        with self.requests_lock:
+            self.requests += 1
+
+    def recognize(self, image, grid):
+        digits, scores, confidence = self.batcher.submit(image, grid).result()
+        return {"board": digits.tolist(), "scores": np.round(scores, 3).tolist(),
+                "confidence": np.round(confidence, 3).tolist()}
+
+    def plan(self, board, mode="batch"):
+        """Moves for a board: every valid move, a non-overlapping batch, or the endgame order"""
+        if not board or not all(isinstance(row, list) and len(row) == len(board[0]) for row in board):
+            raise RequestError("board must be a non-empty list of equal-length rows")
+        matrix = [[value if isinstance(value, int) and 1 <= value <= 9 else " " for value in row] for row in board]
+        rules = self.solver.rules
+        moves = MoveIndex(matrix, rules).moves()
+        result = {"mode": mode}
+        if mode == "all":
+            result["moves"] = moves
+        elif mode == "batch":
+            result["moves"] = [move for move, cells in self.solver.select_solutions(moves)]
+        elif mode == "endgame":
+            endgame = EndgameSolver(threshold=len(board) * len(board[0]) + 1, time_limit=self.endgame_time_limit,
+                                    target=rules.target, min_count=rules.min_count)
+            plan = endgame.solve(matrix)
+            result["moves"] = plan if plan is not None else [move for move, cells in self.solver.select_solutions(moves)]
+            result["timed_out"] = plan is None
+        else:
+            raise RequestError(f"unknown mode {mode!r}")
+        result["moves"] = [list(move) for move in result["moves"]]
+        return result
+
+    def health(self):
+        batcher = self.batcher
+        return {
+            "status": "ok",
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "templates": len(self.solver.templates),
+            "template_scales": {",".join(map(str, key)): scale for key, scale in batcher.scales.items()},
+            "batches": batcher.batches,
+            "batched_requests": batcher.jobs,
+            "mean_batch": batcher.jobs / batcher.batches if batcher.batches else 0.0,
+            "largest_batch": batcher.largest_batch,
+        }
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    service = None  # Set by make_server
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # One line per request would swamp the console under load
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urllib.parse.urlparse(self.path).path == "/health":
+            self.send_json(200, self.service.health())
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        try:
+            self.service.count_request()
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if self.headers.get("Content-Type", "").startswith("image/"):
+                fields = {k: v[0] for k, v in urllib.parse.parse_qs(url.query).items()}
+                request = dict(fields, grid=fields)
+                image = decode_image(body)
+            else:
+                request = json.loads(body or b"{}")
+                image = decode_image(base64.b64decode(request["image"])) if "image" in request else None
+
+            if url.path == "/plan":
+                result = self.service.plan(request.get("board"), request.get("mode", "batch"))
+            elif url.path in ("/recognize", "/solve"):
+                if image is None:
+                    raise RequestError("missing image")
+                result = self.service.recognize(image, grid_from_fields(request.get("grid", {})))
+                if url.path == "/solve":
+                    result["plan"] = self.service.plan(result["board"], request.get("mode", "batch"))
+            else:
+                self.send_json(404, {"error": "not found"})
+                return
+            self.send_json(200, result)
+        except (RequestError, ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+
+
+def make_server(host="127.0.0.1", port=DEFAULT_PORT, **service_options):
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"service": SolverService(**service_options)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# --- Load test client -------------------------------------------------------
+
+def post_json(url, payload, timeout=30):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def get_json(url, timeout=10):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+def load_test(url, requests, concurrency, endpoint="recognize", rows=16, columns=10, boards=32, seed=0):
+    """Fire requests at the service from concurrency threads; returns latency and throughput stats"""
+    from synthetic import random_board, render_board
+    from template_bank import TemplateBank
+
+    bank = TemplateBank()
+    bank.load()
+    grid = GridConfig(rows, columns, 0, 0)
+    truths = [random_board(rows, columns, seed + i) for i in range(boards)]
+    payloads = [{"image": base64.b64encode(encode_image(render_board(board, grid, bank.templates_at(1.0)))).decode(),
+                 "grid": {"rows": rows, "columns": columns}, "board": board, "mode": "batch"}
+                for board in truths]
+
+    before = get_json(f"{url}/health")
+    latencies = [None] * requests
+    correct = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        payload = payloads[i % boards]
+        start = time.perf_counter()
+        result = post_json(f"{url}/{endpoint}", payload)
+        latencies[i] = time.perf_counter() - start
+        if "board" in result and result["board"] == truths[i % boards]:
+            with lock:
+                correct[0] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    after = get_json(f"{url}/health")
+
+    batches = after["batches"] - before["batches"]
+    return {
+        "endpoint": endpoint,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput": requests / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "mean_batch": (after["batched_requests"] - before["batched_requests"]) / batches if batches else 0.0,
+        "boards_correct": correct[0] if endpoint != "plan" else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local solver service")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="run the service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--max-batch", type=int, default=32)
+    serve.add_argument("--max-wait-ms", type=float, default=4.0, help="how long a batch waits for more requests")
+
+    load = sub.add_parser("loadtest", help="measure latency and throughput")
+    load.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}")
+    load.add_argument("--spawn", action="store_true", help="start a service in this process first")
+    load.add_argument("--endpoint", default="recognize", choices=("recognize", "plan", "solve"))
+    load.add_argument("--requests", type=int, default=500)
+    load.add_argument("--concurrency", type=int, default=16)
+    load.add_argument("--rows", type=int, default=16)
+    load.add_argument("--columns", type=int, default=10)
+    load.add_argument("--max-batch", type=int, default=32)
+    load.add_argument("--max-wait-ms", type=float, default=4.0)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = make_server(args.host, args.port, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+        print(f"Solver service listening on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    url = args.url.rstrip("/")
+    if args.spawn:
+        parsed = urllib.parse.urlparse(url)
+        server = make_server(parsed.hostname, parsed.port or DEFAULT_PORT,
+                             max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stats = load_test(url, args.requests, args.concurrency, args.endpoint, args.rows, args.columns)
+    print(f"{stats['requests']} {stats['endpoint']} requests, concurrency {stats['concurrency']}, "
+          f"{args.rows}x{args.columns} boards")
+    print(f"throughput  {stats['throughput']:.1f} req/s ({stats['seconds']:.2f}s)")
+    print(f"latency     p50 {stats['p50'] * 1000:.1f} ms, p99 {stats['p99'] * 1000:.1f} ms")
+    print(f"mean batch  {stats['mean_batch']:.1f} requests")
+    if stats["boards_correct"] is not None:
+        print(f"recognized  {stats['boards_correct']}/{stats['requests']} boards exactly")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
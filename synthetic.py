@@ -0,0 +1,137 @@
+"""
+Synthetic Sum10 grid captures rendered from the digit templates.
+
+Used by the headless benchmarks and harnesses in place of a live screen.
+FakeDesktop goes one step further: a whole screen holding one or more
+boards that reacts to mouse drags the way the game does.
+"""
+import random
+import threading
+
+import numpy as np
+
+from input_backend import InputBackend
+from move_engine import DEFAULT_RULES
+
+BACKGROUND = 40  # Gray level of an empty cell
+
+
+def random_board(rows, columns, seed=None, fill=1.0):
+    """Board of random digits 1-9 on a fill fraction of its cells (the rest empty)"""
+    rng = random.Random(seed)
+    return [[rng.randint(1, 9) if fill >= 1 or rng.random() < fill else " " for _ in range(columns)]
+            for _ in range(rows)]
+
+
+def render_board(board, grid, templates, background=BACKGROUND):
+    """
+    Render a board (digits 1-9, anything else is empty) as the grayscale
+    full-grid capture the solver would grab with the given GridConfig
+    """
+    rows, columns = len(board), len(board[0])
+    height = (rows - 1) * grid.offset_y + grid.cell_h
+    width = (columns - 1) * grid.offset_x + grid.cell_w
+    img = np.full((height, width), background, dtype=np.uint8)
+
+    for r in range(rows):
+        for c in range(columns):
+            value = board[r][c]
+            if isinstance(value, int) and 1 <= value <= 9:
+                draw_digit(img, templates[value], r * grid.offset_y, c * grid.offset_x,
+                           grid.cell_h, grid.cell_w, background)
+    return img
+
+
+def draw_digit(img, template, cell_y, cell_x, cell_h, cell_w, background=BACKGROUND):
+    """Draw a digit template centered in the cell whose top-left is (cell_y, cell_x)"""
+    th, tw = template.shape
+    y = cell_y + (cell_h - th) // 2
+    x = cell_x + (cell_w - tw) // 2
+    img[y:y + th, x:x + tw] = np.maximum(template, background)
+
+
+def clear_cell(img, row, col, grid, background=BACKGROUND):
+    """Paint a cell of a rendered grid back to empty background"""
+    y, x = row * grid.offset_y, col * grid.offset_x
+    img[y:y + grid.cell_h, x:x + grid.cell_w] = background
+
+
+class FakeDesktop(InputBackend):
+    """
+    Grayscale screen with boards drawn at their GridConfig positions. It is
+    also an input backend: releasing a drag whose rectangle of cells is a
+    move under its MoveRules (sums to 10 by default) clears those cells, on
+    screen and in the board. grab() returns a copy
+    of any screen region, so it can stand in for a screen capture.
+    """
+
+    def __init__(self, width=1920, height=1080, templates=None, background=BACKGROUND, real_sleep=True,
+                 sleep_scale=1.0, rules=None):
+        self.screen = np.full((height, width), background, dtype=np.uint8)
+        self.templates = templates
+        self.background = background
+        self.real_sleep = real_sleep
+        self.sleep_scale = sleep_scale  # Multiplies input sleeps (drag delays)
+        self.rules = rules or DEFAULT_RULES
+        self.boards = []   # (grid, board) pairs
+        self.position = (0, 0)
+        self.press_position = None
+        self.cleared_moves = 0
+        self.rejected_moves = 0   # Drags the game would ignore (not a sum of 10)
+        self.lock = threading.Lock()
+
+    def add_board(self, grid, board):
+        board = [row[:] for row in board]
+        img = render_board(board, grid, self.templates, self.background)
+        with self.lock:
+            h, w = img.shape
+            self.screen[grid.top_start:grid.top_start + h, grid.left_start:grid.left_start + w] = img
+            self.boards.append((grid, board))
+        return board
+
+    def grab(self, area):
+        with self.lock:
+            return self.screen[area["top"]:area["top"] + area["height"],
+                               area["left"]:area["left"] + area["width"]].copy()
+
+    def cell_at(self, x, y):
+        """(grid, board, row, col) of the cell under a screen point, or None"""
+        for grid, board in self.boards:
+            col, dx = divmod(x - grid.left_start, grid.offset_x)
+            row, dy = divmod(y - grid.top_start, grid.offset_y)
+            if 0 <= row < grid.rows and 0 <= col < grid.columns and dx < grid.cell_w and dy < grid.cell_h:
+                return grid, board, row, col
+        return None
+
+    def move(self, x, y):
+        self.position = (x, y)
+
+    def press(self):
+        self.press_position = self.position
+
+    def release(self):
+        start, end = self.press_position, self.position
+        self.press_position = None
+        if start is None:
+            return
+        first, last = self.cell_at(*start), self.cell_at(*end)
+        if first is None or last is None or first[1] is not last[1]:
+            self.rejected_moves += 1
+            return
+        grid, board, r0, c0 = first
+        _, _, r1, c1 = last
+        cells = [(r, c) for r in range(min(r0, r1), max(r0, r1) + 1) for c in range(min(c0, c1), max(c0, c1) + 1)]
+        numbers = [board[r][c] for r, c in cells if isinstance(board[r][c], int)]
+        if not self.rules.is_move(sum(numbers), len(numbers)):
+            self.rejected_moves += 1
+            return
+        with self.lock:
+            for r, c in cells:
+                board[r][c] = " "
+                y, x = grid.top_start + r * grid.offset_y, grid.left_start + c * grid.offset_x
+                self.screen[y:y + grid.cell_h, x:x + grid.cell_w] = self.background
+            self.cleared_moves += 1
+
+    def sleep(self, seconds):
+        if self.real_sleep:
+            super().sleep(seconds * self.sleep_scale)
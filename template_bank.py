@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+from app_paths import resource_path, app_data_path
+
+# Scales relative to the bundled templates: covers windowed play down to
+# half size and display scaling up to 200%
+DEFAULT_SCALES = tuple(round(0.5 + 0.05 * i, 2) for i in range(31))
+
+CACHE_VERSION = 1
+
+
+class TemplateBank:
+    """
+    Digit templates pre-rendered at several scales.
+
+    The bank is built once from templates/T1.png-T9.png and cached to disk, so
+    later runs load every scale instantly. detect_scale() probes a handful of
+    grid cells once to find the scale the game renders digits at; after that
+    the caller matches against templates_at(scale) only, which costs the same
+    as the single-scale path.
+    """
+
+    def __init__(self, template_dir="templates", cache_path=None, scales=DEFAULT_SCALES):
+        self.template_dir = template_dir
+        self.cache_path = cache_path or app_data_path("template_bank.npz")
+        self.scales = tuple(scales)
+        if 1.0 not in self.scales:
+            self.scales = tuple(sorted(self.scales + (1.0,)))
+        self.bank = {}  # scale -> {digit: grayscale template}
+        self.from_cache = False
+
+    def _source_paths(self):
+        return {digit: resource_path(os.path.join(self.template_dir, f"T{digit}.png"))
+                for digit in range(1, 10)}
+
+    def _signature(self, paths):
+        """Hash of template contents and scales, used to invalidate the cache"""
+        digest = hashlib.sha1(f"v{CACHE_VERSION}:{self.scales}".encode())
+        for digit, path in sorted(paths.items()):
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        return digest.hexdigest()
+
+    def load(self):
+        """Load the bank from cache, rebuilding it if templates changed"""
+        paths = self._source_paths()
+        signature = self._signature(paths)
+
+        if self._load_cache(signature):
+            self.from_cache = True
+            return self.bank
+
+        base = {}
+        for digit, path in paths.items():
+            template = cv2.imread(path)
+            if template is not None:
+                base[digit] = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+
+        self.bank = {scale: self._rescale(base, scale) for scale in self.scales}
+        self.from_cache = False
+        if len(base) == len(paths):
+            self._save_cache(signature)
+        return self.bank
+
+    def _rescale(self, base, scale):
+        if scale == 1.0:
+            return dict(base)
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        scaled = {}
+        for digit, template in base.items():
+            h, w = template.shape
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            scaled[digit] = cv2.resize(template, size, interpolation=interpolation)
+        return scaled
+
+    def _load_cache(self, signature):
+        if not os.path.exists(self.cache_path):
+            return False
+        try:
+            with np.load(self.cache_path) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta["signature"] != signature:
+                    return False
+                self.bank = {
+                    scale: {digit: data[f"s{i}_d{digit}"] for digit in meta["digits"]}
+                    for i, scale in enumerate(meta["scales"])
+                }
+            return True
+        except (OSError, KeyError, ValueError):
+            return False
+
+    def _save_cache(self, signature):
+        digits = sorted(self.bank.get(1.0, {}))
+        arrays = {"meta": np.array(json.dumps({
+            "signature": signature, "scales": list(self.scales), "digits": digits,
+        }))}
+        for i, scale in enumerate(self.scales):
+            for digit in digits:
+                arrays[f"s{i}_d{digit}"] = self.bank[scale][digit]
+        try:
+            np.savez(self.cache_path, **arrays)
+        except OSError:
+            pass  # Cache is an optimization; the bank is still usable
+
+    def templates_at(self, scale):
+        return self.bank.get(scale, {})
+
+    def detect_scale(self, cell_images, max_probe_cells=12):
+        """
+        Find the template scale that best matches the given grid cell crops.
+        Probes the highest-contrast cells (the ones most likely holding a digit)
+        and returns (scale, mean best match score).
+        """
+        probes = sorted(cell_images, key=lambda img: float(img.std()), reverse=True)
+        probes = probes[:max_probe_cells]
+        if not probes:
+            return 1.0, 0.0
+
+        cell_h = min(img.shape[0] for img in probes)
+        cell_w = min(img.shape[1] for img in probes)
+
+        best_scale, best_score = 1.0, -1.0
+        for scale in self.scales:
+            templates = self.bank[scale]
+            # Every digit must fit inside a cell crop to be matchable at this scale
+            if any(t.shape[0] > cell_h or t.shape[1] > cell_w for t in templates.values()):
+                continue
+            scores = []
+            for cell_img in probes:
+                cell_best = -1.0
+                for template in templates.values():
+                    res = cv2.matchTemplate(cell_img, template, cv2.TM_CCOEFF_NORMED)
+                    cell_best = max(cell_best, float(res.max()))
+                scores.append(cell_best)
+            score = sum(scores) / len(scores)
+            if score > best_score:
+                best_scale, best_score = scale, score
+        return best_scale, best_score
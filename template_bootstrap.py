@@ -0,0 +1,184 @@
+"""
+Digit templates bootstrapped from the live grid.
+
+The bundled templates/T*.png only match well while the game renders digits
+exactly like they did when they were cropped. bootstrap_templates() takes
+the cell crops of one grid capture, aligns the digit in each non-empty cell
+on its bounding box, clusters them with k-means into digit groups (seeded
+from what the bundled templates read, so look-alike digits start apart)
+and labels each group by the bundled template its average matches best. The
+averaged group images become the new templates: they carry the game's
+current font, colours and scaling, so they match later scans more tightly.
+
+Empty cells are left to the solver's blank test rather than clustered.
+Digits with too few cells on the board, or whose group does not clearly
+match a bundled template or mixes cells the bundled templates read as
+different digits, keep the bundled template.
+
+Templates are cached per grid geometry and template scale with
+save_session_templates() / load_session_templates().
+"""
+import json
+
+import cv2
+import numpy as np
+
+FEATURE_SIZE = 16
+CACHE_VERSION = 1
+
+
+def digit_bbox(cell_img):
+    """Bounding box (top, left, bottom, right) of the digit strokes in a cell crop, or None"""
+    border = np.concatenate([cell_img[0], cell_img[-1], cell_img[:, 0], cell_img[:, -1]])
+    background = float(np.median(border))
+    threshold, _ = cv2.threshold(cell_img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    mask = cell_img > threshold if background <= threshold else cell_img <= threshold
+    rows = np.flatnonzero(mask.any(axis=1))
+    columns = np.flatnonzero(mask.any(axis=0))
+    if not len(rows):
+        return None
+    return rows[0], columns[0], rows[-1] + 1, columns[-1] + 1
+
+
+def aligned_patch(cell_img, size):
+    """size (h, w) patch of a cell centered on its digit's bounding box"""
+    h, w = size
+    bbox = digit_bbox(cell_img)
+    if bbox is None:
+        center_y, center_x = cell_img.shape[0] / 2, cell_img.shape[1] / 2
+    else:
+        center_y, center_x = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+    top = int(round(center_y - h / 2))
+    left = int(round(center_x - w / 2))
+    pad = max(h, w)
+    padded = cv2.copyMakeBorder(cell_img, pad, pad, pad, pad, cv2.BORDER_REPLICATE)
+    return padded[top + pad:top + pad + h, left + pad:left + pad + w]
+
+
+def features(patches):
+    """Zero-mean, unit-norm downsampled patches, one row per patch"""
+    small = np.stack([cv2.resize(p, (FEATURE_SIZE, FEATURE_SIZE), interpolation=cv2.INTER_AREA)
+                      for p in patches]).reshape(len(patches), -1).astype(np.float32)
+    small -= small.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(small, axis=1, keepdims=True)
+    return small / np.maximum(norms, 1e-6)
+
+
+def kmeans(x, k, iterations=30, restarts=4, seed=0, init=None):
+    """
+    Vectorized k-means; returns (labels, centroids) of the best restart.
+    Starts from the init centroids if given, otherwise k-means++ seeding.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    k = min(k, n) if init is None else len(init)
+    squared = (x * x).sum(axis=1)
+    best = None
+
+    for _ in range(1 if init is not None else restarts):
+        if init is not None:
+            centroids = np.array(init, dtype=x.dtype)
+        else:
+            centroids = [x[rng.integers(n)]]
+            for _ in range(1, k):
+                d = np.min(squared[:, None] + (np.array(centroids) ** 2).sum(axis=1)[None, :]
+                           - 2 * x @ np.array(centroids).T, axis=1).clip(0)
+                total = d.sum()
+                centroids.append(x[rng.choice(n, p=d / total)] if total > 0 else x[rng.integers(n)])
+            centroids = np.array(centroids)
+
+        labels = None
+        for _ in range(iterations):
+            distances = squared[:, None] + (centroids ** 2).sum(axis=1)[None, :] - 2 * x @ centroids.T
+            new_labels = distances.argmin(axis=1)
+            if labels is not None and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            for j in range(k):
+                members = x[labels == j]
+                if len(members):
+                    centroids[j] = members.mean(axis=0)
+                else:
+                    # Re-seed an empty cluster on the point furthest from its centroid
+                    far = distances[np.arange(n), labels].argmax()
+                    centroids[j] = x[far]
+        inertia = float((squared + (centroids[labels] ** 2).sum(axis=1)
+                         - 2 * (x * centroids[labels]).sum(axis=1)).sum())
+        if best is None or inertia < best[0]:
+            best = (inertia, labels, centroids)
+    return best[1], best[2]
+
+
+def match_score(image, template):
+    """TM_CCOEFF_NORMED of a template over an image at least as large"""
+    if template.shape[0] > image.shape[0] or template.shape[1] > image.shape[1]:
+        return -1.0
+    return float(cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED).max())
+
+
+def bootstrap_templates(cell_images, reference, min_cluster=2, min_label_score=0.6, min_purity=0.8, seed=0):
+    """
+    Templates averaged from non-empty cell crops, labelled against the
+    reference (bundled) templates at the same scale.
+    Returns ({digit: template}, {digit: (cells, label score)}) for the digits
+    that were bootstrapped.
+    """
+    if not cell_images or not reference:
+        return {}, {}
+    size = (max(t.shape[0] for t in reference.values()) + 2,
+            max(t.shape[1] for t in reference.values()) + 2)
+    size = (min(size[0], min(c.shape[0] for c in cell_images)),
+            min(size[1], min(c.shape[1] for c in cell_images)))
+    patches = np.stack([aligned_patch(cell, size) for cell in cell_images])
+    x = features(patches)
+
+    # What the bundled templates read seeds the clusters and checks them afterwards
+    digits = sorted(reference)
+    reads = np.array([digits[int(np.argmax([match_score(cell, reference[d]) for d in digits]))]
+                      for cell in cell_images])
+    seeds = [x[reads == digit].mean(axis=0) for digit in digits if (reads == digit).any()]
+    labels, _ = kmeans(x, len(seeds), seed=seed, init=seeds)
+
+    # Label each cluster by its best bundled match; clusters agreeing on a digit merge
+    groups = {}
+    for cluster in np.unique(labels):
+        members = labels == cluster
+        average = patches[members].mean(axis=0).round().astype(np.uint8)
+        scores = {digit: match_score(average, template) for digit, template in reference.items()}
+        digit = max(scores, key=scores.get)
+        groups.setdefault(digit, []).append((members, scores[digit]))
+
+    templates, stats = {}, {}
+    for digit, clusters in groups.items():
+        members = np.logical_or.reduce([m for m, _ in clusters])
+        count = int(members.sum())
+        average = patches[members].mean(axis=0).round().astype(np.uint8)
+        score = match_score(average, reference[digit])
+        purity = float((reads[members] == digit).mean())
+        if count < min_cluster or score < min_label_score or purity < min_purity:
+            continue
+        # Same footprint as the bundled template, centered on the averaged digit
+        th, tw = reference[digit].shape
+        templates[digit] = np.ascontiguousarray(aligned_patch(average, (th, tw)))
+        stats[digit] = (count, score)
+    return templates, stats
+
+
+def save_session_templates(path, key, templates):
+    digits = sorted(templates)
+    arrays = {"meta": np.array(json.dumps({"version": CACHE_VERSION, "key": key, "digits": digits}))}
+    for digit in digits:
+        arrays[f"d{digit}"] = templates[digit]
+    np.savez(path, **arrays)
+
+
+def load_session_templates(path, key):
+    """Cached templates for this geometry and scale, or {}"""
+    try:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != CACHE_VERSION or meta.get("key") != key:
+                return {}
+            return {digit: data[f"d{digit}"] for digit in meta["digits"]}
+    except (OSError, KeyError, ValueError):
+        return {}
@@ -0,0 +1,247 @@
+"""
+Strategy tournament for the Sum10 solver
+
+Plays every strategy on the same seeded set of random boards (in parallel
+across cores) and reports cells cleared, moves made and planning time, with
+95% confidence intervals and head-to-head win rates.
+
+A strategy is a function taking a headless PuzzleSolver whose matrix holds
+the current board, and returning the solutions to play next, in order (an
+empty batch ends the game). Register new strategies in
+STRATEGIES to enter them.
+
+--fill leaves only that fraction of cells holding a digit, like a
+late-game board; full random boards get stuck long before the endgame
+threshold, so this is how the endgame strategy is put to the test.
+
+Usage:
+    python tournament.py --boards 200 --strategies baseline,largest_first
+    python tournament.py --boards 200 --strategies baseline,endgame --fill 0.12
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def baseline_strategy(solver):
+    """Current auto_solve policy: find_all_solutions + greedy used_cells"""
+    solver.find_all_solutions()
+    return [solution for solution, _ in solver.select_solutions(solver.solutions)]
+
+
+def largest_first_strategy(solver):
+    """Like baseline, but tries solutions covering the most cells first"""
+    solver.find_all_solutions()
+    ordered = sorted(solver.solutions, key=lambda s: -len(solver.get_solution_cells(s)))
+    return [solution for solution, _ in solver.select_solutions(ordered)]
+
+
+def best_batch_strategy(solver):
+    """Conflict-graph selection: the non-overlapping batch clearing the most cells"""
+    solver.find_all_solutions()
+    return [solution for solution, _ in solver.select_best_batch(solver.solutions)]
+
+
+def endgame_strategy(solver):
+    """Baseline, switching to the exact endgame plan once few numbers are left"""
+    if solver.endgame.should_solve(solver.count_numbers()):
+        plan = solver.endgame.solve(solver.matrix)
+        if plan is not None:
+            return plan
+    return baseline_strategy(solver)
+
+
+STRATEGIES = {
+    "baseline": baseline_strategy,
+    "largest_first": largest_first_strategy,
+    "best_batch": best_batch_strategy,
+    "endgame": endgame_strategy,
+}
+
+
+def generate_board(seed, rows, cols, fill=1.0):
+    """Random board of digits 1-9 on a fill fraction of its cells, reproducible from its seed"""
+    rng = random.Random(seed)
+    return [[rng.randint(1, 9) if fill >= 1 or rng.random() < fill else ' ' for _ in range(cols)]
+            for _ in range(rows)]
+
+
+# One headless solver per worker process, reused across boards
+_solver = None
+
+
+def _get_solver(rows, cols, target, min_count):
+    global _solver
+    if _solver is None:
+        from main import PuzzleSolver
+        _solver = PuzzleSolver()
+        _solver.log = lambda message: None
+    _solver.grid.resize(rows, cols)
+    if (_solver.rules.target, _solver.rules.min_count) != (target, min_count):
+        _solver.set_rules(target, min_count)
+    return _solver
+
+
+def play_board(strategy_name, seed, rows, cols, target=10, min_count=2, fill=1.0):
+    """Play one board to the end with a strategy under the given move rules and return its metrics"""
+    solver = _get_solver(rows, cols, target, min_count)
+    strategy = STRATEGIES[strategy_name]
+    solver.matrix = generate_board(seed, rows, cols, fill)
+
+    cells_cleared = 0
+    moves = 0
+    plan_time = 0.0
+
+    while True:
+        start = time.perf_counter()
+        batch = strategy(solver)
+        plan_time += time.perf_counter() - start
+        if not batch:
+            break
+
+        for solution in batch:
+            numbers = [(r, c) for r, c in solver.get_solution_cells(solution)
+                       if isinstance(solver.matrix[r][c], int)]
+            total = sum(solver.matrix[r][c] for r, c in numbers)
+            if not solver.rules.is_move(total, len(numbers)):
+                raise ValueError(f"{strategy_name} played an invalid move {solution} on board {seed}")
+            for r, c in numbers:
+                solver.matrix[r][c] = ' '
+            cells_cleared += len(numbers)
+            moves += 1
+
+    return {
+        "strategy": strategy_name,
+        "seed": seed,
+        "cells_cleared": cells_cleared,
+        "moves": moves,
+        "plan_time": plan_time,
+    }
+
+
+def _play_task(args):
+    return play_board(*args)
+
+
+# Two-sided 95% Student t critical values by degrees of freedom
+_T95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+        8: 2.306, 9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086,
+        25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+
+
+def t_critical(df):
+    for limit in sorted(_T95):
+        if df <= limit:
+            return _T95[limit]
+    return 1.960
+
+
+def summarize(values):
+    """Mean and 95% confidence interval half-width"""
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, 0.0
+    half_width = t_critical(len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+    return mean, half_width
+
+
+def head_to_head(results, a, b):
+    """Win/tie/loss rates of strategy a against b on cells cleared per board"""
+    wins = ties = losses = 0
+    for seed, by_strategy in results.items():
+        diff = by_strategy[a]["cells_cleared"] - by_strategy[b]["cells_cleared"]
+        if diff > 0:
+            wins += 1
+        elif diff < 0:
+            losses += 1
+        else:
+            ties += 1
+    n = max(1, wins + ties + losses)
+    return wins / n, ties / n, losses / n
+
+
+def run_tournament(strategy_names, boards, seed, rows, cols, workers=None, target=10, min_count=2, fill=1.0):
+    """Play all strategies on the same boards; returns {seed: {strategy: metrics}}"""
+    tasks = [(name, seed + i, rows, cols, target, min_count, fill)
+             for i in range(boards) for name in strategy_names]
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for metrics in pool.map(_play_task, tasks, chunksize=max(1, len(tasks) // 64)):
+            results.setdefault(metrics["seed"], {})[metrics["strategy"]] = metrics
+    return results
+
+
+def build_report(results, strategy_names):
+    report = {"strategies": {}, "head_to_head": {}}
+    for name in strategy_names:
+        runs = [by_strategy[name] for by_strategy in results.values()]
+        report["strategies"][name] = {
+            metric: summarize([run[metric] for run in runs])
+            for metric in ("cells_cleared", "moves", "plan_time")
+        }
+    for a in strategy_names:
+        for b in strategy_names:
+            if a != b:
+                report["head_to_head"][f"{a} vs {b}"] = head_to_head(results, a, b)
+    return report
+
+
+def print_report(report, boards, rows, cols):
+    print(f"\n=== Tournament: {boards} boards ({rows}x{cols}) ===")
+    print(f"{'strategy':<16}{'cells cleared':>22}{'moves':>18}{'plan time (ms)':>22}")
+    for name, stats in report["strategies"].items():
+        cells, cells_ci = stats["cells_cleared"]
+        moves, moves_ci = stats["moves"]
+        plan, plan_ci = stats["plan_time"]
+        print(f"{name:<16}{cells:>13.2f} ± {cells_ci:<6.2f}{moves:>9.2f} ± {moves_ci:<6.2f}"
+              f"{plan * 1000:>13.2f} ± {plan_ci * 1000:<6.2f}")
+
+    if report["head_to_head"]:
+        print("\nHead-to-head (cells cleared): win / tie / loss")
+        for pairing, (win, tie, loss) in report["head_to_head"].items():
+            print(f"  {pairing:<34}{win:>7.1%} / {tie:>6.1%} / {loss:>6.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Sum10 solver strategies head to head")
+    parser.add_argument("--boards", type=int, default=200, help="number of boards to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first board")
+    parser.add_argument("--rows", type=int, default=16)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--target", type=int, default=10, help="sum a move needs (event variants)")
+    parser.add_argument("--min-count", type=int, default=2, help="fewest numbers a move clears")
+    parser.add_argument("--fill", type=float, default=1.0,
+                        help="fraction of cells holding a digit (e.g. 0.12 for late-game boards)")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES),
+                        help=f"comma separated, from: {', '.join(STRATEGIES)}")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    strategy_names = [name.strip() for name in args.strategies.split(",") if name.strip()]
+    unknown = [name for name in strategy_names if name not in STRATEGIES]
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    results = run_tournament(strategy_names, args.boards, args.seed, args.rows, args.cols, args.workers,
+                             args.target, args.min_count, args.fill)
+    report = build_report(results, strategy_names)
+    print_report(report, args.boards, args.rows, args.cols)
+    print(f"\nFinished in {time.perf_counter() - start:.1f}s on {args.workers or os.cpu_count()} workers")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"boards": args.boards, "seed": args.seed, "rows": args.rows, "cols": args.cols,
+                       "target": args.target, "min_count": args.min_count, "fill": args.fill, **report}, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Game window discovery backends.
+
+Win32WindowBackend lists every visible window of every running game process
+(several clients or emulator windows can run side by side), with its client
+area in screen coordinates. FakeWindowBackend serves a fixed list of windows
+so multi-instance code can be exercised on Linux.
+"""
+from collections import namedtuple
+
+try:
+    import win32gui
+    import win32con
+    import win32process
+except ImportError:
+    win32gui = win32con = win32process = None
+
+GAME_PROCESS_NAMES = ("nikke.exe", "NIKKE.exe", "Nikke.exe")
+
+# rect is the client area (left, top, right, bottom) in screen pixels
+GameWindow = namedtuple("GameWindow", "hwnd pid title rect")
+
+
+class WindowBackend:
+    """Find and focus game windows"""
+
+    def find_windows(self, process_names=GAME_PROCESS_NAMES):
+        raise NotImplementedError
+
+    def focus(self, hwnd):
+        raise NotImplementedError
+
+    def foreground(self):
+        return None
+
+
+class Win32WindowBackend(WindowBackend):
+    def find_windows(self, process_names=GAME_PROCESS_NAMES):
+        """
+        Every visible window of every matching process, in detection order:
+        processes as psutil lists them, each one's windows in EnumWindows
+        order (the first is the window single-instance detection always used)
+        """
+        import psutil
+        pids = []
+        for proc in psutil.process_iter(["pid", "name"]):
+            try:
+                if proc.info["name"] in process_names:
+                    pids.append(proc.info["pid"])
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        if not pids:
+            return []
+
+        windows = []
+
+        def callback(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd):
+                _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                if pid in pids:
+                    windows.append(GameWindow(hwnd, pid, win32gui.GetWindowText(hwnd), self.client_rect(hwnd)))
+            return True
+
+        win32gui.EnumWindows(callback, None)
+        # Stable: windows of one process keep their EnumWindows order
+        windows.sort(key=lambda window: pids.index(window.pid))
+        return windows
+
+    @staticmethod
+    def client_rect(hwnd):
+        left, top, right, bottom = win32gui.GetClientRect(hwnd)
+        screen_left, screen_top = win32gui.ClientToScreen(hwnd, (left, top))
+        return screen_left, screen_top, screen_left + right - left, screen_top + bottom - top
+
+    def focus(self, hwnd):
+        if win32gui.IsIconic(hwnd):
+            win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+        win32gui.SetForegroundWindow(hwnd)
+
+    def foreground(self):
+        return win32gui.GetForegroundWindow()
+
+
+class FakeWindowBackend(WindowBackend):
+    """Fixed window list; focus() only records which window was focused"""
+
+    def __init__(self, windows):
+        self.windows = list(windows)
+        self.focused = None
+        self.focus_calls = []
+
+    def find_windows(self, process_names=GAME_PROCESS_NAMES):
+        return list(self.windows)
+
+    def focus(self, hwnd):
+        self.focused = hwnd
+        self.focus_calls.append(hwnd)
+
+    def foreground(self):
+        return self.focused
+
+
+def default_backend():
+    """Win32 window backend, or None where there are no Win32 windows"""
+    return Win32WindowBackend() if win32gui is not None else None